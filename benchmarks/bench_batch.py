@@ -0,0 +1,73 @@
+"""Бенчмарк пакетной проверки: последовательный цикл против check_many.
+
+Наборы утверждений — случайные литералы словаря накопленной базы, правила —
+вся база из accumulated_results.json.
+
+Запуск:
+    uv run python benchmarks/bench_batch.py
+    uv run python benchmarks/bench_batch.py --sets 400 --workers 4
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from parser.logic_parser import parse_formula_cached, parse_formulas  # noqa: E402
+from prover.batch import check_many  # noqa: E402
+from prover.z3_checker import Z3Checker  # noqa: E402
+
+RULES_PATH = os.path.join(ROOT, "extraction_output", "accumulated_results.json")
+
+
+def load_rules(path: str) -> tuple[list, list[str]]:
+    """Разобранные правила (без ошибок разбора) и словарь переменных."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    parsed = parse_formulas([r["formula"] for r in data["rules"]], return_exceptions=True)
+    rules = [
+        (r["label"], formula) for r, formula in zip(data["rules"], parsed)
+        if not isinstance(formula, Exception)
+    ]
+    return rules, sorted(name for name in data["vocabulary"] if name.isascii() and name.isidentifier())
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Serial vs check_many")
+    arg_parser.add_argument("--rules", default=RULES_PATH, help="Путь к JSON с правилами")
+    arg_parser.add_argument("--sets", type=int, default=200, help="Число наборов")
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Число процессов")
+    args = arg_parser.parse_args()
+
+    rules, vocabulary = load_rules(args.rules)
+    rng = random.Random(0)
+    claim_sets = [
+        [(f"claim_{j + 1}",
+          parse_formula_cached(("~" if rng.random() < 0.3 else "") + rng.choice(vocabulary)))
+         for j in range(rng.randint(3, 12))]
+        for _ in range(args.sets)
+    ]
+    print(f"Правил: {len(rules)}, наборов: {len(claim_sets)}, процессов: {args.workers}")
+
+    start = time.perf_counter()
+    checker = Z3Checker(rules=rules)
+    serial = [checker.check(claims).is_consistent for claims in claim_sets]
+    serial_time = time.perf_counter() - start
+    print(f"  serial      {serial_time:8.2f} с")
+
+    start = time.perf_counter()
+    batch = [r.is_consistent for r in check_many(claim_sets, rules=rules, workers=args.workers)]
+    batch_time = time.perf_counter() - start
+    print(f"  check_many  {batch_time:8.2f} с  (вкл. запуск процессов)")
+    assert batch == serial
+    print(f"  ускорение: x{serial_time / batch_time:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Бенчмарк классификации утверждений: наивный цикл против classify_claims.
+
+Наивный способ — два вызова Z3Checker.check на утверждение (остальные
+утверждения с ним и с его отрицанием), каждый со своим push/pop и
+перекодированием набора. classify_claims делает всё в одном push/pop.
+Правила — вся база из accumulated_results.json, утверждения — случайные
+литералы её словаря.
+
+Запуск:
+    uv run python benchmarks/bench_classify.py
+    uv run python benchmarks/bench_classify.py --sizes 10 40 160 --sets 5
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from bench_batch import RULES_PATH, load_rules  # noqa: E402
+from parser.ast_nodes import Not  # noqa: E402
+from parser.logic_parser import parse_formula_cached  # noqa: E402
+from prover.z3_checker import (  # noqa: E402
+    CONFLICTING, ENTAILED, INDEPENDENT, REFUTED, Z3Checker,
+)
+
+
+def naive_classify(checker: Z3Checker, claims: list) -> dict[str, str]:
+    """Два отдельных check() на каждое утверждение."""
+    status = {}
+    for label, formula in claims:
+        others = [(l, f) for l, f in claims if l != label]
+        entailed = checker.check(others + [("query", Not(formula))]).is_consistent is False
+        refuted = checker.check(others + [(label, formula)]).is_consistent is False
+        if entailed:
+            status[label] = CONFLICTING if refuted else ENTAILED
+        else:
+            status[label] = REFUTED if refuted else INDEPENDENT
+    return status
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Naive loop vs classify_claims")
+    arg_parser.add_argument("--rules", default=RULES_PATH, help="Путь к JSON с правилами")
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[10, 20, 40, 80],
+                            help="Размеры наборов утверждений")
+    arg_parser.add_argument("--sets", type=int, default=5, help="Наборов каждого размера")
+    args = arg_parser.parse_args()
+
+    rules, vocabulary = load_rules(args.rules)
+    # native=False: обе стороны идут через Z3
+    checker = Z3Checker(rules=rules, native=False)
+    rng = random.Random(0)
+    print(f"Правил: {len(rules)}")
+    print(f"  {'утв.':>5} {'наивно, с':>10} {'classify, с':>12} {'ускорение':>10}")
+    for size in args.sizes:
+        claim_sets = [
+            [(f"claim_{j + 1}",
+              parse_formula_cached(("~" if rng.random() < 0.3 else "") + rng.choice(vocabulary)))
+             for j in range(size)]
+            for _ in range(args.sets)
+        ]
+        start = time.perf_counter()
+        naive = [naive_classify(checker, claims) for claims in claim_sets]
+        naive_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fast = [checker.classify_claims(claims) for claims in claim_sets]
+        fast_time = time.perf_counter() - start
+        assert fast == naive
+        print(f"  {size:5d} {naive_time:10.2f} {fast_time:12.2f} {naive_time / fast_time:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
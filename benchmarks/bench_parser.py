@@ -0,0 +1,63 @@
+"""Бенчмарк парсера: Earley против LALR(1) на накопленной базе правил.
+
+Запуск:
+    uv run python benchmarks/bench_parser.py
+    uv run python benchmarks/bench_parser.py --repeat 3
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from parser.logic_parser import parse_formula, parse_formula_earley  # noqa: E402
+
+RULES_PATH = os.path.join(ROOT, "extraction_output", "accumulated_results.json")
+
+
+def load_formulas(path: str) -> list[str]:
+    """Читает строки формул из accumulated_results.json."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return [r["formula"] for r in data["rules"]]
+
+
+def _run(parse, formulas: list[str]) -> tuple[float, int]:
+    """Парсит все формулы, возвращает (секунды, число ошибок)."""
+    errors = 0
+    start = time.perf_counter()
+    for text in formulas:
+        try:
+            parse(text)
+        except Exception:
+            errors += 1
+    return time.perf_counter() - start, errors
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Earley vs LALR(1)")
+    arg_parser.add_argument("--rules", default=RULES_PATH, help="Путь к JSON с правилами")
+    arg_parser.add_argument("--repeat", type=int, default=1, help="Число повторов")
+    args = arg_parser.parse_args()
+
+    formulas = load_formulas(args.rules)
+    print(f"Формул: {len(formulas)}")
+
+    for name, parse in (("earley", parse_formula_earley), ("lalr", parse_formula)):
+        best = None
+        for _ in range(args.repeat):
+            elapsed, errors = _run(parse, formulas)
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"  {name:7s} {best:8.3f} с  ({errors} ошибок разбора)")
+        if name == "earley":
+            earley_time = best
+    print(f"  ускорение: x{earley_time / best:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Бенчмарк отсева: Z3Checker на каждом наборе против RuleScreen + Z3 на остатке.
+
+Наборы утверждений — случайные литералы словаря накопленной базы, правила —
+вся база из accumulated_results.json (как в bench_batch.py).
+
+Запуск:
+    uv run --extra screen python benchmarks/bench_screen.py
+    uv run --extra screen python benchmarks/bench_screen.py --sets 5000 --serial 500
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from bench_batch import RULES_PATH, load_rules  # noqa: E402
+from parser.logic_parser import parse_formula_cached  # noqa: E402
+from prover.screening import RuleScreen, screen_and_check  # noqa: E402
+from prover.z3_checker import UNKNOWN, Z3Checker  # noqa: E402
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Z3 per set vs screening")
+    arg_parser.add_argument("--rules", default=RULES_PATH, help="Путь к JSON с правилами")
+    arg_parser.add_argument("--sets", type=int, default=2000, help="Число наборов")
+    arg_parser.add_argument("--serial", type=int, default=200,
+                            help="Сколько наборов проверить Z3 по одному (для оценки)")
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Число процессов")
+    args = arg_parser.parse_args()
+
+    rules, vocabulary = load_rules(args.rules)
+    rng = random.Random(0)
+    claim_sets = [
+        [(f"claim_{j + 1}",
+          parse_formula_cached(("~" if rng.random() < 0.3 else "") + rng.choice(vocabulary)))
+         for j in range(rng.randint(3, 12))]
+        for _ in range(args.sets)
+    ]
+    print(f"Правил: {len(rules)}, наборов: {len(claim_sets)}")
+
+    start = time.perf_counter()
+    checker = Z3Checker(rules=rules)
+    sample = claim_sets[:args.serial]
+    serial = [checker.check(claims).status for claims in sample]
+    per_set = (time.perf_counter() - start) / len(sample)
+    print(f"  Z3 по одному     {per_set * 1000:8.1f} мс/набор, "
+          f"оценка на все {per_set * len(claim_sets):8.1f} с")
+
+    start = time.perf_counter()
+    screen = RuleScreen(rules)
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    statuses = screen.screen(claim_sets)
+    screen_time = time.perf_counter() - start
+    counts = Counter(statuses)
+    print(f"  RuleScreen       построение {build_time:.2f} с, отсев {screen_time:.2f} с: "
+          f"{dict(counts)}")
+    assert all(s == UNKNOWN or s == z for s, z in zip(statuses, serial))
+
+    start = time.perf_counter()
+    results = screen_and_check(claim_sets, rules, screen=screen, workers=args.workers)
+    total_time = time.perf_counter() - start
+    assert [r.status for r in results[:len(sample)]] == serial
+    print(f"  отсев + Z3       {total_time:8.1f} с  (Z3 на {len(claim_sets) - counts['sat']} наборах)")
+
+
+if __name__ == "__main__":
+    main()
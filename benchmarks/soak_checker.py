@@ -0,0 +1,107 @@
+"""Soak-тест пула чекеров: много проверок из нескольких потоков.
+
+Метки утверждений — как у экстрактора (claim_1, claim_2, ...). Скрипт
+печатает RSS процесса после каждой порции проверок; при пересоздании
+чекеров (max_uses) она должна выйти на плато, а не расти линейно.
+
+С --unique-labels каждая проверка получает новые имена. Таблица строк
+символов в Z3 общая для процесса и не очищается при удалении контекста,
+поэтому в этом режиме RSS медленно растёт при любой стратегии очистки.
+
+С --unique-formulas в каждый набор добавляется утверждение с новым
+аргументом предиката (как цитаты и числа из реальных резюме). Число
+живых AST-узлов (interned_count) при этом должно оставаться на плато:
+таблицы интернирования не удерживают формулы прошедших проверок.
+
+Запуск:
+    uv run python benchmarks/soak_checker.py
+    uv run python benchmarks/soak_checker.py --checks 20000 --threads 8
+"""
+
+import argparse
+import os
+import random
+import resource
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from domain.rules import DOMAIN_RULES, DOMAIN_VOCABULARY  # noqa: E402
+from parser.ast_nodes import interned_count  # noqa: E402
+from parser.logic_parser import parse_formula_cached  # noqa: E402
+from prover.checker_pool import DEFAULT_MAX_USES, CheckerPool  # noqa: E402
+
+
+def rss_mb() -> float:
+    """Текущий RSS процесса в МБ (на не-Linux — пиковый)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def random_claims(
+    rng: random.Random, serial: int, unique_labels: bool = False,
+    unique_formulas: bool = False,
+) -> list[tuple[str, object]]:
+    """Случайный набор литералов словаря (и уникальный предикат при unique_formulas)."""
+    names = list(DOMAIN_VOCABULARY)
+    prefix = f"claim_{serial}_" if unique_labels else "claim_"
+    claims = [
+        (f"{prefix}{j + 1}",
+         parse_formula_cached(("~" if rng.random() < 0.3 else "") + rng.choice(names)))
+        for j in range(rng.randint(2, 8))
+    ]
+    if unique_formulas:
+        claims.append((
+            f"{prefix}{len(claims) + 1}",
+            parse_formula_cached(f'experience("{serial}") -> {rng.choice(names)}'),
+        ))
+    return claims
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Soak-тест CheckerPool")
+    arg_parser.add_argument("--checks", type=int, default=100_000, help="Число проверок")
+    arg_parser.add_argument("--threads", type=int, default=4, help="Число потоков")
+    arg_parser.add_argument("--max-uses", type=int, default=DEFAULT_MAX_USES,
+                            help="Проверок до пересоздания чекера")
+    arg_parser.add_argument("--report", type=int, default=10_000, help="Шаг отчёта")
+    arg_parser.add_argument("--unique-labels", action="store_true",
+                            help="Новые метки утверждений в каждой проверке")
+    arg_parser.add_argument("--unique-formulas", action="store_true",
+                            help="Утверждение с новым аргументом предиката в каждой проверке")
+    args = arg_parser.parse_args()
+
+    rules = [(label, parse_formula_cached(text)) for label, text in DOMAIN_RULES]
+    # native=False: каждая проверка идёт через Z3
+    pool = CheckerPool(rules, size=args.threads, max_uses=args.max_uses, native=False)
+    rng = random.Random(0)
+
+    print(f"Проверок: {args.checks}, потоков: {args.threads}, max_uses: {args.max_uses}")
+    start = time.perf_counter()
+    with pool, ThreadPoolExecutor(args.threads) as executor:
+        done = 0
+        while done < args.checks:
+            batch = min(args.report, args.checks - done)
+            claim_sets = [
+                random_claims(rng, done + i, args.unique_labels, args.unique_formulas)
+                for i in range(batch)
+            ]
+            for _ in executor.map(pool.check, claim_sets):
+                pass
+            done += batch
+            elapsed = time.perf_counter() - start
+            del claim_sets
+            print(f"  {done:8d} проверок  {elapsed:7.1f} с  RSS {rss_mb():7.1f} МБ"
+                  f"  узлов AST {interned_count():8d}")
+
+
+if __name__ == "__main__":
+    main()
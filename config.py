@@ -7,6 +7,29 @@ LLM_API_KEY = os.environ.get("LLM_API_KEY", "")
 LLM_BASE_URL = os.environ.get("LLM_BASE_URL", "https://api.deepseek.com")
 LLM_MODEL = os.environ.get("LLM_MODEL", "deepseek-chat")
 
+# Пул соединений общего LLM-клиента (0 — лимиты SDK по умолчанию) и повторы
+# при 429/5xx: число повторов и базовая пауза экспоненциальной задержки, секунды
+LLM_POOL_SIZE = int(os.environ.get("LLM_POOL_SIZE", "0"))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BACKOFF = float(os.environ.get("LLM_RETRY_BACKOFF", "1.0"))
+
+# Дисковый кэш ответов LLM (пустой путь — кэш выключен), предел размера в МБ
+# и срок жизни записи в днях (0 — без предела). По умолчанию — в кэш-каталоге
+# пользователя: в ответах есть цитаты из резюме, общий temp для них не годится
+_USER_CACHE_DIR = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+    os.path.expanduser("~"), ".cache"
+)
+LLM_CACHE_PATH = os.environ.get(
+    "LLM_CACHE_PATH", os.path.join(_USER_CACHE_DIR, "logic_extraction", "llm_cache.sqlite")
+)
+LLM_CACHE_MAX_MB = float(os.environ.get("LLM_CACHE_MAX_MB", "256"))
+LLM_CACHE_MAX_AGE_DAYS = float(os.environ.get("LLM_CACHE_MAX_AGE_DAYS", "30"))
+
+# Извлечение по фрагментам (--chunked): предел длины фрагмента в символах
+# и число фрагментов, извлекаемых одновременно
+EXTRACT_CHUNK_CHARS = int(os.environ.get("EXTRACT_CHUNK_CHARS", "6000"))
+EXTRACT_CONCURRENCY = int(os.environ.get("EXTRACT_CONCURRENCY", "4"))
+
 if not LLM_API_KEY:
     raise RuntimeError(
         "LLM_API_KEY is not set. "
@@ -16,3 +39,7 @@ if not LLM_API_KEY:
 FLASK_DEBUG = os.environ.get("FLASK_DEBUG", "false").lower() in ("1", "true", "yes")
 FLASK_HOST = os.environ.get("FLASK_HOST", "127.0.0.1")
 FLASK_PORT = int(os.environ.get("FLASK_PORT", "8080"))
+
+# Лимиты Z3 на одну проверку: секунды и ресурсный лимит (0 — без лимита)
+Z3_TIMEOUT = float(os.environ.get("Z3_TIMEOUT", "10"))
+Z3_RLIMIT = int(os.environ.get("Z3_RLIMIT", "0"))
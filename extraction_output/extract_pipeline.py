@@ -17,13 +17,19 @@ from datetime import datetime, timezone
 from pathlib import Path
 
 SCRIPT_DIR = Path(__file__).resolve().parent
-PROJECT_ROOT = SCRIPT_DIR.parent.parent
+REPO_ROOT = SCRIPT_DIR.parent
+PROJECT_ROOT = REPO_ROOT.parent
 RESUME_ROOT = PROJECT_ROOT / "HRom_resume_fabricated"
 
 RESULTS_JSON = SCRIPT_DIR / "accumulated_results.json"
 PROMPT_TEMPLATE = SCRIPT_DIR / "prompt_template.txt"
 LOG_FILE = SCRIPT_DIR / "pipeline.log"
 
+# Скрипт запускается напрямую, а не как модуль пакета: пакеты репозитория
+# (domain, parser, prover) импортируются из его корня
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
 MAX_RETRIES = 2
 RATE_LIMIT_BACKOFF = 60  # секунд ожидания при лимите
 RATE_LIMIT_PATTERNS = [
@@ -116,10 +122,6 @@ def save_data(data: dict) -> None:
 # ---------------------------------------------------------------------------
 def init_results() -> dict:
     """Создать baseline из domain/rules.py."""
-    domain_dir = str(SCRIPT_DIR.parent)
-    if domain_dir not in sys.path:
-        sys.path.insert(0, domain_dir)
-
     from domain.rules import DOMAIN_VOCABULARY, DOMAIN_RULES
 
     vocabulary = {}
@@ -245,20 +247,26 @@ def merge_result(data: dict, source: str, result: dict) -> tuple[int, int]:
             if source not in data["vocabulary"][name]["sources"]:
                 data["vocabulary"][name]["sources"].append(source)
 
-    existing_formulas = {r["formula"] for r in data["rules"]}
+    # Дедупликация по канонической форме: `a -> b` и `~b -> ~a` — одно правило.
+    # Ключи существующих правил хранятся в них самих и не пересчитываются
+    from parser.canonical import canonical_key, rule_keys
+
+    existing_formulas = rule_keys(data)
     for rule in new_rules:
         label = rule.get("label", "")
         formula = rule.get("formula", "")
         if not label or not formula:
             continue
-        if formula not in existing_formulas:
+        key = canonical_key(formula)
+        if key not in existing_formulas:
             data["rules"].append({
                 "label": label,
                 "formula": formula,
                 "sources": [source],
                 "is_baseline": False,
+                "canonical_key": key,
             })
-            existing_formulas.add(formula)
+            existing_formulas.add(key)
             rules_added += 1
 
     data["processed_files"][source] = {
@@ -399,6 +407,11 @@ async def run(max_files: int, concurrency: int) -> None:
 
     already = len(data.get("processed_files", {}))
     files = collect_files(data, max_files)
+    # Ключи дедупликации правил — до старта задач, а не под блокировкой
+    # первого слияния (там они остановили бы event loop)
+    from parser.canonical import rule_keys
+
+    rule_keys(data)
 
     if not files:
         log.info("No files to process. Already processed: %d", already)
@@ -7,6 +7,13 @@ import sys
 from datetime import datetime, timezone
 from pathlib import Path
 
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Скрипт запускается напрямую, а не как модуль пакета: пакеты репозитория
+# (domain, parser, prover) импортируются из его корня
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat(timespec="seconds")
@@ -27,10 +34,6 @@ def _save_json(path: Path, data: dict) -> None:
 # ---------------------------------------------------------------------------
 def cmd_init(output_path: Path) -> None:
     # Импортируем baseline из domain/rules.py
-    domain_dir = str(Path(__file__).resolve().parent.parent)
-    if domain_dir not in sys.path:
-        sys.path.insert(0, domain_dir)
-
     from domain.rules import DOMAIN_VOCABULARY as domain_vocab, DOMAIN_RULES as domain_rules
 
     vocabulary = {}
@@ -103,21 +106,26 @@ def cmd_merge(output_path: Path, source: str) -> None:
             if source not in data["vocabulary"][name]["sources"]:
                 data["vocabulary"][name]["sources"].append(source)
 
-    # Добавляем новые правила (дедупликация по формуле)
-    existing_formulas = {r["formula"] for r in data["rules"]}
+    # Добавляем новые правила (дедупликация по канонической форме формулы)
+    from parser.canonical import canonical_key, rule_keys
+
+    # Ключи существующих правил хранятся в них самих и не пересчитываются
+    existing_formulas = rule_keys(data)
     for rule in new_rules:
         label = rule.get("label", "")
         formula = rule.get("formula", "")
         if not label or not formula:
             continue
-        if formula not in existing_formulas:
+        key = canonical_key(formula)
+        if key not in existing_formulas:
             data["rules"].append({
                 "label": label,
                 "formula": formula,
                 "sources": [source],
                 "is_baseline": False,
+                "canonical_key": key,
             })
-            existing_formulas.add(formula)
+            existing_formulas.add(key)
             rules_added += 1
 
     # Записываем в processed_files
@@ -155,6 +163,61 @@ def cmd_record_error(output_path: Path, source: str, error_msg: str) -> None:
     print(f"Recorded error for {source}: {error_msg}")
 
 
+# ---------------------------------------------------------------------------
+# audit: найти противоречивые и избыточные правила, записать урезанный пакет
+# ---------------------------------------------------------------------------
+def cmd_audit(path: Path, output_path: Path | None, report_path: Path | None) -> None:
+    from parser.logic_parser import parse_formulas
+    from prover.audit import audit_rules
+
+    data = _load_json(path)
+    rules = data["rules"]
+    parsed = parse_formulas([r["formula"] for r in rules], return_exceptions=True)
+    # Правила с ошибкой разбора в Z3 всё равно не попадают — в пакет их не берём
+    indices = [i for i, f in enumerate(parsed) if not isinstance(f, Exception)]
+    parse_errors = [i for i, f in enumerate(parsed) if isinstance(f, Exception)]
+    baseline = {j for j, i in enumerate(indices) if rules[i].get("is_baseline")}
+
+    def progress(done: int, total: int) -> None:
+        if done % 250 == 0 or done == total:
+            print(f"  redundancy check: {done}/{total}", file=sys.stderr)
+
+    audit = audit_rules([parsed[i] for i in indices], baseline, progress=progress)
+
+    def describe(j: int) -> dict:
+        rule = rules[indices[j]]
+        return {"label": rule["label"], "formula": rule["formula"]}
+
+    pruned = dict(data)
+    pruned["rules"] = [rules[indices[j]] for j in audit.kept]
+    pruned["metadata"] = dict(data["metadata"], audited_from=len(rules), last_updated=_now_iso())
+    output_path = output_path or path.with_name(f"{path.stem}.pruned.json")
+    _save_json(output_path, pruned)
+
+    if report_path:
+        _save_json(report_path, {
+            "parse_errors": [
+                {"label": rules[i]["label"], "formula": rules[i]["formula"],
+                 "error": str(parsed[i]).splitlines()[0]}
+                for i in parse_errors
+            ],
+            "conflicts": [
+                {"rules": [describe(j) for j in mus], "dropped": describe(victim)}
+                for mus, victim in zip(audit.conflicts, audit.dropped_conflicting)
+            ],
+            "redundant": [
+                {"rule": describe(j), "entailed_by": [describe(k) for k in premises]}
+                for j, premises in audit.redundant.items()
+            ],
+        })
+
+    print(
+        f"Audited {len(rules)} rules: {len(parse_errors)} unparsable, "
+        f"{len(audit.conflicts)} conflicts ({len(audit.dropped_conflicting)} dropped), "
+        f"{len(audit.redundant)} redundant; kept {len(audit.kept)} -> {output_path}"
+    )
+
+
 # ---------------------------------------------------------------------------
 # CLI
 # ---------------------------------------------------------------------------
@@ -177,6 +240,14 @@ def main() -> None:
     p_err.add_argument("--source", required=True, help="Relative path of failed file")
     p_err.add_argument("--error-msg", required=True, help="Error message")
 
+    # audit
+    p_audit = subparsers.add_parser(
+        "audit", help="Find inconsistent/redundant rules and write a pruned rule pack"
+    )
+    p_audit.add_argument("path", type=Path, help="Accumulated JSON path")
+    p_audit.add_argument("--output", type=Path, help="Pruned pack path (default: <name>.pruned.json)")
+    p_audit.add_argument("--report", type=Path, help="Write a JSON audit report here")
+
     args = parser.parse_args()
 
     if args.command == "init":
@@ -185,6 +256,8 @@ def main() -> None:
         cmd_merge(args.path, args.source)
     elif args.command == "record-error":
         cmd_record_error(args.path, args.source, args.error_msg)
+    elif args.command == "audit":
+        cmd_audit(args.path, args.output, args.report)
 
 
 if __name__ == "__main__":
@@ -1,9 +1,7 @@
 """Анализ противоречий через LLM на основе unsat core."""
 
-import json
-from openai import OpenAI
-
-from config import LLM_API_KEY, LLM_BASE_URL, LLM_MODEL
+from llm.cache import CACHE_USE
+from llm.client import acall_json, call_json
 from llm.prompts import ANALYSIS_SYSTEM_PROMPT
 from prover.z3_checker import CheckResult
 
@@ -12,8 +10,13 @@ def _build_analysis_message(
     core_labels: set[str],
     claims: list[dict],
     domain_rules: list[tuple[str, str]],
+    cores: list[list[str]] | None = None,
 ) -> str:
-    """Формирует сообщение для LLM из unsat core, утверждений и правил."""
+    """Формирует сообщение для LLM из unsat core, утверждений и правил.
+
+    Если найдено несколько независимых минимальных ядер, они перечисляются
+    отдельно, чтобы LLM объяснила каждое противоречие.
+    """
     involved_claims = [c for c in claims if c["label"] in core_labels]
     involved_rules = [(l, f) for l, f in domain_rules if l in core_labels]
 
@@ -25,48 +28,67 @@ def _build_analysis_message(
         f"  {label}: {formula}" for label, formula in involved_rules
     )
     all_core = ", ".join(sorted(core_labels))
+    cores_text = ""
+    if cores and len(cores) > 1:
+        cores_text = "Минимальные ядра (отдельные противоречия):\n" + "\n".join(
+            f"  {i}: {', '.join(core)}" for i, core in enumerate(cores, 1)
+        ) + "\n\n"
 
     return (
         f"Метки unsat core: {all_core}\n\n"
+        f"{cores_text}"
         f"Утверждения из резюме:\n{claims_text}\n\n"
         f"Доменные правила:\n{rules_text}\n\n"
         f"Объясни противоречия."
     )
 
 
-def _call_llm(user_message: str) -> dict:
+def _validate_analysis(data: dict) -> None:
+    if "contradictions" not in data or "overall_assessment" not in data:
+        raise ValueError(
+            "LLM response missing required keys: 'contradictions' and/or 'overall_assessment'"
+        )
+
+
+def _call_llm(user_message: str, cache: str = CACHE_USE) -> dict:
     """Отправляет запрос к LLM и возвращает распарсенный JSON-ответ."""
-    client = OpenAI(api_key=LLM_API_KEY, base_url=LLM_BASE_URL)
-
-    response = client.chat.completions.create(
-        model=LLM_MODEL,
-        temperature=0.2,
-        response_format={"type": "json_object"},
-        messages=[
-            {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
-            {"role": "user", "content": user_message},
-        ],
-        timeout=60,
+    return call_json(
+        "analyze", ANALYSIS_SYSTEM_PROMPT, user_message, temperature=0.2,
+        cache=cache, validate=_validate_analysis,
     )
 
-    content = response.choices[0].message.content
-    if content is None:
-        raise ValueError("LLM returned empty content (None)")
 
-    data = json.loads(content)
+def _answer_without_llm(check_result: CheckResult) -> dict | None:
+    """Ответ для SAT и UNKNOWN — LLM нужна только для UNSAT."""
+    if check_result.is_consistent is None:
+        return {
+            "contradictions": [],
+            "overall_assessment": "Проверка не завершена: решатель не уложился в лимит "
+                                  f"({check_result.reason_unknown}). Результат неизвестен.",
+        }
 
-    if "contradictions" not in data or "overall_assessment" not in data:
-        raise ValueError(
-            "LLM response missing required keys: 'contradictions' and/or 'overall_assessment'"
-        )
+    if check_result.is_consistent:
+        return {
+            "contradictions": [],
+            "overall_assessment": "Противоречий не найдено. Все утверждения логически согласованы с доменными правилами.",
+        }
 
-    return data
+    return None
+
+
+def _analysis_message(
+    check_result: CheckResult, claims: list[dict], domain_rules: list[tuple[str, str]]
+) -> str:
+    cores = check_result.unsat_cores or [check_result.unsat_core_labels]
+    core_labels = set().union(*cores)
+    return _build_analysis_message(core_labels, claims, domain_rules, cores)
 
 
 def analyze_contradictions(
     check_result: CheckResult,
     claims: list[dict],
     domain_rules: list[tuple[str, str]],
+    cache: str = CACHE_USE,
 ) -> dict:
     """Анализирует противоречия, найденные Z3, через LLM.
 
@@ -74,16 +96,29 @@ def analyze_contradictions(
         check_result: CheckResult из Z3 с метками unsat core.
         claims: Список утверждений из экстрактора (label, original_text, formula).
         domain_rules: Список кортежей (метка, строка_формулы) доменных правил.
+        cache: Режим кэша ответов LLM (см. llm.client.call_json).
 
     Returns:
         Dict с ключами 'contradictions' и 'overall_assessment'.
     """
-    if check_result.is_consistent:
-        return {
-            "contradictions": [],
-            "overall_assessment": "Противоречий не найдено. Все утверждения логически согласованы с доменными правилами.",
-        }
+    answer = _answer_without_llm(check_result)
+    if answer is not None:
+        return answer
+    return _call_llm(_analysis_message(check_result, claims, domain_rules), cache)
 
-    core_labels = set(check_result.unsat_core_labels)
-    message = _build_analysis_message(core_labels, claims, domain_rules)
-    return _call_llm(message)
+
+async def aanalyze_contradictions(
+    check_result: CheckResult,
+    claims: list[dict],
+    domain_rules: list[tuple[str, str]],
+    cache: str = CACHE_USE,
+) -> dict:
+    """Асинхронный analyze_contradictions (через AsyncOpenAI)."""
+    answer = _answer_without_llm(check_result)
+    if answer is not None:
+        return answer
+    return await acall_json(
+        "analyze", ANALYSIS_SYSTEM_PROMPT,
+        _analysis_message(check_result, claims, domain_rules), temperature=0.2,
+        cache=cache, validate=_validate_analysis,
+    )
@@ -0,0 +1,166 @@
+"""Дисковый кэш ответов LLM с адресацией по содержимому.
+
+Ключ — SHA-256 от модели, температуры, системного промпта и сообщения
+пользователя: повторная проверка того же резюме (или прогон main.py при
+настройке правил) берёт ответ из кэша за миллисекунды вместо 20-60 с.
+Промпт экстрактора включает словарь и правила, поэтому их правка сама
+меняет ключ.
+
+Хранилище — SQLite (LLM_CACHE_PATH) в режиме WAL, его можно делить между
+процессами web-воркеров. Ответы содержат цитаты из резюме, поэтому файл
+базы создаётся с правами 0600, а его каталог — 0700. Записи старше LLM_CACHE_MAX_AGE_DAYS считаются
+промахом и удаляются; при превышении LLM_CACHE_MAX_MB вытесняются записи,
+которые дольше всего не читались.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from config import LLM_CACHE_MAX_AGE_DAYS, LLM_CACHE_MAX_MB, LLM_CACHE_PATH
+
+# Режимы кэша для call_json: читать и писать, только писать (--refresh), не трогать
+CACHE_USE = "use"
+CACHE_REFRESH = "refresh"
+CACHE_OFF = "off"
+CACHE_MODES = (CACHE_USE, CACHE_REFRESH, CACHE_OFF)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+"""
+
+
+def cache_key(model: str, temperature: float, system_prompt: str, user_message: str) -> str:
+    """SHA-256 (hex) от всех входов запроса, влияющих на ответ."""
+    payload = json.dumps(
+        [model, temperature, system_prompt, user_message], ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Кэш ответов LLM в SQLite с вытеснением по размеру и возрасту.
+
+    Args:
+        path: Путь к файлу базы.
+        max_bytes: Предел суммарного размера ответов (0 — без предела).
+        max_age: Срок жизни записи в секундах (0 — бессрочно).
+    """
+
+    def __init__(self, path: str, max_bytes: int = 0, max_age: float = 0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        # SQLite создаёт -wal и -shm с правами основного файла, поэтому
+        # достаточно создать его самим, не полагаясь на umask
+        os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o600))
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def get(self, key: str) -> str | None:
+        """Ответ по ключу или None (промах, в том числе по возрасту)."""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.max_age and now - row[1] > self.max_age:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.evictions += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        """Сохраняет ответ и вытесняет старые записи сверх max_bytes."""
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            if self.max_bytes:
+                self._evict_to(self.max_bytes)
+
+    def _evict_to(self, max_bytes: int) -> None:
+        """Удаляет давно не читанные записи, пока размер не уложится в предел."""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= max_bytes:
+            return
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            if total <= max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def stats(self) -> dict:
+        """Счётчики попаданий/промахов/вытеснений и текущий размер кэша."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": entries,
+                "bytes": size,
+            }
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_cache: LLMCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> LLMCache | None:
+    """Кэш процесса по настройкам из config; None, если LLM_CACHE_PATH пуст."""
+    global _cache
+    if not LLM_CACHE_PATH:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache(
+                LLM_CACHE_PATH,
+                max_bytes=int(LLM_CACHE_MAX_MB * 1024 * 1024),
+                max_age=LLM_CACHE_MAX_AGE_DAYS * 86400,
+            )
+        return _cache
+
+
+def cache_stats() -> dict | None:
+    """Счётчики кэша процесса или None, если кэш выключен."""
+    cache = get_cache()
+    return cache.stats() if cache is not None else None
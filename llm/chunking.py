@@ -0,0 +1,133 @@
+"""Разбиение длинного резюме на фрагменты и слияние извлечений по ним.
+
+Длинное многостраничное резюме одним сообщением упирается в таймаут LLM
+или даёт обрезанный JSON. split_sections режет текст по границам
+разделов (опыт работы, проекты, навыки, образование...) и отдельных мест
+работы (строки с диапазоном дат), а соседние короткие разделы склеивает
+во фрагменты до max_chars символов. Фрагменты извлекаются параллельно,
+и задержка определяется самым большим разделом, а не всем документом.
+
+merge_extractions сливает ответы по фрагментам: утверждения с
+эквивалентной формулой (parser.canonical) остаются один раз, метки
+перенумеровываются по порядку (claim_1, claim_2, ...), потому что каждый
+фрагмент нумерует свои утверждения с claim_1.
+"""
+
+import re
+
+from parser.canonical import canonical_key
+
+# Заголовки разделов резюме (начало строки, без учёта регистра)
+SECTION_HEADINGS = (
+    "опыт работы", "опыт", "проекты", "pet-проекты", "ключевые навыки", "навыки",
+    "образование", "курсы", "повышение квалификации", "сертификаты", "обо мне",
+    "о себе", "знание языков", "дополнительная информация", "достижения",
+    "work experience", "experience", "employment", "projects", "skills",
+    "education", "courses", "certifications", "summary", "about", "languages",
+    "achievements",
+)
+
+_MONTH = r"[A-Za-zА-Яа-яЁё]+\.?"
+# Строка, начинающаяся с диапазона дат: новое место работы или проект
+_DATE_RANGE = re.compile(
+    rf"^\s*(?:{_MONTH}\s+|\d{{1,2}}[./])?\d{{4}}\s*[—–-]\s*"
+    rf"(?:(?:{_MONTH}\s+|\d{{1,2}}[./])?\d{{4}}|(?:по\s+)?настоящее\s+время|present|now|current)",
+    re.IGNORECASE,
+)
+_HEADING = re.compile(
+    r"^\s*(?:#+\s*)?(?:" + "|".join(re.escape(h) for h in SECTION_HEADINGS) + r")\b",
+    re.IGNORECASE,
+)
+# Длиннее этого строка считается текстом, а не заголовком раздела
+_MAX_HEADING_LEN = 60
+
+
+def _is_boundary(line: str) -> bool:
+    """Начинает ли строка новый раздел или новое место работы."""
+    if _DATE_RANGE.match(line):
+        return True
+    return len(line.strip()) <= _MAX_HEADING_LEN and bool(_HEADING.match(line))
+
+
+def _split_oversized(section: str, max_chars: int) -> list[str]:
+    """Делит слишком длинный раздел по абзацам, а абзацы — по строкам."""
+    pieces: list[str] = []
+    for paragraph in re.split(r"\n\s*\n", section):
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        current = ""
+        for line in paragraph.splitlines(keepends=True):
+            if current and len(current) + len(line) > max_chars:
+                pieces.append(current)
+                current = ""
+            current += line
+        pieces.append(current)
+    return _pack(pieces, max_chars, "\n\n")
+
+
+def _pack(pieces: list[str], max_chars: int, sep: str) -> list[str]:
+    """Склеивает подряд идущие куски во фрагменты не длиннее max_chars."""
+    chunks: list[str] = []
+    current = ""
+    for piece in pieces:
+        if not piece.strip():
+            continue
+        if current and len(current) + len(sep) + len(piece) > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = current + sep + piece if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_sections(text: str, max_chars: int) -> list[str]:
+    """Фрагменты резюме по границам разделов, каждый не длиннее max_chars.
+
+    Текст короче max_chars возвращается одним фрагментом. Строка длиннее
+    max_chars (сплошной текст без переносов) остаётся целой.
+    """
+    if len(text) <= max_chars:
+        return [text] if text.strip() else []
+    sections: list[str] = []
+    current: list[str] = []
+    for line in text.splitlines():
+        if current and _is_boundary(line):
+            sections.append("\n".join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append("\n".join(current))
+
+    pieces: list[str] = []
+    for section in sections:
+        if len(section) > max_chars:
+            pieces.extend(_split_oversized(section, max_chars))
+        else:
+            pieces.append(section)
+    return _pack(pieces, max_chars, "\n")
+
+
+def merge_extractions(extractions: list[dict]) -> dict:
+    """Сливает ответы экстрактора по фрагментам в один.
+
+    Утверждения идут в порядке фрагментов; повтор эквивалентной формулы
+    отбрасывается, метки перенумеровываются claim_1, claim_2, ...
+    predicates_used объединяются (описание из первого фрагмента).
+    """
+    claims: list[dict] = []
+    seen: set[str] = set()
+    predicates_used: dict = {}
+    for extraction in extractions:
+        for claim in extraction.get("claims", []):
+            formula = claim.get("formula")
+            key = canonical_key(formula) if isinstance(formula, str) else repr(formula)
+            if key in seen:
+                continue
+            seen.add(key)
+            claims.append({**claim, "label": f"claim_{len(claims) + 1}"})
+        for name, description in extraction.get("predicates_used", {}).items():
+            predicates_used.setdefault(name, description)
+    return {"claims": claims, "predicates_used": predicates_used}
@@ -0,0 +1,366 @@
+"""Общий клиент LLM для экстрактора и анализатора.
+
+Один клиент OpenAI на процесс: его HTTP-пул держит keep-alive соединения
+к LLM_BASE_URL, поэтому вызовы после первого не платят за TCP- и
+TLS-рукопожатие. Ответы 429 и 5xx и обрывы соединения повторяются с
+экспоненциальной задержкой (LLM_MAX_RETRIES, LLM_RETRY_BACKOFF), заголовок
+Retry-After учитывается. По каждой стадии собираются задержка вызовов,
+число повторов и токены — см. llm_metrics(). Перед запросом проверяется
+дисковый кэш ответов (llm/cache.py).
+
+acall_json — то же для asyncio на AsyncOpenAI: у каждого event loop свой
+асинхронный клиент (его соединения привязаны к циклу). stream_json читает
+ответ потоком и отдаёт текст по мере генерации.
+"""
+
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+import weakref
+from dataclasses import asdict, dataclass
+from typing import Callable
+
+from openai import (
+    APIConnectionError, APIStatusError, AsyncOpenAI, DefaultAsyncHttpxClient,
+    DefaultHttpxClient, OpenAI,
+)
+
+from config import (
+    LLM_API_KEY, LLM_BASE_URL, LLM_MAX_RETRIES, LLM_MODEL, LLM_POOL_SIZE,
+    LLM_RETRY_BACKOFF,
+)
+from llm.cache import CACHE_MODES, CACHE_OFF, CACHE_USE, cache_key, get_cache
+
+logger = logging.getLogger(__name__)
+
+# Верхняя граница одной паузы между повторами, секунды
+MAX_BACKOFF = 30.0
+
+_client: OpenAI | None = None
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = (
+    weakref.WeakKeyDictionary()
+)
+_client_lock = threading.Lock()
+
+
+@dataclass
+class StageMetrics:
+    """Накопленные метрики вызовов LLM одной стадии."""
+    calls: int = 0
+    errors: int = 0
+    retries: int = 0
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+class LLMMetrics:
+    """Потокобезопасные счётчики вызовов LLM по стадиям."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: dict[str, StageMetrics] = {}
+
+    def record(self, stage: str, latency: float, retries: int,
+               usage=None, error: bool = False) -> None:
+        with self._lock:
+            m = self._stages.setdefault(stage, StageMetrics())
+            m.calls += 1
+            m.errors += int(error)
+            m.retries += retries
+            m.latency_total += latency
+            m.latency_max = max(m.latency_max, latency)
+            if usage is not None:
+                m.prompt_tokens += int(usage.prompt_tokens or 0)
+                m.completion_tokens += int(usage.completion_tokens or 0)
+
+    def snapshot(self) -> dict[str, dict]:
+        """Копия метрик: {стадия: {calls, errors, retries, latency_*, *_tokens}}."""
+        with self._lock:
+            return {stage: asdict(m) for stage, m in self._stages.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+
+
+metrics = LLMMetrics()
+
+
+def llm_metrics() -> dict[str, dict]:
+    """Метрики вызовов LLM этого процесса по стадиям."""
+    return metrics.snapshot()
+
+
+def _build_client(asynchronous: bool = False):
+    client_cls, http_client_cls = (
+        (AsyncOpenAI, DefaultAsyncHttpxClient) if asynchronous
+        else (OpenAI, DefaultHttpxClient)
+    )
+    http_client = None
+    if LLM_POOL_SIZE > 0:
+        import httpx  # зависимость openai; нужна только для своих лимитов пула
+
+        http_client = http_client_cls(limits=httpx.Limits(
+            max_connections=LLM_POOL_SIZE, max_keepalive_connections=LLM_POOL_SIZE,
+        ))
+    # Повторы делает call_json, чтобы они попадали в метрики
+    return client_cls(
+        api_key=LLM_API_KEY, base_url=LLM_BASE_URL, max_retries=0, http_client=http_client,
+    )
+
+
+def get_client() -> OpenAI:
+    """Клиент OpenAI, общий для всего процесса (создаётся при первом вызове)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = _build_client()
+        return _client
+
+
+def close_client() -> None:
+    """Закрывает общий клиент и его соединения; следующий вызов создаст новый."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def get_async_client() -> AsyncOpenAI:
+    """AsyncOpenAI, общий для всех корутин текущего event loop."""
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = _async_clients[loop] = _build_client(asynchronous=True)
+        return client
+
+
+async def aclose_async_client() -> None:
+    """Закрывает асинхронный клиент текущего event loop, если он создан."""
+    with _client_lock:
+        client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Обрыв соединения, таймаут, 429 или 5xx."""
+    if isinstance(error, APIConnectionError):
+        return True
+    return isinstance(error, APIStatusError) and (
+        error.status_code == 429 or error.status_code >= 500
+    )
+
+
+def _backoff(attempt: int, error: Exception) -> float:
+    """Пауза перед повтором: Retry-After сервера или 2^attempt * база с джиттером."""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        delay = float(retry_after)
+    except (TypeError, ValueError):
+        delay = LLM_RETRY_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.0)
+    return min(max(delay, 0.0), MAX_BACKOFF)
+
+
+def _request(system_prompt: str, user_message: str, temperature: float,
+             timeout: float) -> dict:
+    """Аргументы chat.completions.create для JSON-запроса."""
+    return {
+        "model": LLM_MODEL,
+        "temperature": temperature,
+        "response_format": {"type": "json_object"},
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_message},
+        ],
+        "timeout": timeout,
+    }
+
+
+def _cache_lookup(stage: str, cache: str, key: str):
+    """(кэш или None, ответ из кэша или None) для режима cache."""
+    if cache not in CACHE_MODES:
+        raise ValueError(f"Неизвестный режим кэша: {cache!r}")
+    store = get_cache() if cache != CACHE_OFF else None
+    if store is None or cache != CACHE_USE:
+        return store, None
+    content = store.get(key)
+    if content is not None:
+        logger.info("LLM %s: ответ из кэша", stage)
+    return store, content
+
+
+def _retry_delay(stage: str, error: Exception, retries: int, start: float) -> float:
+    """Пауза перед повтором; если повторять нельзя, пишет ошибку в метрики и
+    пробрасывает её."""
+    if retries >= LLM_MAX_RETRIES or not _is_retryable(error):
+        metrics.record(stage, time.perf_counter() - start, retries, error=True)
+        raise error
+    delay = _backoff(retries, error)
+    logger.warning(
+        "LLM %s: %s, повтор %d через %.1f с", stage, error, retries + 1, delay
+    )
+    return delay
+
+
+def _finish(stage: str, content: str | None, usage, start: float, retries: int,
+            store, key: str, validate: Callable[[dict], None] | None) -> dict:
+    """Метрики вызова, разбор и проверка ответа, запись в кэш."""
+    latency = time.perf_counter() - start
+    metrics.record(stage, latency, retries, usage)
+    logger.info(
+        "LLM %s: %.2f с, повторов %d, токенов %s/%s", stage, latency, retries,
+        getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None),
+    )
+
+    if content is None:
+        raise ValueError("LLM returned empty content (None)")
+    data = json.loads(content)
+    if validate is not None:
+        validate(data)
+    if store is not None:
+        store.put(key, content)
+    return data
+
+
+def call_json(
+    stage: str,
+    system_prompt: str,
+    user_message: str,
+    temperature: float,
+    timeout: float = 60,
+    cache: str = CACHE_USE,
+    validate: Callable[[dict], None] | None = None,
+) -> dict:
+    """Запрос к LLM в режиме JSON; возвращает распарсенный ответ.
+
+    Args:
+        stage: Имя стадии для метрик и логов ("extract", "analyze").
+        system_prompt: Системный промпт.
+        user_message: Сообщение пользователя.
+        temperature: Температура выборки.
+        timeout: Таймаут одного HTTP-запроса, секунды.
+        cache: CACHE_USE — читать и писать кэш, CACHE_REFRESH — запросить
+            заново и перезаписать, CACHE_OFF — не трогать кэш.
+        validate: Проверка ответа (бросает ValueError); в кэш попадают
+            только ответы, прошедшие её.
+
+    Raises:
+        ValueError: LLM вернула пустой ответ или ответ не прошёл validate.
+        json.JSONDecodeError: Ответ не JSON.
+        openai.OpenAIError: Ошибка API, не исправленная повторами.
+    """
+    key = cache_key(LLM_MODEL, temperature, system_prompt, user_message)
+    store, content = _cache_lookup(stage, cache, key)
+    if content is not None:
+        return json.loads(content)
+
+    client = get_client()
+    request = _request(system_prompt, user_message, temperature, timeout)
+    retries = 0
+    start = time.perf_counter()
+    while True:
+        try:
+            response = client.chat.completions.create(**request)
+            break
+        except Exception as error:
+            time.sleep(_retry_delay(stage, error, retries, start))
+            retries += 1
+    return _finish(
+        stage, response.choices[0].message.content, getattr(response, "usage", None),
+        start, retries, store, key, validate,
+    )
+
+
+async def acall_json(
+    stage: str,
+    system_prompt: str,
+    user_message: str,
+    temperature: float,
+    timeout: float = 60,
+    cache: str = CACHE_USE,
+    validate: Callable[[dict], None] | None = None,
+) -> dict:
+    """Асинхронный call_json: запрос через AsyncOpenAI, те же кэш, повторы и метрики."""
+    key = cache_key(LLM_MODEL, temperature, system_prompt, user_message)
+    store, content = _cache_lookup(stage, cache, key)
+    if content is not None:
+        return json.loads(content)
+
+    client = get_async_client()
+    request = _request(system_prompt, user_message, temperature, timeout)
+    retries = 0
+    start = time.perf_counter()
+    while True:
+        try:
+            response = await client.chat.completions.create(**request)
+            break
+        except Exception as error:
+            await asyncio.sleep(_retry_delay(stage, error, retries, start))
+            retries += 1
+    return _finish(
+        stage, response.choices[0].message.content, getattr(response, "usage", None),
+        start, retries, store, key, validate,
+    )
+
+
+def stream_json(
+    stage: str,
+    system_prompt: str,
+    user_message: str,
+    temperature: float,
+    on_text: Callable[[str], None],
+    timeout: float = 60,
+    cache: str = CACHE_USE,
+    validate: Callable[[dict], None] | None = None,
+) -> dict:
+    """call_json в режиме потока: каждый кусок ответа сразу уходит в on_text.
+
+    Ответ из кэша передаётся в on_text одним куском. Повтор возможен, только
+    пока on_text не получил ни одного куска: иначе получатель уже начал
+    обрабатывать ответ, и ошибка пробрасывается.
+    """
+    key = cache_key(LLM_MODEL, temperature, system_prompt, user_message)
+    store, content = _cache_lookup(stage, cache, key)
+    if content is not None:
+        on_text(content)
+        return json.loads(content)
+
+    client = get_client()
+    request = _request(system_prompt, user_message, temperature, timeout)
+    # Последний кусок потока несёт usage (choices у него пустые);
+    # stream_options SDK принимает с openai 1.26
+    request.update(stream=True, stream_options={"include_usage": True})
+    retries = 0
+    start = time.perf_counter()
+    while True:
+        parts: list[str] = []
+        usage = None
+        try:
+            for chunk in client.chat.completions.create(**request):
+                usage = getattr(chunk, "usage", None) or usage
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if text:
+                    parts.append(text)
+                    on_text(text)
+            break
+        except Exception as error:
+            if parts:
+                metrics.record(stage, time.perf_counter() - start, retries, error=True)
+                raise
+            time.sleep(_retry_delay(stage, error, retries, start))
+            retries += 1
+
+    return _finish(
+        stage, "".join(parts) or None, usage, start, retries, store, key, validate
+    )
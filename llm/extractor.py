@@ -1,40 +1,119 @@
 """Извлечение предикатов из текста резюме через LLM."""
 
-import json
-from openai import OpenAI
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
 
-from config import LLM_API_KEY, LLM_BASE_URL, LLM_MODEL
+from config import EXTRACT_CHUNK_CHARS, EXTRACT_CONCURRENCY
+from llm.cache import CACHE_USE
+from llm.client import acall_json, call_json, stream_json
+from llm.chunking import merge_extractions, split_sections
 from llm.prompts import build_extraction_prompt
+from llm.streaming import ClaimStreamParser
 from domain.rules import DOMAIN_RULES, DOMAIN_VOCABULARY
 
 
-def extract_predicates(resume_text: str) -> dict:
+def _validate_extraction(data: dict) -> None:
+    if not isinstance(data.get("claims"), list):
+        raise ValueError("LLM response missing 'claims' list")
+
+
+def _user_message(resume_text: str, part: int = 0, parts: int = 1) -> str:
+    if parts == 1:
+        return f"Текст резюме:\n\n{resume_text}"
+    return f"Фрагмент резюме ({part + 1} из {parts}):\n\n{resume_text}"
+
+
+def extract_predicates(
+    resume_text: str, cache: str = CACHE_USE, part: int = 0, parts: int = 1
+) -> dict:
     """Извлекает логические утверждения из текста резюме через LLM.
 
+    cache — режим кэша ответов LLM (см. llm.client.call_json); part/parts —
+    номер и число фрагментов, если resume_text — фрагмент резюме.
+
     Возвращает dict с ключами 'claims' и 'predicates_used'.
     """
     system_prompt = build_extraction_prompt(DOMAIN_VOCABULARY, DOMAIN_RULES)
 
-    client = OpenAI(api_key=LLM_API_KEY, base_url=LLM_BASE_URL)
-
-    response = client.chat.completions.create(
-        model=LLM_MODEL,
-        temperature=0.1,
-        response_format={"type": "json_object"},
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": f"Текст резюме:\n\n{resume_text}"},
-        ],
-        timeout=60,
+    return call_json(
+        "extract", system_prompt, _user_message(resume_text, part, parts), temperature=0.1,
+        cache=cache, validate=_validate_extraction,
     )
 
-    content = response.choices[0].message.content
-    if content is None:
-        raise ValueError("LLM returned empty content (None)")
 
-    data = json.loads(content)
+def extract_predicates_chunked(
+    resume_text: str,
+    cache: str = CACHE_USE,
+    max_chars: int = EXTRACT_CHUNK_CHARS,
+    workers: int = EXTRACT_CONCURRENCY,
+) -> dict:
+    """extract_predicates для длинных резюме: фрагменты извлекаются параллельно.
 
-    if not isinstance(data.get("claims"), list):
-        raise ValueError("LLM response missing 'claims' list")
+    Текст режется по разделам (llm.chunking.split_sections), фрагменты
+    извлекаются в пуле из workers потоков через общий клиент, ответы
+    сливаются с дедупликацией и перенумерацией меток. Резюме короче
+    max_chars извлекается одним запросом. Ошибка любого фрагмента
+    пробрасывается.
+    """
+    chunks = split_sections(resume_text, max_chars)
+    if len(chunks) <= 1:
+        return extract_predicates(resume_text, cache)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks)))) as pool:
+        extractions = list(pool.map(
+            lambda i: extract_predicates(chunks[i], cache, i, len(chunks)), range(len(chunks))
+        ))
+    return merge_extractions(extractions)
+
+
+async def aextract_predicates(
+    resume_text: str, cache: str = CACHE_USE, part: int = 0, parts: int = 1
+) -> dict:
+    """Асинхронный extract_predicates (через AsyncOpenAI)."""
+    system_prompt = build_extraction_prompt(DOMAIN_VOCABULARY, DOMAIN_RULES)
 
-    return data
+    return await acall_json(
+        "extract", system_prompt, _user_message(resume_text, part, parts), temperature=0.1,
+        cache=cache, validate=_validate_extraction,
+    )
+
+
+async def aextract_predicates_chunked(
+    resume_text: str,
+    cache: str = CACHE_USE,
+    max_chars: int = EXTRACT_CHUNK_CHARS,
+    workers: int = EXTRACT_CONCURRENCY,
+) -> dict:
+    """Асинхронный extract_predicates_chunked: не больше workers фрагментов сразу."""
+    chunks = split_sections(resume_text, max_chars)
+    if len(chunks) <= 1:
+        return await aextract_predicates(resume_text, cache)
+    semaphore = asyncio.Semaphore(max(1, workers))
+
+    async def extract(i: int) -> dict:
+        async with semaphore:
+            return await aextract_predicates(chunks[i], cache, i, len(chunks))
+
+    return merge_extractions(await asyncio.gather(*(extract(i) for i in range(len(chunks)))))
+
+
+def extract_predicates_stream(
+    resume_text: str, on_claim: Callable[[dict], None], cache: str = CACHE_USE
+) -> dict:
+    """extract_predicates с потоковым ответом LLM.
+
+    on_claim(claim) вызывается для каждого утверждения, как только его
+    объект в ответе закрылся, — до конца генерации. Возвращает тот же
+    dict, что extract_predicates (полный ответ, прошедший проверку).
+    """
+    system_prompt = build_extraction_prompt(DOMAIN_VOCABULARY, DOMAIN_RULES)
+    parser = ClaimStreamParser()
+
+    def on_text(text: str) -> None:
+        for claim in parser.feed(text):
+            on_claim(claim)
+
+    return stream_json(
+        "extract", system_prompt, _user_message(resume_text), temperature=0.1,
+        on_text=on_text, cache=cache, validate=_validate_extraction,
+    )
@@ -0,0 +1,93 @@
+"""Инкрементальный разбор ответа экстрактора по мере генерации.
+
+LLM отдаёт JSON вида {"claims": [{...}, {...}], "predicates_used": {...}}
+кусками. ClaimStreamParser получает куски через feed() и возвращает
+каждый элемент массива claims, как только закрылась его фигурная скобка:
+утверждение можно разбирать и проверять, пока модель пишет следующие.
+Полный ответ по-прежнему разбирается json.loads после конца потока.
+"""
+
+import json
+
+# Ключ верхнего уровня с массивом утверждений
+CLAIMS_KEY = "claims"
+
+
+class ClaimStreamParser:
+    """Выделяет готовые объекты claims[i] из JSON, поступающего кусками.
+
+    Сканер посимвольный и хранит состояние между вызовами feed(): глубину
+    вложенности, положение внутри строки и экранирования. Каждый символ
+    просматривается один раз; объект утверждения разбирается json.loads
+    целиком, когда его скобка закрылась.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        # Последняя строка верхнего уровня и ждём ли после неё значения
+        self._last_key: str | None = None
+        self._after_colon = False
+        # Глубина внутри массива claims (None — вне массива) и начало объекта
+        self._claims_depth: int | None = None
+        self._object_start: int | None = None
+        self.claims_done = False
+
+    @property
+    def text(self) -> str:
+        """Весь полученный текст ответа."""
+        return self._text
+
+    def feed(self, chunk: str) -> list[dict]:
+        """Добавляет кусок ответа; возвращает утверждения, закрывшиеся в нём."""
+        self._text += chunk
+        found = []
+        text = self._text
+        for pos in range(self._pos, len(text)):
+            ch = text[pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_key = json.loads(text[self._string_start:pos + 1])
+                        self._after_colon = False
+                continue
+            if ch == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif ch == ":":
+                self._after_colon = self._depth == 1
+            elif ch in "{[":
+                if (
+                    ch == "[" and self._depth == 1 and self._after_colon
+                    and self._last_key == CLAIMS_KEY and not self.claims_done
+                ):
+                    self._claims_depth = self._depth + 1
+                elif ch == "{" and self._depth == self._claims_depth:
+                    self._object_start = pos
+                self._depth += 1
+                self._after_colon = False
+            elif ch in "}]":
+                self._depth -= 1
+                if self._claims_depth is not None:
+                    if ch == "}" and self._depth == self._claims_depth:
+                        claim = json.loads(text[self._object_start:pos + 1])
+                        if isinstance(claim, dict):
+                            found.append(claim)
+                        self._object_start = None
+                    elif ch == "]" and self._depth == self._claims_depth - 1:
+                        self._claims_depth = None
+                        self.claims_done = True
+            elif ch == "," and self._depth == 1:
+                self._last_key = None
+                self._after_colon = False
+        self._pos = len(text)
+        return found
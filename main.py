@@ -1,14 +1,41 @@
 """Главный пайплайн: Резюме -> Извлечение LLM -> Парсинг Lark -> Проверка Z3 -> Анализ LLM."""
 
 import argparse
+import asyncio
 import json
+import os
 import sys
-
-from parser.logic_parser import parse_formula
-from prover.z3_checker import Z3Checker, CheckResult
+import threading
+from concurrent.futures import Executor
+from contextlib import ExitStack
+from functools import lru_cache, partial
+from typing import Callable, Optional
+
+from config import Z3_TIMEOUT, Z3_RLIMIT
+from parser.logic_parser import parse_formula_cached, parse_formulas
+from prover.checker_pool import CheckerPool
+from prover.z3_checker import SAT, CheckResult, PortfolioChecker
 from domain.rules import DOMAIN_RULES
-from llm.extractor import extract_predicates
-from llm.analyzer import analyze_contradictions
+from llm.cache import CACHE_OFF, CACHE_REFRESH, CACHE_USE
+from llm.client import aclose_async_client
+from llm.extractor import (
+    aextract_predicates, aextract_predicates_chunked, extract_predicates,
+    extract_predicates_chunked, extract_predicates_stream,
+)
+from llm.analyzer import aanalyze_contradictions, analyze_contradictions
+
+# Сколько резюме run_pipelines держит в работе одновременно
+DEFAULT_CONCURRENCY = 8
+
+# Потоковые сессии почти всё время ждут LLM, а не считают, поэтому их пул
+# во столько раз больше числа CPU
+SESSIONS_PER_CPU = 4
+
+# lru_cache не мешает двум потокам одновременно построить один и тот же пул
+_checkers_lock = threading.Lock()
+
+# Текущий портфель (_rules_portfolio): (ключ правил и лимитов, PortfolioChecker)
+_portfolio: Optional[tuple[tuple, PortfolioChecker]] = None
 
 
 def read_resume(path: str) -> str:
@@ -34,15 +61,25 @@ def _print_header(title: str):
 # Стадии пайплайна
 # ---------------------------------------------------------------------------
 
-def stage_extract(resume_text: str, verbose: bool) -> tuple[list[dict], dict]:
+def stage_extract(
+    resume_text: str, verbose: bool, cache: str = CACHE_USE, chunked: bool = False
+) -> tuple[list[dict], dict]:
     """Стадия 2: извлечение утверждений через LLM.
 
+    chunked=True — длинное резюме извлекается параллельно по разделам
+    (extract_predicates_chunked).
+
     Возвращает (claims, predicates_used).
     """
     if verbose:
         _print_header("СТАДИЯ 2: Извлечение LLM (утверждения -> формулы)")
 
-    extraction = extract_predicates(resume_text)
+    extract = extract_predicates_chunked if chunked else extract_predicates
+    return _unpack_extraction(extract(resume_text, cache), verbose)
+
+
+def _unpack_extraction(extraction: dict, verbose: bool) -> tuple[list[dict], dict]:
+    """(claims, predicates_used) из ответа экстрактора; печать при verbose."""
     claims = extraction.get("claims", [])
     predicates_used = extraction.get("predicates_used", {})
 
@@ -61,28 +98,94 @@ def _parse_formulas_list(
 ) -> tuple[list[tuple[str, object]], list[dict]]:
     """Парсит список (метка, строка_формулы) в AST.
 
+    Одинаковые строки (доменные правила, повторяющиеся утверждения)
+    разбираются один раз за процесс — через LRU-кэш парсера.
     Возвращает (успешно_распарсенные, ошибки).
     """
     parsed = []
     errors = []
-    for label, formula_str in items:
-        try:
-            ast = parse_formula(formula_str)
+    results = parse_formulas((f for _, f in items), return_exceptions=True)
+    for (label, formula_str), ast in zip(items, results):
+        if isinstance(ast, Exception):
+            errors.append({"label": label, "formula": formula_str, "error": str(ast)})
+            if verbose:
+                print(f"  [{tag}] {label}: {formula_str} ОШИБКА ({ast})")
+        else:
             parsed.append((label, ast))
             if verbose:
                 print(f"  [{tag}] {label}: {formula_str}")
-        except Exception as e:
-            errors.append({"label": label, "formula": formula_str, "error": str(e)})
-            if verbose:
-                print(f"  [{tag}] {label}: {formula_str} ОШИБКА ({e})")
     return parsed, errors
 
 
+@lru_cache(maxsize=4)
+def _rules_pool(
+    parsed_rules: tuple[tuple[str, object], ...],
+    timeout: float = Z3_TIMEOUT,
+    rlimit: int = Z3_RLIMIT,
+) -> CheckerPool:
+    """Долгоживущий пул Z3Checker'ов с уже добавленными правилами.
+
+    Один пул на набор правил и лимитов в процессе: веб-воркер кодирует
+    DOMAIN_RULES в Z3 на каждый чекер пула, а не на каждое резюме, а
+    параллельные запросы проверяются разными чекерами в своих Z3-контекстах.
+    """
+    return CheckerPool(rules=list(parsed_rules), timeout=timeout, rlimit=rlimit)
+
+
+@lru_cache(maxsize=4)
+def _session_pool(
+    parsed_rules: tuple[tuple[str, object], ...],
+    timeout: float = Z3_TIMEOUT,
+    rlimit: int = Z3_RLIMIT,
+) -> CheckerPool:
+    """Пул чекеров для потоковых сессий (stage_extract_and_check_stream).
+
+    Отдельный от _rules_pool: сессия держит чекер, пока LLM дописывает
+    ответ, и не должна отнимать чекеры у обычных проверок. Размер не
+    привязан к числу CPU — сессии большую часть времени простаивают.
+    """
+    return CheckerPool(
+        rules=list(parsed_rules), size=SESSIONS_PER_CPU * (os.cpu_count() or 1),
+        timeout=timeout, rlimit=rlimit,
+    )
+
+
+def _rules_portfolio(
+    parsed_rules: tuple[tuple[str, object], ...],
+    timeout: float = Z3_TIMEOUT,
+    rlimit: int = Z3_RLIMIT,
+) -> PortfolioChecker:
+    """Долгоживущий портфель конфигураций решателя (процессы с правилами).
+
+    Портфель в процессе один: при смене правил или лимитов прежний
+    закрывается, иначе его процессы остались бы висеть. Вызывается под
+    _checkers_lock.
+    """
+    global _portfolio
+    key = (parsed_rules, timeout, rlimit)
+    if _portfolio is not None:
+        if _portfolio[0] == key:
+            return _portfolio[1]
+        _portfolio[1].close()
+    portfolio = PortfolioChecker(rules=list(parsed_rules), timeout=timeout, rlimit=rlimit)
+    _portfolio = (key, portfolio)
+    return portfolio
+
+
 def stage_parse_and_check(
-    claims: list[dict], verbose: bool
+    claims: list[dict], verbose: bool, all_cores: bool = False,
+    corrections: bool = False, timeout: float = Z3_TIMEOUT,
+    rlimit: int = Z3_RLIMIT, portfolio: bool = False, classify: bool = False,
 ) -> tuple[CheckResult, list[dict]]:
     """Стадия 3: парсинг формул и проверка непротиворечивости через Z3.
 
+    При all_cores=True перечисляются все минимальные ядра противоречий,
+    при corrections=True — минимальные наборы утверждений для удаления.
+    timeout (секунды) и rlimit ограничивают каждый вызов Z3; при их
+    превышении статус результата — UNKNOWN. portfolio=True запускает гонку
+    конфигураций решателя (PortfolioChecker). classify=True определяет
+    для каждого утверждения, следует ли оно из правил и остальных
+    утверждений, опровергается ими или от них не зависит.
     Возвращает (check_result, parse_errors).
     """
     if verbose:
@@ -96,30 +199,105 @@ def stage_parse_and_check(
     claim_items = [(c["label"], c["formula"]) for c in claims]
     parsed_claims, claim_errors = _parse_formulas_list(claim_items, "утверждение", verbose)
 
-    labeled_formulas = parsed_rules + parsed_claims
     parse_errors = rule_errors + claim_errors
 
     if verbose:
-        print(f"\n  Распарсено {len(labeled_formulas)} формул, {len(parse_errors)} ошибок")
-
-    # Проверка Z3
-    checker = Z3Checker()
-    check_result = checker.check(labeled_formulas)
+        total = len(parsed_rules) + len(parsed_claims)
+        print(f"\n  Распарсено {total} формул, {len(parse_errors)} ошибок")
+
+    # Проверка Z3: правила уже в солвере, добавляются только утверждения
+    make_checker = _rules_portfolio if portfolio else _rules_pool
+    with _checkers_lock:
+        checker = make_checker(tuple(parsed_rules), timeout, rlimit)
+    check_result = checker.check(
+        parsed_claims, all_cores=all_cores, corrections=corrections, classify=classify
+    )
 
     if verbose:
-        status = "SAT (непротиворечиво)" if check_result.is_consistent else "UNSAT (есть противоречия)"
+        status = {
+            "sat": "SAT (непротиворечиво)",
+            "unsat": "UNSAT (есть противоречия)",
+            "unknown": f"UNKNOWN (лимит решателя: {check_result.reason_unknown})",
+        }[check_result.status]
         print(f"\n  Результат Z3: {status}")
-        if not check_result.is_consistent:
+        print(
+            f"  Кодирование {check_result.encode_time * 1000:.1f} мс, "
+            f"решение {check_result.solve_time * 1000:.1f} мс ({check_result.engine})"
+        )
+        if check_result.is_consistent is False:
             print(f"  Ядро противоречия (unsat core): {check_result.unsat_core_labels}")
+            for i, core in enumerate(check_result.unsat_cores, 1):
+                print(f"  Минимальное ядро {i}: {core}")
+            for mcs in check_result.correction_sets:
+                print(f"  Достаточно убрать: {mcs}")
         if check_result.model:
             print(f"  Модель: {check_result.model}")
+        for label, claim_status in check_result.claim_status.items():
+            print(f"  {label}: {claim_status}")
         print()
 
     return check_result, parse_errors
 
 
+def stage_extract_and_check_stream(
+    resume_text: str, verbose: bool, timeout: float = Z3_TIMEOUT,
+    rlimit: int = Z3_RLIMIT, cache: str = CACHE_USE,
+    on_claim: Optional[Callable[[dict, str], None]] = None, classify: bool = False,
+) -> tuple[list[dict], dict, CheckResult, list[dict]]:
+    """Стадии 2 и 3 в потоке: утверждения проверяются, пока LLM пишет ответ.
+
+    Каждое утверждение, как только его объект в ответе LLM закрылся,
+    разбирается и добавляется в инкрементальную сессию чекера с уже
+    закодированными доменными правилами; к концу генерации вердикт Z3
+    почти готов. Чекер берётся из пула сессий при первом утверждении, а
+    не до запроса к LLM. on_claim(claim, status) вызывается после каждого
+    утверждения со статусом всех полученных к этому моменту;
+    classify=True — статусы утверждений считаются в той же сессии.
+
+    Возвращает (claims, predicates_used, check_result, parse_errors).
+    """
+    if verbose:
+        _print_header("СТАДИИ 2-3: Потоковое извлечение и проверка (LLM + Z3)")
+
+    rule_items = [(label, formula) for label, formula in DOMAIN_RULES]
+    parsed_rules, rule_errors = _parse_formulas_list(rule_items, "правило", False)
+    with _checkers_lock:
+        pool = _session_pool(tuple(parsed_rules), timeout, rlimit)
+
+    claim_errors: list[dict] = []
+    with ExitStack() as stack:
+        session = None
+
+        def check_claim(claim: dict) -> None:
+            nonlocal session
+            label, formula_str = str(claim.get("label")), claim.get("formula")
+            try:
+                formula = parse_formula_cached(formula_str)
+            except Exception as e:
+                claim_errors.append({"label": label, "formula": formula_str, "error": str(e)})
+                status = session.status if session is not None else SAT
+            else:
+                if session is None:
+                    session = stack.enter_context(pool.incremental())
+                status = session.add(label, formula)
+            if verbose:
+                print(f"  [{label}] {formula_str}  -> {status}")
+            if on_claim is not None:
+                on_claim(claim, status)
+
+        extraction = extract_predicates_stream(resume_text, check_claim, cache)
+        if session is None:
+            session = stack.enter_context(pool.incremental())
+        check_result = session.result(classify)
+
+    claims, predicates_used = _unpack_extraction(extraction, False)
+    if verbose:
+        print(f"\n  Получено {len(claims)} утверждений, результат Z3: {check_result.status}\n")
+    return claims, predicates_used, check_result, rule_errors + claim_errors
+
+
 def stage_analyze(
-    check_result: CheckResult, claims: list[dict], verbose: bool
+    check_result: CheckResult, claims: list[dict], verbose: bool, cache: str = CACHE_USE
 ) -> dict:
     """Стадия 4: анализ противоречий через LLM.
 
@@ -128,29 +306,53 @@ def stage_analyze(
     if verbose:
         _print_header("СТАДИЯ 4: Анализ противоречий (LLM)")
 
-    analysis = analyze_contradictions(check_result, claims, DOMAIN_RULES)
-
+    analysis = analyze_contradictions(check_result, claims, DOMAIN_RULES, cache)
     if verbose:
-        for i, c in enumerate(analysis.get("contradictions", []), 1):
-            print(f"\n  Противоречие {i} (серьёзность: {c.get('severity', 'неизвестно')}):")
-            print(f"    Участвуют: {c.get('involved_labels', [])}")
-            print(f"    Объяснение: {c.get('explanation', '')}")
-            print(f"    Рекомендация: {c.get('suggestion', '')}")
-        print(f"\n  Общая оценка: {analysis.get('overall_assessment', '')}")
-        print()
-
+        _print_analysis(analysis)
     return analysis
 
 
+def _print_analysis(analysis: dict):
+    """Печатает противоречия и общую оценку из ответа анализатора."""
+    for i, c in enumerate(analysis.get("contradictions", []), 1):
+        print(f"\n  Противоречие {i} (серьёзность: {c.get('severity', 'неизвестно')}):")
+        print(f"    Участвуют: {c.get('involved_labels', [])}")
+        print(f"    Объяснение: {c.get('explanation', '')}")
+        print(f"    Рекомендация: {c.get('suggestion', '')}")
+    print(f"\n  Общая оценка: {analysis.get('overall_assessment', '')}")
+    print()
+
+
 # ---------------------------------------------------------------------------
 # Оркестрация
 # ---------------------------------------------------------------------------
 
-def run_pipeline(resume_path: str, verbose: bool = False) -> dict:
+def run_pipeline(
+    resume_path: str, verbose: bool = False, all_cores: bool = False,
+    corrections: bool = False, timeout: float = Z3_TIMEOUT,
+    rlimit: int = Z3_RLIMIT, portfolio: bool = False, classify: bool = False,
+    cache: str = CACHE_USE, stream: bool = False,
+    on_claim: Optional[Callable[[dict, str], None]] = None, chunked: bool = False,
+) -> dict:
     """Запускает полный пайплайн фактчекинга.
 
+    all_cores=True — найти все минимальные противоречия за один проход;
+    corrections=True — найти минимальные наборы утверждений для удаления;
+    timeout/rlimit — лимиты Z3 на одну проверку;
+    portfolio=True — гонка нескольких конфигураций решателя;
+    classify=True — статус каждого утверждения (следует/опровергнуто/независимо);
+    cache — режим кэша ответов LLM: CACHE_USE, CACHE_REFRESH или CACHE_OFF;
+    stream=True — проверять утверждения по мере генерации ответа LLM
+    (stage_extract_and_check_stream), on_claim(claim, status) — после
+    каждого утверждения;
+    chunked=True — извлекать длинное резюме параллельно по разделам
+    (несовместимо со stream).
+
     Возвращает dict-отчёт с результатами всех стадий.
     """
+    if stream and chunked:
+        raise ValueError("stream и chunked несовместимы")
+
     # Стадия 1: чтение
     if verbose:
         _print_header("СТАДИЯ 1: Чтение резюме")
@@ -158,15 +360,93 @@ def run_pipeline(resume_path: str, verbose: bool = False) -> dict:
     if verbose:
         print(f"  Прочитано {len(resume_text)} символов из {resume_path}\n")
 
-    # Стадия 2: извлечение
-    claims, predicates_used = stage_extract(resume_text, verbose)
-
-    # Стадия 3: парсинг + Z3
-    check_result, parse_errors = stage_parse_and_check(claims, verbose)
+    # Стадия 2: извлечение; стадия 3: парсинг + Z3
+    # Ядра, наборы для удаления и портфель — полной проверкой после потока;
+    # статусы утверждений без них считаются в самой потоковой сессии
+    full_check = not stream or all_cores or corrections or portfolio
+    if stream:
+        claims, predicates_used, check_result, parse_errors = stage_extract_and_check_stream(
+            resume_text, verbose, timeout, rlimit, cache, on_claim,
+            classify=classify and not full_check,
+        )
+    else:
+        claims, predicates_used = stage_extract(resume_text, verbose, cache, chunked)
+    if full_check:
+        check_result, parse_errors = stage_parse_and_check(
+            claims, verbose, all_cores, corrections, timeout, rlimit, portfolio, classify
+        )
 
     # Стадия 4: анализ
-    analysis = stage_analyze(check_result, claims, verbose)
+    analysis = stage_analyze(check_result, claims, verbose, cache)
+
+    return _build_report(
+        resume_path, claims, predicates_used, check_result, parse_errors, analysis
+    )
 
+
+async def run_pipeline_async(
+    resume_path: str, verbose: bool = False, all_cores: bool = False,
+    corrections: bool = False, timeout: float = Z3_TIMEOUT,
+    rlimit: int = Z3_RLIMIT, portfolio: bool = False, classify: bool = False,
+    cache: str = CACHE_USE, executor: Executor | None = None, chunked: bool = False,
+) -> dict:
+    """Асинхронный run_pipeline с теми же параметрами и отчётом.
+
+    Вызовы LLM идут через AsyncOpenAI и не занимают поток на время
+    ожидания сети; чтение файла и стадия парсинга и Z3 (CPU) выполняются
+    в executor (по умолчанию — пул потоков event loop).
+    """
+    loop = asyncio.get_running_loop()
+    resume_text = await loop.run_in_executor(executor, read_resume, resume_path)
+    if verbose:
+        print(f"  Прочитано {len(resume_text)} символов из {resume_path}\n")
+
+    extract = aextract_predicates_chunked if chunked else aextract_predicates
+    extraction = await extract(resume_text, cache)
+    claims, predicates_used = _unpack_extraction(extraction, verbose)
+
+    check_result, parse_errors = await loop.run_in_executor(executor, partial(
+        stage_parse_and_check,
+        claims, verbose, all_cores, corrections, timeout, rlimit, portfolio, classify,
+    ))
+
+    analysis = await aanalyze_contradictions(check_result, claims, DOMAIN_RULES, cache)
+    if verbose:
+        _print_analysis(analysis)
+
+    return _build_report(
+        resume_path, claims, predicates_used, check_result, parse_errors, analysis
+    )
+
+
+async def run_pipelines(
+    resume_paths: list[str], concurrency: int = DEFAULT_CONCURRENCY, **kwargs
+) -> list[dict | Exception]:
+    """Проверяет несколько резюме конкурентно, не больше concurrency сразу.
+
+    kwargs передаются в run_pipeline_async. Результаты идут в порядке
+    resume_paths; ошибка одного резюме возвращается на его месте и не
+    прерывает остальные.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(path: str) -> dict:
+        async with semaphore:
+            return await run_pipeline_async(path, **kwargs)
+
+    try:
+        return await asyncio.gather(
+            *(run_one(path) for path in resume_paths), return_exceptions=True
+        )
+    finally:
+        await aclose_async_client()
+
+
+def _build_report(
+    resume_path: str, claims: list[dict], predicates_used: dict,
+    check_result: CheckResult, parse_errors: list[dict], analysis: dict,
+) -> dict:
+    """JSON-отчёт пайплайна по результатам всех стадий."""
     return {
         "stages": {
             "extraction": {
@@ -175,10 +455,21 @@ def run_pipeline(resume_path: str, verbose: bool = False) -> dict:
                 "predicates_used": predicates_used,
             },
             "z3_check": {
+                "status": check_result.status,
                 "is_consistent": check_result.is_consistent,
+                "reason_unknown": check_result.reason_unknown,
                 "unsat_core_labels": check_result.unsat_core_labels,
+                "unsat_cores": check_result.unsat_cores,
+                "correction_sets": check_result.correction_sets,
+                # Только переменные утверждений резюме
+                "model": check_result.model,
+                "claim_status": check_result.claim_status,
                 "parse_errors": parse_errors,
                 "total_formulas": len(DOMAIN_RULES) + len(claims) - len(parse_errors),
+                "engine": check_result.engine,
+                "encode_time": check_result.encode_time,
+                "solve_time": check_result.solve_time,
+                "statistics": check_result.statistics,
             },
             "analysis": analysis,
         },
@@ -186,6 +477,7 @@ def run_pipeline(resume_path: str, verbose: bool = False) -> dict:
             "resume_path": resume_path,
             "total_claims": len(claims),
             "total_rules": len(DOMAIN_RULES),
+            "status": check_result.status,
             "is_consistent": check_result.is_consistent,
             "contradictions_found": len(analysis.get("contradictions", [])),
         },
@@ -197,7 +489,8 @@ def main():
         description="Фактчекер резюме: LLM + Z3"
     )
     arg_parser.add_argument(
-        "--resume", required=True, help="Путь к файлу резюме (txt или pdf)"
+        "--resume", required=True, nargs="+",
+        help="Путь к файлу резюме (txt или pdf); несколько — проверяются конкурентно",
     )
     arg_parser.add_argument(
         "--verbose", "-v", action="store_true", help="Подробный вывод"
@@ -205,14 +498,78 @@ def main():
     arg_parser.add_argument(
         "--output", "-o", help="Сохранить JSON-отчёт в файл"
     )
+    arg_parser.add_argument(
+        "--all-cores", action="store_true",
+        help="Найти все минимальные противоречия (MUS), а не одно ядро",
+    )
+    arg_parser.add_argument(
+        "--corrections", action="store_true",
+        help="Найти минимальные наборы утверждений, удаление которых снимает противоречия",
+    )
+    arg_parser.add_argument(
+        "--timeout", type=float, default=Z3_TIMEOUT,
+        help="Лимит времени Z3 на одну проверку, секунды (0 — без лимита)",
+    )
+    arg_parser.add_argument(
+        "--rlimit", type=int, default=Z3_RLIMIT,
+        help="Ресурсный лимит Z3 на одну проверку (0 — без лимита)",
+    )
+    arg_parser.add_argument(
+        "--portfolio", action="store_true",
+        help="Гонка конфигураций решателя в отдельных процессах (первый ответ)",
+    )
+    arg_parser.add_argument(
+        "--classify", action="store_true",
+        help="Статус каждого утверждения: следует из остальных, опровергнуто или независимо",
+    )
+    cache_group = arg_parser.add_mutually_exclusive_group()
+    cache_group.add_argument(
+        "--no-cache", dest="cache", action="store_const", const=CACHE_OFF,
+        default=CACHE_USE, help="Не читать и не писать кэш ответов LLM",
+    )
+    cache_group.add_argument(
+        "--refresh", dest="cache", action="store_const", const=CACHE_REFRESH,
+        help="Запросить LLM заново и перезаписать кэш",
+    )
+    arg_parser.add_argument(
+        "--stream", action="store_true",
+        help="Проверять утверждения по мере генерации ответа LLM (одно резюме)",
+    )
+    arg_parser.add_argument(
+        "--chunked", action="store_true",
+        help="Извлекать длинное резюме параллельно по разделам (EXTRACT_CHUNK_CHARS)",
+    )
+    arg_parser.add_argument(
+        "--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+        help="Сколько резюме проверять одновременно (при нескольких --resume)",
+    )
 
     args = arg_parser.parse_args()
+    if args.stream and len(args.resume) > 1:
+        arg_parser.error("--stream работает с одним --resume")
+    if args.stream and args.chunked:
+        arg_parser.error("--stream и --chunked несовместимы")
+    options = dict(
+        verbose=args.verbose, all_cores=args.all_cores,
+        corrections=args.corrections, timeout=args.timeout,
+        rlimit=args.rlimit, portfolio=args.portfolio, classify=args.classify,
+        cache=args.cache, chunked=args.chunked,
+    )
 
-    try:
-        report = run_pipeline(args.resume, verbose=args.verbose)
-    except Exception as e:
-        print(f"Ошибка пайплайна: {e}", file=sys.stderr)
-        sys.exit(1)
+    failed = False
+    if len(args.resume) == 1:
+        try:
+            report = run_pipeline(args.resume[0], stream=args.stream, **options)
+        except Exception as e:
+            print(f"Ошибка пайплайна: {e}", file=sys.stderr)
+            sys.exit(1)
+    else:
+        report = asyncio.run(run_pipelines(args.resume, args.concurrency, **options))
+        for i, (path, result) in enumerate(zip(args.resume, report)):
+            if isinstance(result, Exception):
+                print(f"Ошибка пайплайна ({path}): {result}", file=sys.stderr)
+                report[i] = {"summary": {"resume_path": path}, "error": str(result)}
+                failed = True
 
     report_json = json.dumps(report, indent=2, ensure_ascii=False)
 
@@ -226,6 +583,9 @@ def main():
         print("=" * 60)
         print(report_json)
 
+    if failed:
+        sys.exit(1)
+
 
 if __name__ == "__main__":
     main()
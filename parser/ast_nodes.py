@@ -1,86 +1,288 @@
-"""Датаклассы AST-узлов для формул пропозициональной логики."""
+"""AST-узлы для формул пропозициональной логики.
 
-from dataclasses import dataclass
-from typing import Union
+Узлы неизменяемы и хэш-консятся: конструктор возвращает уже существующий
+объект, если структурно равный узел был создан раньше. Поэтому равенство —
+это проверка идентичности, хэш вычисляется один раз при создании, а
+повторяющиеся подформулы большой базы правил хранятся в одном экземпляре.
 
+Таблица интернирования у каждого класса своя (ключ — значение поля или
+кортеж полей) и держит узлы слабыми ссылками: узел, на который больше
+никто не ссылается (формула утверждения после проверки резюме), удаляется
+из таблицы, и память долгоживущего web-воркера не растёт с каждым новым
+резюме. Пока узел жив, равный ему узел — тот же объект.
+"""
 
-@dataclass(frozen=True)
-class Const:
-    """Булева константа: true или false."""
-    value: bool
+import threading
+import weakref
+from typing import Callable, Iterator, TypeVar, Union
+
+T = TypeVar("T")
+
+_intern_lock = threading.Lock()
+_tables: list[weakref.WeakValueDictionary] = []
+
+
+class _Node:
+    """Базовый класс интернируемого AST-узла."""
+    __slots__ = ("_hash", "__weakref__")
+    _fields: tuple[str, ...] = ()
+    _child_fields: tuple[str, ...] = ()
+    _table: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "_table" in cls.__dict__:
+            _tables.append(cls._table)
+
+    def __new__(cls, *args, **kwargs):
+        if kwargs:
+            args = args + tuple(kwargs.pop(f) for f in cls._fields[len(args):] if f in kwargs)
+            if kwargs:
+                raise TypeError(f"{cls.__name__}() got unexpected arguments: {sorted(kwargs)}")
+        if len(args) != len(cls._fields):
+            raise TypeError(
+                f"{cls.__name__}() takes {len(cls._fields)} arguments ({len(args)} given)"
+            )
+        key = args[0] if len(args) == 1 else args
+        table = cls._table
+        node = table.get(key)
+        if node is None:
+            with _intern_lock:
+                node = table.get(key)
+                if node is None:
+                    node = object.__new__(cls)
+                    for name, value in zip(cls._fields, args):
+                        object.__setattr__(node, name, value)
+                    object.__setattr__(node, "_hash", hash((cls.__name__, key)))
+                    table[key] = node
+        return node
+
+    def __hash__(self):
+        return self._hash
+
+    # Равенство по идентичности (object.__eq__): равные узлы — один объект.
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"cannot assign to field '{name}'")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"cannot delete field '{name}'")
+
+    def __reduce__(self):
+        # При распаковке (pickle, multiprocessing) узел снова интернируется
+        return self.__class__, tuple(getattr(self, f) for f in self._fields)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        fields = ", ".join(f"{f}={getattr(self, f)!r}" for f in self._fields)
+        return f"{self.__class__.__name__}({fields})"
 
     def __str__(self):
-        return "true" if self.value else "false"
+        return render(self)
+
+    def _children(self) -> tuple:
+        return tuple(getattr(self, f) for f in self._child_fields)
+
+
+class _NaryNode(_Node):
+    """Ассоциативная связка с произвольным числом операндов (не меньше двух)."""
+    __slots__ = ("operands",)
+    _fields = __match_args__ = ("operands",)
+    _symbol = ""
+    operands: tuple["Formula", ...]
+
+    def __new__(cls, *operands):
+        if len(operands) < 2:
+            raise TypeError(f"{cls.__name__}() takes at least 2 operands ({len(operands)} given)")
+        return super().__new__(cls, operands)
+
+    @classmethod
+    def flat(cls, *operands) -> "Formula":
+        """Создаёт узел, вливая операнды того же типа: (a & b) & c -> a & b & c."""
+        flat: list = []
+        for op in operands:
+            if type(op) is cls:
+                flat.extend(op.operands)
+            else:
+                flat.append(op)
+        return flat[0] if len(flat) == 1 else cls(*flat)
+
+    def __reduce__(self):
+        return self.__class__, self.operands
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({', '.join(map(repr, self.operands))})"
+
+    def _children(self) -> tuple:
+        return self.operands
+
+
+def interned_count() -> int:
+    """Число живых интернированных узлов (для диагностики памяти)."""
+    return sum(len(table) for table in _tables)
+
+
+class Const(_Node):
+    """Булева константа: true или false."""
+    __slots__ = ("value",)
+    _table = weakref.WeakValueDictionary()
+    _fields = __match_args__ = ("value",)
+    value: bool
 
 
-@dataclass(frozen=True)
-class Var:
+class Var(_Node):
     """Пропозициональная переменная (напр. fastChanges)."""
+    __slots__ = ("name",)
+    _table = weakref.WeakValueDictionary()
+    _fields = __match_args__ = ("name",)
     name: str
 
-    def __str__(self):
-        return self.name
-
 
-@dataclass(frozen=True)
-class Pred:
+class Pred(_Node):
     """Граундовый предикат с аргументами (напр. reducedCycle("5d", "1h"))."""
+    __slots__ = ("name", "args")
+    _table = weakref.WeakValueDictionary()
+    _fields = __match_args__ = ("name", "args")
     name: str
     args: tuple[str, ...]
 
-    def __str__(self):
-        args_str = ", ".join(f'"{a}"' for a in self.args)
-        return f"{self.name}({args_str})"
-
 
-@dataclass(frozen=True)
-class Not:
+class Not(_Node):
     """Логическое отрицание."""
+    __slots__ = ("operand",)
+    _table = weakref.WeakValueDictionary()
+    _fields = __match_args__ = _child_fields = ("operand",)
     operand: "Formula"
 
-    def __str__(self):
-        return f"~{self.operand}"
 
+class And(_NaryNode):
+    """Логическая конъюнкция (n-арная)."""
+    __slots__ = ()
+    _table = weakref.WeakValueDictionary()
+    _symbol = "&"
 
-@dataclass(frozen=True)
-class And:
-    """Логическая конъюнкция."""
-    left: "Formula"
-    right: "Formula"
 
-    def __str__(self):
-        return f"({self.left} & {self.right})"
+class Or(_NaryNode):
+    """Логическая дизъюнкция (n-арная)."""
+    __slots__ = ()
+    _table = weakref.WeakValueDictionary()
+    _symbol = "|"
 
 
-@dataclass(frozen=True)
-class Or:
-    """Логическая дизъюнкция."""
-    left: "Formula"
-    right: "Formula"
-
-    def __str__(self):
-        return f"({self.left} | {self.right})"
-
-
-@dataclass(frozen=True)
-class Implies:
+class Implies(_Node):
     """Логическая импликация (правоассоциативная)."""
+    __slots__ = ("left", "right")
+    _table = weakref.WeakValueDictionary()
+    _fields = __match_args__ = _child_fields = ("left", "right")
+    _symbol = "->"
     left: "Formula"
     right: "Formula"
 
-    def __str__(self):
-        return f"({self.left} -> {self.right})"
-
 
-@dataclass(frozen=True)
-class Bicond:
+class Bicond(_Node):
     """Логический бикондиционал."""
+    __slots__ = ("left", "right")
+    _table = weakref.WeakValueDictionary()
+    _fields = __match_args__ = _child_fields = ("left", "right")
+    _symbol = "<->"
     left: "Formula"
     right: "Formula"
 
-    def __str__(self):
-        return f"({self.left} <-> {self.right})"
-
 
 # Объединённый тип для всех узлов формул
 Formula = Union[Const, Var, Pred, Not, And, Or, Implies, Bicond]
+
+
+# ---------------------------------------------------------------------------
+# Обходы без рекурсии
+# ---------------------------------------------------------------------------
+# Цепочка "a & b & c & ..." хранится одним n-арным узлом с плоским
+# кортежем operands, но цепочки импликаций, отрицаний и чередование &/| по-
+# прежнему дают формулы глубиной в тысячи узлов. Все обходы ниже используют
+# явный стек и не упираются в recursion limit.
+
+def children(formula: Formula) -> tuple:
+    """Непосредственные подформулы узла."""
+    get = getattr(formula, "_children", None)
+    return get() if get is not None else ()
+
+
+def fold(formula: Formula, combine: Callable[[Formula, tuple], T]) -> T:
+    """Свёртка снизу вверх: combine(узел, результаты_детей).
+
+    Каждый уникальный (интернированный) подузел обрабатывается один раз.
+    """
+    done: dict = {}
+    stack = [formula]
+    while stack:
+        node = stack[-1]
+        if node in done:
+            stack.pop()
+            continue
+        kids = children(node)
+        pending = [k for k in kids if k not in done]
+        if pending:
+            stack.extend(pending)
+            continue
+        stack.pop()
+        done[node] = combine(node, tuple(done[k] for k in kids))
+    return done[formula]
+
+
+def iter_nodes(formula: Formula) -> Iterator[Formula]:
+    """Все уникальные подузлы формулы (включая её саму), в прямом порядке."""
+    seen = set()
+    stack = [formula]
+    while stack:
+        node = stack.pop()
+        if node in seen:
+            continue
+        seen.add(node)
+        yield node
+        stack.extend(reversed(children(node)))
+
+
+def atoms(formula: Formula) -> set:
+    """Множество атомов (Var и Pred), входящих в формулу."""
+    return {n for n in iter_nodes(formula) if isinstance(n, (Var, Pred))}
+
+
+def render(formula: Formula) -> str:
+    """Текстовое представление формулы (то же, что str(formula))."""
+    out: list[str] = []
+    stack: list = [formula]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            out.append(item)
+        elif isinstance(item, Const):
+            out.append("true" if item.value else "false")
+        elif isinstance(item, Var):
+            out.append(item.name)
+        elif isinstance(item, Pred):
+            args_str = ", ".join(f'"{a}"' for a in item.args)
+            out.append(f"{item.name}({args_str})")
+        elif isinstance(item, Not):
+            out.append("~")
+            stack.append(item.operand)
+        elif isinstance(item, _NaryNode):
+            out.append("(")
+            stack.append(")")
+            sep = f" {item._symbol} "
+            ops = item.operands
+            for i in range(len(ops) - 1, 0, -1):
+                stack.append(ops[i])
+                stack.append(sep)
+            stack.append(ops[0])
+        else:
+            out.append("(")
+            stack.append(")")
+            stack.append(item.right)
+            stack.append(f" {item._symbol} ")
+            stack.append(item.left)
+    return "".join(out)
@@ -0,0 +1,183 @@
+"""Каноническая форма формул для семантической дедупликации.
+
+Формула переводится в NNF (отрицания только у атомов, без -> и <->), затем
+в CNF. Клаузы очищаются от тавтологий, дубликатов и поглощённых клауз,
+литералы и клаузы сортируются. Поэтому `a -> b`, `~a | b`, `(a->b)` и
+`~b -> ~a` дают одну строку `~a | b`, а её хэш годится как ключ
+дедупликации правил и кэшей.
+
+CNF не каноничен для всех эквивалентных формул (например, формула и её
+CNF с добавленной резольвентой различаются), но покрывает переписывания,
+которые реально встречаются в добытых правилах: перестановки операндов,
+скобки, двойные отрицания, контрапозицию, замену импликации дизъюнкцией.
+Если CNF раздувается больше MAX_CANONICAL_CLAUSES клауз, ключом служит
+NNF с отсортированными операндами.
+"""
+
+import hashlib
+
+from parser.ast_nodes import (
+    Formula, Const, Var, Pred, Not, And, Or, Implies, Bicond, fold, render,
+)
+from parser.logic_parser import parse_formula_cached
+
+# Предел числа клауз при переводе в CNF
+MAX_CANONICAL_CLAUSES = 256
+
+# Версия алгоритма канонической формы. Ключи, сохранённые вместе с правилами
+# (см. rule_keys), пересчитываются, если записаны другой версией
+CANONICAL_VERSION = 1
+
+# Литерал: (текст атома, полярность)
+Literal = tuple[str, bool]
+
+
+class _TooLarge(Exception):
+    """CNF превысила MAX_CANONICAL_CLAUSES."""
+
+
+def _nnf_pair(node: Formula, kids: tuple) -> tuple[Formula, Formula]:
+    """(NNF узла, NNF его отрицания) по таким же парам детей."""
+    match node:
+        case Const(value=value):
+            return Const(value), Const(not value)
+        case Var() | Pred():
+            return node, Not(node)
+        case Not():
+            pos, neg = kids[0]
+            return neg, pos
+        case And():
+            return And.flat(*(p for p, _ in kids)), Or.flat(*(n for _, n in kids))
+        case Or():
+            return Or.flat(*(p for p, _ in kids)), And.flat(*(n for _, n in kids))
+        case Implies():
+            (lp, ln), (rp, rn) = kids
+            return Or.flat(ln, rp), And.flat(lp, rn)
+        case Bicond():
+            (lp, ln), (rp, rn) = kids
+            return (And.flat(Or.flat(ln, rp), Or.flat(lp, rn)),
+                    Or.flat(And.flat(lp, rn), And.flat(ln, rp)))
+        case _:
+            raise ValueError(f"Неизвестный тип формулы: {type(node)}")
+
+
+def to_nnf(formula: Formula) -> Formula:
+    """Негативная нормальная форма формулы (обход без рекурсии)."""
+    return fold(formula, _nnf_pair)[0]
+
+
+def _cnf_clauses(node: Formula, kids: tuple) -> frozenset:
+    """Множество клауз NNF-узла по множествам клауз детей."""
+    match node:
+        case Const(value=value):
+            return frozenset() if value else frozenset({frozenset()})
+        case Var() | Pred():
+            return frozenset({frozenset({(render(node), True)})})
+        case Not(operand=atom):
+            return frozenset({frozenset({(render(atom), False)})})
+        case And():
+            return frozenset().union(*kids)
+        case Or():
+            result = kids[0]
+            for part in kids[1:]:
+                if len(result) * len(part) > MAX_CANONICAL_CLAUSES:
+                    raise _TooLarge
+                result = frozenset(a | b for a in result for b in part)
+            return result
+        case _:
+            raise ValueError(f"Узел не в NNF: {type(node)}")
+
+
+def _simplify(clauses: frozenset) -> list[frozenset]:
+    """Убирает тавтологии и поглощённые клаузы (надмножества других)."""
+    kept = [
+        c for c in clauses
+        if not any((atom, not pol) in c for atom, pol in c)
+    ]
+    kept.sort(key=len)
+    result: list[frozenset] = []
+    for clause in kept:
+        if not any(other <= clause for other in result):
+            result.append(clause)
+    return result
+
+
+def _literal_key(literal: Literal) -> tuple[str, int]:
+    atom, pol = literal
+    return atom, 0 if pol else 1
+
+
+def _render_clause(clause: frozenset) -> str:
+    return " | ".join(
+        atom if pol else f"~{atom}" for atom, pol in sorted(clause, key=_literal_key)
+    )
+
+
+def _sorted_nnf(node: Formula, kids: tuple) -> str:
+    """Строка NNF с отсортированными и уникальными операндами And/Or."""
+    if isinstance(node, (And, Or)):
+        sep = " & " if isinstance(node, And) else " | "
+        parts = sorted(set(kids))
+        return parts[0] if len(parts) == 1 else "(" + sep.join(parts) + ")"
+    if isinstance(node, Not):
+        return f"~{kids[0]}"
+    return render(node)
+
+
+def canonical_form(formula: Formula) -> str:
+    """Каноническая строка формулы (сама является разбираемой формулой)."""
+    nnf = to_nnf(formula)
+    try:
+        clauses = fold(nnf, _cnf_clauses)
+    except _TooLarge:
+        return fold(nnf, _sorted_nnf)
+    simplified = _simplify(clauses)
+    if not simplified:
+        return "true"
+    units = {next(iter(c)) for c in simplified if len(c) == 1}
+    if any(not c for c in simplified) or any((a, not p) in units for a, p in units):
+        return "false"
+    ordered = sorted(
+        simplified, key=lambda c: (len(c), sorted(c, key=_literal_key))
+    )
+    if len(ordered) == 1:
+        return _render_clause(ordered[0])
+    return " & ".join(
+        f"({_render_clause(c)})" if len(c) > 1 else _render_clause(c) for c in ordered
+    )
+
+
+def canonical_hash(formula: Formula) -> str:
+    """SHA-256 канонической строки формулы (hex)."""
+    return hashlib.sha256(canonical_form(formula).encode("utf-8")).hexdigest()
+
+
+def canonical_key(text: str) -> str:
+    """Ключ дедупликации для текста формулы.
+
+    Разбираемая формула даёт каноническую строку; неразбираемая —
+    исходный текст с нормализованными пробелами.
+    """
+    try:
+        return canonical_form(parse_formula_cached(text))
+    except Exception:
+        return " ".join(text.split())
+
+
+def rule_keys(data: dict) -> set[str]:
+    """Ключи дедупликации всех правил накопленной базы data.
+
+    Ключ правила сохраняется в нём самом (поле "canonical_key") и при
+    следующих слияниях не пересчитывается; metadata.canonical_version
+    отмечает, какой версией алгоритма посчитаны ключи. Правила без ключа
+    или с ключами другой версии получают новый ключ.
+    """
+    metadata = data.setdefault("metadata", {})
+    fresh = metadata.get("canonical_version") == CANONICAL_VERSION
+    keys = set()
+    for rule in data["rules"]:
+        if not fresh or "canonical_key" not in rule:
+            rule["canonical_key"] = canonical_key(rule["formula"])
+        keys.add(rule["canonical_key"])
+    metadata["canonical_version"] = CANONICAL_VERSION
+    return keys
@@ -1,16 +1,42 @@
-"""Парсер формул пропозициональной логики на основе Lark."""
-
+"""Парсер формул пропозициональной логики на основе Lark.
+
+Основной режим — LALR(1): таблицы разбора сериализуются на диск и при
+следующем запуске загружаются из кэша (ключ — хэш грамматики; каталог —
+кэш пользователя с правами 0700, чужой файл не загружается), а дерево
+сразу преобразуется в AST без промежуточного Tree. Earley используется,
+только если грамматика перестала быть LALR-совместимой (GrammarError при
+построении): язык у обоих парсеров один, поэтому повторный разбор Earley
+невалидного для LALR входа ничего не спасает.
+"""
+
+import hashlib
+import logging
 import os
+from functools import lru_cache
+from typing import Iterable, Optional, Union
+
 from lark import Lark, Transformer, v_args
+from lark.exceptions import GrammarError
 from parser.ast_nodes import (
     Formula, Const, Var, Pred, Not, And, Or, Implies, Bicond,
 )
 
+logger = logging.getLogger(__name__)
+
 _GRAMMAR_PATH = os.path.join(
     os.path.dirname(os.path.dirname(__file__)), "grammar", "logic.lark"
 )
 
-_parser = Lark.open(_GRAMMAR_PATH, parser="earley", start="start")
+# Каталог для сериализованного LALR-парсера (переопределяется через окружение).
+# Lark загружает кэш через pickle, поэтому по умолчанию это кэш-каталог
+# пользователя, а не общий temp, куда файл может подложить кто угодно
+_CACHE_DIR = os.environ.get("LOGIC_PARSER_CACHE_DIR") or os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "logic_extraction",
+)
+
+# Размер LRU-кэша "текст формулы -> AST" по умолчанию
+DEFAULT_PARSE_CACHE_SIZE = 4096
 
 
 @v_args(inline=True)
@@ -42,11 +68,12 @@ class LogicTransformer(Transformer):
     def logic_not(self, operand):
         return Not(operand)
 
-    def logic_and(self, left, right):
-        return And(left, right)
+    def logic_and(self, *operands):
+        # Вложенные скобки (a & b) & c вливаются в один n-арный узел
+        return And.flat(*operands)
 
-    def logic_or(self, left, right):
-        return Or(left, right)
+    def logic_or(self, *operands):
+        return Or.flat(*operands)
 
     def logic_implies(self, left, right):
         return Implies(left, right)
@@ -58,10 +85,141 @@ class LogicTransformer(Transformer):
 _transformer = LogicTransformer()
 
 
+def grammar_hash() -> str:
+    """SHA-256 текста грамматики — ключ кэша LALR-таблиц."""
+    with open(_GRAMMAR_PATH, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def lalr_cache_path() -> str:
+    """Путь к файлу сериализованного LALR-парсера для текущей грамматики."""
+    return os.path.join(_CACHE_DIR, f"logic_lalr_{grammar_hash()[:16]}.cache")
+
+
+def _lalr_cache_file() -> Optional[str]:
+    """Путь к кэшу LALR-таблиц или None, если кэшу нельзя доверять.
+
+    Каталог создаётся с правами 0700. Файл, принадлежащий другому
+    пользователю, не загружается: его содержимое исполняется при unpickle.
+    """
+    path = lalr_cache_path()
+    try:
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        owner = os.stat(path).st_uid
+    except FileNotFoundError:
+        return path
+    except OSError as e:
+        logger.warning("Кэш LALR-парсера недоступен: %s", e)
+        return None
+    if hasattr(os, "geteuid") and owner != os.geteuid():
+        logger.warning("Кэш LALR-парсера %s принадлежит другому пользователю", path)
+        return None
+    return path
+
+
+def _build_lalr_parser() -> Optional[Lark]:
+    """Строит LALR(1)-парсер со встроенным трансформером.
+
+    Возвращает None, если грамматика перестала быть LALR-совместимой —
+    тогда все формулы разбираются Earley.
+    """
+    cache = _lalr_cache_file()
+    try:
+        parser = Lark.open(
+            _GRAMMAR_PATH,
+            parser="lalr",
+            start="start",
+            transformer=_transformer,
+            cache=cache or False,
+        )
+    except GrammarError as e:
+        logger.warning("LALR-парсер недоступен, используется Earley: %s", e)
+        return None
+    if cache is not None and os.path.exists(cache):
+        os.chmod(cache, 0o600)
+    return parser
+
+
+_lalr_parser = _build_lalr_parser()
+_earley_parser: Optional[Lark] = None
+
+
+def _get_earley_parser() -> Lark:
+    """Лениво строит Earley-парсер (без LALR и для сравнения в тестах)."""
+    global _earley_parser
+    if _earley_parser is None:
+        _earley_parser = Lark.open(_GRAMMAR_PATH, parser="earley", start="start")
+    return _earley_parser
+
+
+def parse_formula_earley(text: str) -> Formula:
+    """Парсит строку Earley-парсером (медленный, но общий алгоритм)."""
+    tree = _get_earley_parser().parse(text)
+    return _transformer.transform(tree)
+
+
 def parse_formula(text: str) -> Formula:
     """Парсит строку в AST логической формулы.
 
+    Разбирает LALR(1), а Earley — только если LALR-парсер не построился.
     Выбрасывает lark.exceptions.LarkError при невалидном синтаксисе.
     """
-    tree = _parser.parse(text)
-    return _transformer.transform(tree)
+    if _lalr_parser is not None:
+        return _lalr_parser.parse(text)
+    return parse_formula_earley(text)
+
+
+# ---------------------------------------------------------------------------
+# Пакетный парсинг с LRU-кэшем
+# ---------------------------------------------------------------------------
+
+_parse_cached = lru_cache(maxsize=DEFAULT_PARSE_CACHE_SIZE)(parse_formula)
+
+
+def parse_formula_cached(text: str) -> Formula:
+    """Как parse_formula, но повторный разбор того же текста берётся из кэша.
+
+    AST-узлы неизменяемы, поэтому один объект безопасно отдавать разным
+    вызывающим. Ошибки разбора не кэшируются.
+    """
+    return _parse_cached(text)
+
+
+def parse_formulas(
+    texts: Iterable[str], return_exceptions: bool = False
+) -> list[Union[Formula, Exception]]:
+    """Парсит набор формул через общий LRU-кэш.
+
+    Args:
+        texts: Строки формул.
+        return_exceptions: Если True, ошибка разбора кладётся в результат
+            на место формулы; иначе пробрасывается первая ошибка.
+
+    Returns:
+        Список AST в порядке входа.
+    """
+    results: list[Union[Formula, Exception]] = []
+    for text in texts:
+        try:
+            results.append(_parse_cached(text))
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            results.append(e)
+    return results
+
+
+def parse_cache_info():
+    """Статистика кэша: hits, misses, maxsize, currsize."""
+    return _parse_cached.cache_info()
+
+
+def clear_parse_cache() -> None:
+    """Сбрасывает кэш разобранных формул (и счётчики)."""
+    _parse_cached.cache_clear()
+
+
+def set_parse_cache_size(maxsize: Optional[int]) -> None:
+    """Пересоздаёт кэш с новым лимитом (None — без ограничения)."""
+    global _parse_cached
+    _parse_cached = lru_cache(maxsize=maxsize)(parse_formula)
@@ -0,0 +1,157 @@
+"""Упрощение формул на уровне AST перед кодированием в Z3.
+
+Формулы от LLM часто содержат константы true/false, двойные отрицания,
+`x <-> x` и повторяющиеся конъюнкты. simplify() убирает это за один
+обход снизу вверх:
+
+- свёртка констант: `a & true` -> `a`, `a | true` -> `true`, `false -> a` -> `true`;
+- двойное отрицание: `~~a` -> `a`;
+- идемпотентность: `a & a` -> `a`, `a <-> a` -> `true`, `a -> a` -> `true`;
+- дополнение: `a & ~a` -> `false`, `a | ~a` -> `true`;
+- поглощение: `a & (a | b)` -> `a`, `(a & b) | (b & a & c)` -> `a & b`.
+
+Результат эквивалентен исходной формуле. Каждая формула упрощается
+отдельно и остаётся под своей меткой, поэтому unsat core по упрощённым
+формулам указывает на те же метки, что и по исходным.
+"""
+
+from parser.ast_nodes import (
+    Formula, Const, Var, Pred, Not, And, Or, Implies, Bicond, children,
+)
+
+TRUE = Const(True)
+FALSE = Const(False)
+
+
+def _negate(formula: Formula) -> Formula:
+    """Отрицание уже упрощённой формулы без двойного ~."""
+    if isinstance(formula, Const):
+        return Const(not formula.value)
+    if isinstance(formula, Not):
+        return formula.operand
+    return Not(formula)
+
+
+def _nary(cls: type, operands: tuple) -> Formula:
+    """Упрощает And/Or по уже упрощённым операндам."""
+    unit, zero = (TRUE, FALSE) if cls is And else (FALSE, TRUE)
+    dual = Or if cls is And else And
+    kept: list[Formula] = []
+    seen: set = set()
+    for op in operands:
+        for part in (op.operands if type(op) is cls else (op,)):
+            if part is zero:
+                return zero
+            if part is unit or part in seen:
+                continue
+            seen.add(part)
+            kept.append(part)
+    if any(type(op) is Not and op.operand in seen for op in kept):
+        return zero
+    # Поглощение: операнд двойственного типа поглощается операндом из его
+    # частей (a & (a | b)) или другим таким же с меньшим набором частей
+    # ((a | b) & (a | b | c)); попарно сравниваются только такие операнды
+    duals = {i: frozenset(op.operands) for i, op in enumerate(kept) if type(op) is dual}
+    absorbed = {
+        i for i, part in duals.items()
+        if any(x in seen for x in part)
+        or any(other < part or (other == part and j < i)
+               for j, other in duals.items() if j != i)
+    }
+    if absorbed:
+        kept = [op for i, op in enumerate(kept) if i not in absorbed]
+    if not kept:
+        return unit
+    return kept[0] if len(kept) == 1 else cls(*kept)
+
+
+def _simplify_node(node: Formula, kids: tuple) -> Formula:
+    """Упрощённый узел по уже упрощённым детям."""
+    match node:
+        case Const() | Var() | Pred():
+            return node
+        case Not():
+            return _negate(kids[0])
+        case And():
+            return _nary(And, kids)
+        case Or():
+            return _nary(Or, kids)
+        case Implies():
+            left, right = kids
+            if left is FALSE or right is TRUE or left is right:
+                return TRUE
+            if left is TRUE:
+                return right
+            if right is FALSE:
+                return _negate(left)
+            if _negate(left) is right:
+                return right
+            return Implies(left, right)
+        case Bicond():
+            left, right = kids
+            if left is right:
+                return TRUE
+            if _negate(left) is right:
+                return FALSE
+            for a, b in ((left, right), (right, left)):
+                if a is TRUE:
+                    return b
+                if a is FALSE:
+                    return _negate(b)
+            return Bicond(left, right)
+        case _:
+            raise ValueError(f"Неизвестный тип формулы: {type(node)}")
+
+
+def _operands(node: Formula) -> tuple:
+    """Дети узла; у And/Or — плоский список операндов.
+
+    And/Or n-арные, и парсер строит их плоскими (And.flat), но узел,
+    собранный конструктором напрямую, может содержать вложенный узел того
+    же типа. Его операнды вливаются в общий список: `(a & b) & c`
+    упрощается как `a & b & c`.
+    """
+    if type(node) not in (And, Or):
+        return children(node)
+    result = []
+    stack = list(reversed(node.operands))
+    while stack:
+        op = stack.pop()
+        if type(op) is type(node):
+            stack.extend(reversed(op.operands))
+        else:
+            result.append(op)
+    return tuple(result)
+
+
+def simplify(formula: Formula) -> Formula:
+    """Эквивалентная упрощённая формула (обход без рекурсии)."""
+    done: dict = {}
+    stack = [formula]
+    while stack:
+        node = stack[-1]
+        if node in done:
+            stack.pop()
+            continue
+        kids = _operands(node)
+        pending = [k for k in kids if k not in done]
+        if pending:
+            stack.extend(pending)
+            continue
+        stack.pop()
+        done[node] = _simplify_node(node, tuple(done[k] for k in kids))
+    return done[formula]
+
+
+def simplify_labeled(
+    labeled_formulas: list[tuple[str, Formula]],
+) -> tuple[list[tuple[str, Formula]], list[str]]:
+    """Упрощает помеченные формулы, сохраняя метку каждой.
+
+    Returns:
+        (пары (метка, упрощённая формула) в исходном порядке, метки формул,
+        упростившихся до false — они противоречивы сами по себе).
+    """
+    simplified = [(label, simplify(formula)) for label, formula in labeled_formulas]
+    falsified = [label for label, formula in simplified if formula is FALSE]
+    return simplified, falsified
@@ -0,0 +1,117 @@
+"""Аудит базы правил: противоречивые подмножества и избыточные правила.
+
+Правила из накопительного JSON добываются из сотен резюме и дедуплицируются
+только по строке формулы. Аудит работает в одном инкрементальном солвере
+(Z3Checker с правилами под литералами-предположениями):
+
+1. Пока база правил противоречива, находится минимальное противоречивое
+   подмножество (MUS) и из него исключается самое позднее правило
+   (правила baseline исключаются последними).
+2. Каждое правило проверяется на следование из остальных оставшихся:
+   если rest ⊨ rule, правило избыточно и исключается. Так уходят дубликаты,
+   эквивалентные записи и правила, следующие из цепочек других правил.
+   Запрос ограничивается конусом влияния переменных правила.
+
+Оставшийся набор логически эквивалентен непротиворечивой части базы, но
+меньше, а значит, быстрее проверяется на каждом резюме.
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from parser.ast_nodes import Const, Formula
+from prover.z3_checker import Z3Checker
+
+# Лимит времени одного запроса аудита, секунды; при превышении правило остаётся
+AUDIT_QUERY_TIMEOUT = 5.0
+
+
+@dataclass
+class RuleAudit:
+    """Результат аудита. Правила указываются индексами во входном списке."""
+    kept: list[int] = field(default_factory=list)
+    # Минимальные противоречивые подмножества и исключённое из каждого правило
+    conflicts: list[list[int]] = field(default_factory=list)
+    dropped_conflicting: list[int] = field(default_factory=list)
+    # Избыточное правило -> правила, из которых оно следует
+    redundant: dict[int, list[int]] = field(default_factory=dict)
+
+
+def _rule_id(index: int) -> str:
+    # Метки в базе не уникальны, поэтому в солвере правила идут под индексами
+    return f"r{index}"
+
+
+def _rule_index(rule_id: str) -> int:
+    return int(rule_id[1:])
+
+
+def _drop_order(indices: list[int], baseline: set[int]) -> list[int]:
+    """Порядок исключения: сначала поздние добытые правила, baseline — в конце."""
+    return sorted(indices, key=lambda i: (i in baseline, -i))
+
+
+def audit_rules(
+    rules: list[Formula],
+    baseline: Optional[set[int]] = None,
+    timeout: float = AUDIT_QUERY_TIMEOUT,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> RuleAudit:
+    """Ищет противоречивые подмножества и избыточные правила.
+
+    Args:
+        rules: Разобранные формулы правил.
+        baseline: Индексы правил, которые исключаются в последнюю очередь.
+        timeout: Лимит времени одного запроса к солверу, секунды.
+        progress: Обратный вызов progress(сделано, всего) на шаге избыточности.
+
+    Returns:
+        RuleAudit с индексами оставленных и исключённых правил.
+    """
+    baseline = baseline or set()
+    ids = [_rule_id(i) for i in range(len(rules))]
+    checker = Z3Checker(
+        rules=list(zip(ids, rules)), native=False, slicing=False, timeout=timeout,
+    )
+    report = RuleAudit()
+    active = set(range(len(rules)))
+
+    def active_ids(indices) -> list[str]:
+        return [_rule_id(i) for i in sorted(indices)]
+
+    # 1. Противоречивые подмножества самой базы
+    falsum = Const(False)
+    while True:
+        core = checker.entailment_core(falsum, active_ids(active))
+        if core is None:
+            break
+        mus = [_rule_index(r) for r in core]
+        # Сжатие ядра до минимального удалением по одному правилу
+        for index in list(mus):
+            if index not in mus:
+                continue
+            trial = [i for i in mus if i != index]
+            smaller = checker.entailment_core(falsum, active_ids(trial))
+            if smaller is not None:
+                mus = [_rule_index(r) for r in smaller]
+        mus.sort()
+        victim = _drop_order(mus, baseline)[0]
+        report.conflicts.append(mus)
+        report.dropped_conflicting.append(victim)
+        active.discard(victim)
+
+    # 2. Правила, следующие из остальных
+    order = _drop_order(sorted(active), baseline)
+    for done, index in enumerate(order, 1):
+        cone = checker.slice_rules([(ids[index], rules[index])])
+        premises = [r for r in cone if r != ids[index] and _rule_index(r) in active]
+        core = checker.entailment_core(rules[index], premises)
+        if core is not None:
+            active.discard(index)
+            report.redundant[index] = sorted(_rule_index(r) for r in core)
+        if progress is not None:
+            progress(done, len(order))
+
+    report.kept = sorted(active)
+    checker.close()
+    return report
@@ -0,0 +1,110 @@
+"""Пакетная проверка множества наборов утверждений на пуле процессов.
+
+При изменении доменных правил стадию 3 нужно заново прогнать по сотням
+сохранённых наборов утверждений. check_many распределяет наборы по
+процессам: каждый процесс один раз получает разобранную базу правил и
+держит свой Z3Checker, а результаты возвращаются в порядке входа по мере
+готовности. Каждый набор ограничен сроком set_timeout: патологический
+набор получает UNKNOWN и не задерживает остальные.
+"""
+
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterable, Iterator, Optional, Union
+
+from parser.ast_nodes import Formula
+from prover.z3_checker import CheckResult, Z3Checker
+
+# Сколько задач держать в очереди на один процесс: небольшой запас, чтобы
+# медленный набор в голове очереди не оставлял остальные процессы без работы
+TASKS_PER_WORKER = 16
+
+# Срок проверки одного набора по умолчанию, секунды (timeout Z3Checker в процессах)
+DEFAULT_SET_TIMEOUT = 30.0
+
+_worker_checker: Optional[Z3Checker] = None
+
+
+def _init_worker(rules: list[tuple[str, Formula]], checker_kwargs: dict) -> None:
+    """Инициализатор процесса: один Z3Checker с правилами на всю его жизнь."""
+    global _worker_checker
+    _worker_checker = Z3Checker(rules=rules, **checker_kwargs)
+
+
+def _check_in_worker(
+    labeled_formulas: list[tuple[str, Formula]], check_kwargs: dict
+) -> CheckResult:
+    return _worker_checker.check(labeled_formulas, **check_kwargs)
+
+
+def check_many(
+    claim_sets: Iterable[list[tuple[str, Formula]]],
+    rules: Optional[list[tuple[str, Formula]]] = None,
+    workers: Optional[int] = None,
+    return_exceptions: bool = False,
+    checker_kwargs: Optional[dict] = None,
+    set_timeout: Optional[float] = DEFAULT_SET_TIMEOUT,
+    **check_kwargs,
+) -> Iterator[Union[CheckResult, Exception]]:
+    """Проверяет наборы формул в пуле процессов, отдавая результаты по порядку.
+
+    Наборы подаются в пул порциями (TASKS_PER_WORKER на процесс), так что
+    вход может быть генератором, а долгий набор занимает только один
+    процесс: остальные продолжают проверять следующие наборы, пока
+    генератор ждёт его результата.
+
+    Args:
+        claim_sets: Наборы пар (метка, формула).
+        rules: Доменные правила; передаются каждому процессу один раз.
+        workers: Число процессов (по умолчанию — число CPU).
+        return_exceptions: Если True, ошибка проверки набора отдаётся на
+            его месте; иначе пробрасывается.
+        checker_kwargs: Параметры Z3Checker в процессах (native, slicing,
+            timeout). Явный timeout здесь важнее set_timeout.
+        set_timeout: Срок проверки одного набора, секунды (общий для всех
+            запросов к решателю в его check(), см. Z3Checker). Не
+            уложившийся набор получает статус UNKNOWN. None — без срока.
+        **check_kwargs: Параметры Z3Checker.check (all_cores, corrections...).
+
+    Yields:
+        CheckResult (или исключение) для каждого набора в порядке входа.
+    """
+    workers = workers or os.cpu_count() or 1
+    window = workers * TASKS_PER_WORKER
+    checker_kwargs = dict(checker_kwargs or {})
+    if set_timeout is not None:
+        checker_kwargs.setdefault("timeout", set_timeout)
+    # spawn: процессы не наследуют Z3-контексты и потоки родителя
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(list(rules or []), checker_kwargs),
+    )
+    pending: deque[Future] = deque()
+    try:
+        sets = iter(claim_sets)
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < window:
+                try:
+                    labeled = next(sets)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.append(executor.submit(_check_in_worker, labeled, check_kwargs))
+            if not pending:
+                return
+            try:
+                result = pending.popleft().result()
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                result = e
+            yield result
+    finally:
+        # Без ожидания: при раннем закрытии генератора процессы доделывают
+        # текущие наборы (не дольше set_timeout) и завершаются сами
+        executor.shutdown(wait=False, cancel_futures=True)
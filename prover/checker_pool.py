@@ -0,0 +1,177 @@
+"""Пул Z3Checker'ов для параллельной проверки из нескольких потоков.
+
+Каждый чекер пула живёт в своём z3.Context, поэтому потоки проверяют
+резюме одновременно (вызовы Z3 через ctypes отпускают GIL) и не делят
+состояние солвера. Чекер, отработавший max_uses проверок, закрывается и
+при следующем запросе пересоздаётся с нуля: символы Z3 и выученные
+клаузы не копятся всё время жизни веб-воркера.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from parser.ast_nodes import Formula
+from prover.z3_checker import CheckResult, IncrementalCheck, Z3Checker
+
+# Число проверок, после которого чекер пересоздаётся
+DEFAULT_MAX_USES = 1000
+
+
+def _load_malloc_trim():
+    """malloc_trim из glibc или None (другая libc, другая ОС)."""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6")
+        return libc.malloc_trim
+    except (OSError, AttributeError):
+        return None
+
+
+_malloc_trim = _load_malloc_trim()
+
+
+def release_native_memory() -> None:
+    """Возвращает ОС освобождённую память кучи C (только glibc).
+
+    Контекст Z3 создаётся в одном потоке, а освобождается часто в другом;
+    без этого его страницы остаются во фрагментированных аренах malloc и
+    RSS долгоживущего процесса растёт, хотя утечки нет.
+    """
+    if _malloc_trim is not None:
+        _malloc_trim(0)
+
+
+class CheckerPool:
+    """Пул из не более чем size чекеров с общими доменными правилами.
+
+    Чекеры создаются лениво, при первой нехватке. Поток, которому чекера
+    не хватило, ждёт, пока другой поток вернёт свой в пул.
+    """
+
+    def __init__(
+        self,
+        rules: Optional[list[tuple[str, Formula]]] = None,
+        size: Optional[int] = None,
+        max_uses: Optional[int] = DEFAULT_MAX_USES,
+        **checker_kwargs,
+    ):
+        """
+        Args:
+            rules: Доменные правила, которые получает каждый чекер.
+            size: Предел числа чекеров (по умолчанию — число CPU).
+            max_uses: Число проверок, после которого чекер пересоздаётся
+                (None — не пересоздавать).
+            **checker_kwargs: Параметры Z3Checker (native, slicing).
+        """
+        self._rules = list(rules or [])
+        self._size = size or os.cpu_count() or 1
+        self._max_uses = max_uses
+        self._checker_kwargs = checker_kwargs
+        # Свободные чекеры; None — свободное место, под которое чекер ещё
+        # не создан
+        self._idle: list[Optional[Z3Checker]] = [None] * self._size
+        # id(чекера) -> (поток-владелец, число проверок)
+        self._state: dict[int, tuple[int, int]] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        """Предел числа чекеров в пуле."""
+        return self._size
+
+    def _take(self) -> Optional[Z3Checker]:
+        """Забирает свободный чекер, предпочитая созданный этим потоком.
+
+        Память Z3 выделяется в арене malloc того потока, где создан чекер;
+        если чекер живёт и умирает в одном потоке, арены не фрагментируются.
+        """
+        me = threading.get_ident()
+        for i, checker in enumerate(self._idle):
+            if checker is not None and self._state[id(checker)][0] == me:
+                return self._idle.pop(i)
+        if None in self._idle:
+            return self._idle.pop(self._idle.index(None))
+        return self._idle.pop()
+
+    @contextmanager
+    def acquire(self) -> Iterator[Z3Checker]:
+        """Выдаёт чекер в монопольное пользование на время блока with."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("CheckerPool закрыт")
+            while not self._idle:
+                self._cond.wait()
+            checker = self._take()
+        if checker is None:
+            try:
+                checker = Z3Checker(rules=self._rules, **self._checker_kwargs)
+            except BaseException:
+                self._put(None)
+                raise
+            with self._cond:
+                self._state[id(checker)] = (threading.get_ident(), 0)
+        try:
+            yield checker
+        finally:
+            self._release(checker)
+
+    def _put(self, checker: Optional[Z3Checker]) -> None:
+        with self._cond:
+            self._idle.append(checker)
+            self._cond.notify()
+
+    def _release(self, checker: Z3Checker) -> None:
+        with self._cond:
+            owner, uses = self._state[id(checker)]
+            uses += 1
+            retire = self._closed or (
+                self._max_uses is not None and uses >= self._max_uses
+            )
+            if retire:
+                del self._state[id(checker)]
+            else:
+                self._state[id(checker)] = (owner, uses)
+        if retire:
+            checker.close()
+            release_native_memory()
+            self._put(None)
+        else:
+            self._put(checker)
+
+    def check(self, labeled_formulas: list[tuple[str, Formula]], **kwargs) -> CheckResult:
+        """Проверяет набор формул свободным чекером (см. Z3Checker.check)."""
+        with self.acquire() as checker:
+            return checker.check(labeled_formulas, **kwargs)
+
+    @contextmanager
+    def incremental(self) -> Iterator[IncrementalCheck]:
+        """Сессия инкрементальной проверки на свободном чекере (см. Z3Checker.incremental)."""
+        with self.acquire() as checker, checker.incremental() as session:
+            yield session
+
+    def classify_claims(self, labeled_formulas: list[tuple[str, Formula]]) -> dict[str, str]:
+        """Статусы формул свободным чекером (см. Z3Checker.classify_claims)."""
+        with self.acquire() as checker:
+            return checker.classify_claims(labeled_formulas)
+
+    def close(self) -> None:
+        """Закрывает простаивающие чекеры; занятые закроются при возврате."""
+        with self._cond:
+            self._closed = True
+            idle = [c for c in self._idle if c is not None]
+            self._idle = [None] * (len(self._idle) - len(idle))
+            for checker in idle:
+                del self._state[id(checker)]
+        for checker in idle:
+            checker.close()
+        release_native_memory()
+
+    def __enter__(self) -> "CheckerPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
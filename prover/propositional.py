@@ -0,0 +1,328 @@
+"""Нативный пропозициональный движок: Horn-SAT и 2-SAT без Z3.
+
+Почти все доменные правила — импликации, бинарные исключения ~(a & b)
+или литералы. После перевода в клаузы такие наборы попадают в один из
+двух классов, решаемых за линейное время:
+
+* Horn (в каждой клаузе не больше одного положительного литерала) —
+  прямое распространение единичных клауз;
+* 2-SAT (в каждой клаузе не больше двух литералов) — граф импликаций и
+  сильно связные компоненты.
+
+Для невыполнимого набора ядро собирается из меток клауз, участвовавших в
+выводе противоречия. Всё, что не укладывается в эти классы, решает Z3.
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+from parser.ast_nodes import (
+    Formula, Const, Var, Pred, Not, And, Or, Implies, Bicond, iter_nodes,
+)
+
+# Литерал: (имя переменной, полярность); клауза — множество литералов
+Literal = tuple[str, bool]
+Clause = frozenset
+
+# Ограничения клаузификации: большие формулы дешевле отдать Z3,
+# чем раздувать CNF дистрибутивностью
+MAX_FORMULA_NODES = 256
+MAX_CLAUSES_PER_FORMULA = 64
+
+
+@dataclass
+class NativeResult:
+    """Результат нативной проверки."""
+    is_consistent: bool
+    core_labels: list[str] = field(default_factory=list)
+    model: dict[str, bool] = field(default_factory=dict)
+    engine: str = ""
+
+
+class _TooLarge(Exception):
+    """Клаузификация превысила лимиты."""
+
+
+def atom_name(atom: Var | Pred) -> str:
+    """Имя пропозициональной переменной для атома.
+
+    Предикат с аргументами сворачивается в одну переменную.
+    """
+    if isinstance(atom, Pred):
+        return f"{atom.name}_{'_'.join(atom.args)}"
+    return atom.name
+
+
+def _product(left: list[Clause], right: list[Clause]) -> list[Clause]:
+    """Дизъюнкция двух CNF: попарное объединение клауз."""
+    if len(left) * len(right) > MAX_CLAUSES_PER_FORMULA:
+        raise _TooLarge
+    return [a | b for a in left for b in right]
+
+
+def _cnf(formula: Formula, positive: bool) -> list[Clause]:
+    """CNF формулы (или её отрицания при positive=False)."""
+    match formula:
+        case Const(value=value):
+            # Истина — пустой набор клауз, ложь — одна пустая клауза
+            return [] if value == positive else [frozenset()]
+        case Var() | Pred():
+            return [frozenset({(atom_name(formula), positive)})]
+        case Not(operand=op):
+            return _cnf(op, not positive)
+        case And() | Or():
+            parts = [_cnf(op, positive) for op in formula.operands]
+            if isinstance(formula, And) == positive:
+                return [c for part in parts for c in part]
+            result = parts[0]
+            for part in parts[1:]:
+                result = _product(result, part)
+            return result
+        case Implies(left=l, right=r):
+            if positive:
+                return _product(_cnf(l, False), _cnf(r, True))
+            return _cnf(l, True) + _cnf(r, False)
+        case Bicond(left=l, right=r):
+            if positive:
+                return (_product(_cnf(l, False), _cnf(r, True))
+                        + _product(_cnf(l, True), _cnf(r, False)))
+            return (_product(_cnf(l, True), _cnf(r, True))
+                    + _product(_cnf(l, False), _cnf(r, False)))
+        case _:
+            raise _TooLarge
+
+
+def clausify(formula: Formula) -> Optional[list[Clause]]:
+    """Переводит формулу в список клауз или возвращает None, если она велика.
+
+    Тавтологичные клаузы (x и ~x одновременно) отбрасываются.
+    """
+    if sum(1 for _ in iter_nodes(formula)) > MAX_FORMULA_NODES:
+        return None
+    try:
+        clauses = _cnf(formula, True)
+    except _TooLarge:
+        return None
+    if len(clauses) > MAX_CLAUSES_PER_FORMULA:
+        return None
+    result = []
+    seen = set()
+    for clause in clauses:
+        if any((name, not pol) in clause for name, pol in clause):
+            continue
+        if clause not in seen:
+            seen.add(clause)
+            result.append(clause)
+    return result
+
+
+def classify(clauses: list[Clause]) -> Optional[str]:
+    """Класс набора клауз: "horn", "2sat" или None (нужен Z3)."""
+    horn = all(sum(1 for _, pol in c if pol) <= 1 for c in clauses)
+    if horn:
+        return "horn"
+    if all(len(c) <= 2 for c in clauses):
+        return "2sat"
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Horn-SAT
+# ---------------------------------------------------------------------------
+
+def solve_horn(labeled_clauses: list[tuple[str, Clause]]) -> NativeResult:
+    """Распространение единичных клауз для Horn-набора (линейное время).
+
+    Каждая выведенная переменная запоминает клаузу-причину; при конфликте
+    ядро — метки конфликтной клаузы и всех причин её посылок.
+    """
+    heads: list[Optional[str]] = []
+    remaining: list[int] = []
+    watchers: dict[str, list[int]] = {}
+    queue: deque[int] = deque()
+
+    for idx, (_, clause) in enumerate(labeled_clauses):
+        head = None
+        body = 0
+        for name, pol in clause:
+            if pol:
+                head = name
+            else:
+                body += 1
+                watchers.setdefault(name, []).append(idx)
+        heads.append(head)
+        remaining.append(body)
+        if body == 0:
+            queue.append(idx)
+
+    reason: dict[str, int] = {}
+    conflict = None
+    while queue and conflict is None:
+        idx = queue.popleft()
+        head = heads[idx]
+        if head is None:
+            conflict = idx
+            break
+        if head in reason:
+            continue
+        reason[head] = idx
+        for other in watchers.get(head, ()):
+            remaining[other] -= 1
+            if remaining[other] == 0:
+                queue.append(other)
+
+    if conflict is None:
+        variables = {name for _, c in labeled_clauses for name, _ in c}
+        return NativeResult(
+            is_consistent=True,
+            model={name: name in reason for name in sorted(variables)},
+            engine="horn",
+        )
+
+    # Обратный проход по причинам от конфликтной клаузы
+    core: list[str] = []
+    seen_clauses = set()
+    stack = [conflict]
+    while stack:
+        idx = stack.pop()
+        if idx in seen_clauses:
+            continue
+        seen_clauses.add(idx)
+        label, clause = labeled_clauses[idx]
+        if label not in core:
+            core.append(label)
+        stack.extend(reason[name] for name, pol in clause if not pol)
+    return NativeResult(is_consistent=False, core_labels=core, engine="horn")
+
+
+# ---------------------------------------------------------------------------
+# 2-SAT
+# ---------------------------------------------------------------------------
+
+def _tarjan_scc(n: int, edges: list[list[tuple[int, int]]]) -> list[int]:
+    """Номера сильно связных компонент (итеративный Тарьян).
+
+    Компоненты нумеруются в порядке завершения, то есть в обратном
+    топологическом порядке графа конденсации.
+    """
+    index = [-1] * n
+    low = [0] * n
+    comp = [-1] * n
+    on_stack = [False] * n
+    stack: list[int] = []
+    counter = 0
+    n_comp = 0
+
+    for root in range(n):
+        if index[root] != -1:
+            continue
+        work = [(root, 0)]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        while work:
+            v, i = work[-1]
+            if i < len(edges[v]):
+                work[-1] = (v, i + 1)
+                w = edges[v][i][0]
+                if index[w] == -1:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append((w, 0))
+                elif on_stack[w]:
+                    low[v] = min(low[v], index[w])
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[v])
+            if low[v] == index[v]:
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    comp[w] = n_comp
+                    if w == v:
+                        break
+                n_comp += 1
+    return comp
+
+
+def _path_labels(
+    edges: list[list[tuple[int, int]]], src: int, dst: int, labels: list[str]
+) -> list[str]:
+    """Метки клауз на кратчайшем пути src -> dst в графе импликаций."""
+    parent: dict[int, tuple[int, int]] = {src: (-1, -1)}
+    queue = deque([src])
+    while queue and dst not in parent:
+        v = queue.popleft()
+        for w, clause_idx in edges[v]:
+            if w not in parent:
+                parent[w] = (v, clause_idx)
+                queue.append(w)
+    result = []
+    node = dst
+    while node != src:
+        prev, clause_idx = parent[node]
+        result.append(labels[clause_idx])
+        node = prev
+    return result
+
+
+def solve_2sat(labeled_clauses: list[tuple[str, Clause]]) -> NativeResult:
+    """2-SAT через граф импликаций и сильно связные компоненты.
+
+    Противоречие — x и ~x в одной компоненте; ядро — метки клауз на путях
+    x -> ~x и ~x -> x.
+    """
+    var_index: dict[str, int] = {}
+    for label, clause in labeled_clauses:
+        if not clause:
+            # Пустая клауза (формула false) противоречива сама по себе
+            return NativeResult(is_consistent=False, core_labels=[label], engine="2sat")
+        for name, _pol in clause:
+            var_index.setdefault(name, len(var_index))
+
+    def node(name: str, pol: bool) -> int:
+        return 2 * var_index[name] + (0 if pol else 1)
+
+    n = 2 * len(var_index)
+    edges: list[list[tuple[int, int]]] = [[] for _ in range(n)]
+    labels = [label for label, _ in labeled_clauses]
+    for idx, (_, clause) in enumerate(labeled_clauses):
+        lits = list(clause)
+        a = lits[0]
+        b = lits[1] if len(lits) > 1 else lits[0]
+        # (a | b): ~a -> b, ~b -> a
+        edges[node(a[0], not a[1])].append((node(b[0], b[1]), idx))
+        edges[node(b[0], not b[1])].append((node(a[0], a[1]), idx))
+
+    comp = _tarjan_scc(n, edges)
+    for name, i in var_index.items():
+        pos, neg = 2 * i, 2 * i + 1
+        if comp[pos] == comp[neg]:
+            core: list[str] = []
+            for label in (_path_labels(edges, pos, neg, labels)
+                          + _path_labels(edges, neg, pos, labels)):
+                if label not in core:
+                    core.append(label)
+            return NativeResult(is_consistent=False, core_labels=core, engine="2sat")
+
+    # Литерал истинен, если его компонента ближе к стоку графа конденсации
+    model = {name: comp[2 * i] < comp[2 * i + 1] for name, i in var_index.items()}
+    return NativeResult(
+        is_consistent=True, model=dict(sorted(model.items())), engine="2sat"
+    )
+
+
+def solve(labeled_clauses: list[tuple[str, Clause]]) -> Optional[NativeResult]:
+    """Решает набор нативно или возвращает None, если нужен Z3."""
+    kind = classify([c for _, c in labeled_clauses])
+    if kind == "horn":
+        return solve_horn(labeled_clauses)
+    if kind == "2sat":
+        return solve_2sat(labeled_clauses)
+    return None
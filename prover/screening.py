@@ -0,0 +1,266 @@
+"""Векторизованный отсев наборов утверждений перед полной проверкой Z3.
+
+Большинство резюме дают только литералы над общим словарём. Для таких
+наборов база правил проверяется сразу на тысячах резюме: для каждого
+литерала хранится битовая строка по резюме (бит r — литерал выведен в
+резюме r), и распространение единичных клауз идёт операциями NumPy над
+этими строками для всех резюме разом.
+
+Итог по каждому набору:
+
+* UNSAT — распространение вывело x и ~x: противоречие доказано;
+* SAT — выведенные литералы, дополненные заранее найденной моделью базы
+  правил, выполняют все клаузы: модель предъявлена;
+* UNKNOWN — отсев не решил (утверждение не литерал, правило не
+  клаузифицируется, или модель не собралась); нужен Z3Checker.
+
+Требует NumPy (pip install '.[screen]').
+"""
+
+from typing import Optional, Sequence
+
+import numpy as np
+import z3
+
+from parser.ast_nodes import Formula, atoms
+from parser.simplify import simplify
+from prover import propositional
+from prover.batch import check_many
+from prover.z3_checker import SAT, UNKNOWN, UNSAT, CheckResult, Z3Checker
+
+# Предел итераций распространения (длина самой длинной цепочки вывода)
+MAX_PROPAGATION_ROUNDS = 1000
+
+_ALL_ONES = ~np.uint64(0)
+
+
+def _literal_index(var: int, positive: bool) -> int:
+    # Литерал x — 2i, ~x — 2i + 1; отрицание литерала l — l ^ 1
+    return 2 * var + (0 if positive else 1)
+
+
+def _set_bits(bitsets: np.ndarray, rows, resumes) -> None:
+    """Ставит бит резюме resumes[i] в строке rows[i] (на месте)."""
+    resumes = np.asarray(resumes, dtype=np.uint64)
+    shifts = resumes % np.uint64(64)
+    np.bitwise_or.at(
+        bitsets,
+        (np.asarray(rows, dtype=np.int64), (resumes // np.uint64(64)).astype(np.int64)),
+        np.left_shift(np.uint64(1), shifts),
+    )
+
+
+def _has_bit(bitset: np.ndarray, resume: int) -> bool:
+    return bool((int(bitset[resume // 64]) >> (resume % 64)) & 1)
+
+
+class RuleScreen:
+    """Отсев наборов литералов по базе правил, векторизованный по наборам.
+
+    База правил клаузифицируется один раз; клаузы группируются по длине,
+    чтобы распространение по каждой группе было одной операцией NumPy.
+    Правила, которые не клаузифицируются, не распространяются: набор,
+    задевший их переменные, получает UNKNOWN.
+    """
+
+    def __init__(self, rules: list[tuple[str, Formula]]):
+        self._var_index: dict[str, int] = {}
+        self._base_literals: list[int] = []
+        # Переменные правил, которые отсев не разбирает
+        self._opaque_vars: set[int] = set()
+        self._rules_consistent = True
+        clauses: list[list[int]] = []
+        opaque: list[Formula] = []
+        for _, formula in rules:
+            formula = simplify(formula)
+            rule_clauses = propositional.clausify(formula)
+            if rule_clauses is None:
+                opaque.append(formula)
+                self._opaque_vars |= {
+                    self._var(propositional.atom_name(a)) for a in atoms(formula)
+                }
+                continue
+            for clause in rule_clauses:
+                literals = sorted(_literal_index(self._var(n), p) for n, p in clause)
+                if not literals:
+                    self._rules_consistent = False
+                elif len(literals) == 1:
+                    self._base_literals.append(literals[0])
+                else:
+                    clauses.append(literals)
+        by_size: dict[int, list[list[int]]] = {}
+        for literals in clauses:
+            by_size.setdefault(len(literals), []).append(literals)
+        self._groups = [np.array(group, dtype=np.int64) for group in by_size.values()]
+        self._base_model = self._find_base_model(clauses, opaque)
+        if self._base_model is None:
+            self._rules_consistent = False
+
+    def _var(self, name: str) -> int:
+        return self._var_index.setdefault(name, len(self._var_index))
+
+    def _find_base_model(
+        self, clauses: list[list[int]], opaque: list[Formula]
+    ) -> Optional[dict[int, bool]]:
+        """Модель базы правил (одна на все наборы); None — правила противоречивы."""
+        names = list(self._var_index)
+        with Z3Checker(native=False, simplify=False) as converter:
+            ctx = converter.ctx
+            variables = [z3.Bool(name, ctx) for name in names]
+            solver = z3.Solver(ctx=ctx)
+            for literals in clauses + [[l] for l in self._base_literals]:
+                solver.add(z3.Or(*[
+                    variables[l >> 1] if l % 2 == 0 else z3.Not(variables[l >> 1])
+                    for l in literals
+                ]))
+            for formula in opaque:
+                solver.add(converter.to_z3(formula))
+            if solver.check() != z3.sat:
+                return None
+            model = solver.model()
+            return {
+                i: z3.is_true(model.eval(var, model_completion=True))
+                for i, var in enumerate(variables)
+            }
+
+    def screen(self, claim_sets: Sequence[list[tuple[str, Formula]]]) -> list[str]:
+        """Статус SAT/UNSAT/UNKNOWN для каждого набора утверждений."""
+        count = len(claim_sets)
+        if count == 0:
+            return []
+        if not self._rules_consistent:
+            return [UNKNOWN] * count
+
+        # Литералы утверждений; None — набор не сводится к литералам
+        claim_literals: list[Optional[list[tuple[str, bool]]]] = []
+        for claims in claim_sets:
+            literals: Optional[list[tuple[str, bool]]] = []
+            for _, formula in claims:
+                clauses = propositional.clausify(simplify(formula))
+                if clauses is None or any(len(c) != 1 for c in clauses):
+                    literals = None
+                    break
+                literals.extend(next(iter(c)) for c in clauses)
+            claim_literals.append(literals)
+
+        # Переменные, встречающиеся только в утверждениях, — после правил
+        var_index = dict(self._var_index)
+        for literals in claim_literals:
+            for name, _ in literals or ():
+                var_index.setdefault(name, len(var_index))
+        n_vars = len(var_index)
+        words = (count + 63) // 64
+
+        # facts[l] — битовая строка резюме, в которых выведен литерал l;
+        # valid — резюме, которые отсев вообще разбирает
+        facts = np.zeros((2 * n_vars, words), dtype=np.uint64)
+        valid = np.zeros((1, words), dtype=np.uint64)
+        rows, resumes, screened = [], [], []
+        for r, literals in enumerate(claim_literals):
+            if literals is None:
+                continue
+            screened.append(r)
+            for name, positive in literals:
+                rows.append(_literal_index(var_index[name], positive))
+                resumes.append(r)
+        _set_bits(facts, rows, resumes)
+        _set_bits(valid, [0] * len(screened), screened)
+        valid = valid[0]
+        facts[self._base_literals] |= valid
+
+        self._propagate(facts)
+
+        conflict = np.bitwise_or.reduce(facts[0::2] & facts[1::2], axis=0)
+        consistent = self._model_satisfies(facts, n_vars) & valid & ~conflict
+        if self._opaque_vars:
+            opaque = sorted(self._opaque_vars)
+            touched = np.bitwise_or.reduce(
+                facts[[2 * v for v in opaque]] | facts[[2 * v + 1 for v in opaque]], axis=0
+            )
+            consistent &= ~touched
+
+        statuses = []
+        for r in range(count):
+            if _has_bit(conflict, r):
+                statuses.append(UNSAT)
+            elif _has_bit(consistent, r):
+                statuses.append(SAT)
+            else:
+                statuses.append(UNKNOWN)
+        return statuses
+
+    def _propagate(self, facts: np.ndarray) -> None:
+        """Распространение единичных клауз до неподвижной точки (на месте).
+
+        Для клаузы l1 | ... | lk литерал li выводится в тех резюме, где
+        ложны все остальные литералы: И по строкам ~lj, j != i, считается
+        через префиксные и суффиксные И по группе клауз одной длины.
+        """
+        for _ in range(MAX_PROPAGATION_ROUNDS):
+            changed = False
+            for group in self._groups:
+                falsified = facts[group ^ 1]  # (клаузы, k, слова)
+                ones = np.full_like(falsified[:, :1], _ALL_ONES)
+                prefix = np.concatenate(
+                    [ones, np.bitwise_and.accumulate(falsified, axis=1)[:, :-1]], axis=1
+                )
+                suffix = np.concatenate(
+                    [np.bitwise_and.accumulate(falsified[:, ::-1], axis=1)[:, -2::-1], ones],
+                    axis=1,
+                )
+                derived = prefix & suffix
+                new = derived & ~facts[group]
+                if new.any():
+                    np.bitwise_or.at(facts, group.ravel(), new.reshape(-1, facts.shape[1]))
+                    changed = True
+            if not changed:
+                return
+
+    def _model_satisfies(self, facts: np.ndarray, n_vars: int) -> np.ndarray:
+        """Резюме, где выведенные литералы + базовая модель выполняют все клаузы."""
+        base = np.zeros((n_vars, 1), dtype=np.uint64)
+        for var, value in self._base_model.items():
+            if value:
+                base[var] = _ALL_ONES
+        assigned = facts[0::2] | facts[1::2]
+        positive = facts[0::2] | (~assigned & base)
+        truth = np.empty_like(facts)
+        truth[0::2] = positive
+        truth[1::2] = ~positive
+        satisfied = np.full(facts.shape[1], _ALL_ONES, dtype=np.uint64)
+        for group in self._groups:
+            satisfied &= np.bitwise_and.reduce(
+                np.bitwise_or.reduce(truth[group], axis=1), axis=0
+            )
+        return satisfied
+
+
+def screen_and_check(
+    claim_sets: Sequence[list[tuple[str, Formula]]],
+    rules: list[tuple[str, Formula]],
+    screen: Optional[RuleScreen] = None,
+    **check_many_kwargs,
+) -> list[CheckResult]:
+    """Отсев + полная проверка только нерешённых отсевом наборов.
+
+    Наборы со статусом SAT получают CheckResult с engine="screen" и
+    моделью из литералов утверждений; остальные (UNSAT и UNKNOWN — ядру
+    противоречия нужен решатель) проверяются prover.batch.check_many.
+    """
+    screen = screen or RuleScreen(rules)
+    statuses = screen.screen(claim_sets)
+    results: list[Optional[CheckResult]] = [None] * len(claim_sets)
+    rest = [i for i, status in enumerate(statuses) if status != SAT]
+    for i, status in enumerate(statuses):
+        if status == SAT:
+            model = {}
+            for _, formula in claim_sets[i]:
+                for clause in propositional.clausify(simplify(formula)):
+                    name, positive = next(iter(clause))
+                    model[name] = positive
+            results[i] = CheckResult(is_consistent=True, model=model, engine="screen")
+    if rest:
+        checked = check_many([claim_sets[i] for i in rest], rules=rules, **check_many_kwargs)
+        for i, result in zip(rest, checked):
+            results[i] = result
+    return results
@@ -1,103 +1,1178 @@
 """Проверка непротиворечивости на Z3 с извлечением unsat core."""
 
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Iterator, Optional
 import z3
 
 from parser.ast_nodes import (
-    Formula, Const, Var, Pred, Not, And, Or, Implies, Bicond,
+    Formula, Const, Var, Pred, Not, And, Or, Implies, Bicond, atoms, fold,
 )
+from parser.simplify import simplify, simplify_labeled
+from prover import propositional
+
+logger = logging.getLogger(__name__)
+
+
+# Статусы проверки
+SAT = "sat"
+UNSAT = "unsat"
+UNKNOWN = "unknown"
+
+# Статусы утверждения относительно правил и остальных утверждений
+ENTAILED = "entailed"        # следует из них
+REFUTED = "refuted"          # его отрицание следует из них
+INDEPENDENT = "independent"  # не следует ни оно, ни отрицание
+CONFLICTING = "conflicting"  # правила и остальные утверждения уже противоречивы
+
+
+def true_vars(model: dict[str, bool]) -> list[str]:
+    """Переменные модели, отличные от значения по умолчанию (False)."""
+    return [name for name, value in model.items() if value]
 
 
 @dataclass
 class CheckResult:
     """Результат проверки непротиворечивости Z3."""
-    is_consistent: bool
+    # None — решатель не дал ответа в пределах timeout/rlimit (UNKNOWN)
+    is_consistent: Optional[bool]
     unsat_core_labels: list[str] = field(default_factory=list)
     label_to_formula: dict[str, str] = field(default_factory=dict)
-    model: Optional[str] = None
+    # Модель при SAT: только переменные проверяемых формул (без
+    # вспомогательных переменных правил и литералов-меток)
+    model: Optional[dict[str, bool]] = None
+    # Режим all_cores: все найденные MUS и признак полного перебора
+    unsat_cores: list[list[str]] = field(default_factory=list)
+    cores_exhaustive: bool = False
+    # Режим corrections: минимальные наборы утверждений, которые достаточно
+    # убрать для непротиворечивости (по возрастанию размера)
+    correction_sets: list[list[str]] = field(default_factory=list)
+    corrections_exhaustive: bool = False
+    # Чем решена задача: "z3" (или "z3-qf_fd", "z3-sat" для других
+    # конфигураций), нативный движок ("horn", "2sat") либо "simplify" —
+    # формула упростилась до false без обращения к решателю
+    engine: str = "z3"
+    # Режим classify: метка утверждения -> ENTAILED/REFUTED/INDEPENDENT/
+    # CONFLICTING (UNKNOWN, если решатель не уложился в лимиты)
+    claim_status: dict[str, str] = field(default_factory=dict)
+    # Почему ответ UNKNOWN (например, "timeout" или "max. resource limit exceeded")
+    reason_unknown: str = ""
+    # Статистика решателя (solver.statistics() для Z3) и время стадий, секунды
+    statistics: dict[str, float] = field(default_factory=dict)
+    encode_time: float = 0.0
+    solve_time: float = 0.0
+
+    @property
+    def status(self) -> str:
+        """SAT, UNSAT или UNKNOWN."""
+        if self.is_consistent is None:
+            return UNKNOWN
+        return SAT if self.is_consistent else UNSAT
+
+
+LABEL_PREFIX = "label_"
+
+# Метка отрицания запроса в entailment_core
+QUERY_LABEL = "__query"
+
+# Бюджет перечисления минимальных ядер по умолчанию
+MUS_MAX_CORES = 20
+MUS_TIME_BUDGET = 5.0
+
+# Бюджет перечисления минимальных корректирующих наборов по умолчанию
+MCS_MAX_SETS = 20
+MCS_TIME_BUDGET = 5.0
+
+# Значение параметра "timeout" Z3 без ограничения (UINT_MAX миллисекунд)
+_NO_TIMEOUT = 4294967295
+
+
+def _tactic_sat_solver(ctx: z3.Context) -> z3.Solver:
+    solver = z3.Then("simplify", "bit-blast", "sat", ctx=ctx).solver()
+    # Тактический солвер строит unsat core, только если его попросить
+    solver.set("unsat_core", True)
+    return solver
+
+
+# Конфигурации Z3: имя -> фабрика солвера в заданном контексте
+SOLVER_CONFIGS = {
+    "smt": lambda ctx: z3.Solver(ctx=ctx),
+    "qf_fd": lambda ctx: z3.SolverFor("QF_FD", ctx=ctx),
+    "sat": _tactic_sat_solver,
+}
 
 
 class Z3Checker:
-    """Конвертирует AST-формулы в Z3 и проверяет выполнимость."""
+    """Конвертирует AST-формулы в Z3 и проверяет выполнимость.
+
+    Правила живут в долгоживущем солвере в собственном z3.Context чекера;
+    один чекер потоки используют по очереди, для параллельной проверки —
+    prover.checker_pool.CheckerPool.
+    """
 
-    def __init__(self):
+    def __init__(
+        self,
+        rules: Optional[list[tuple[str, Formula]]] = None,
+        native: bool = True,
+        slicing: bool = True,
+        ctx: Optional[z3.Context] = None,
+        timeout: Optional[float] = None,
+        rlimit: Optional[int] = None,
+        solver_config: str = "smt",
+        simplify: bool = True,
+    ):
+        """
+        Args:
+            rules: Доменные правила, сразу передаваемые в add_rules.
+            native: Решать Horn- и 2-SAT-наборы без Z3 (см. _check_native).
+            slicing: Проверять только конус влияния формул (см. _active_rules).
+            ctx: Z3-контекст; по умолчанию у чекера собственный.
+            timeout: Срок всего вызова check(), секунды (см. _deadline).
+            rlimit: Ресурсный лимит Z3 на каждый solver.check() (в отличие
+                от времени детерминирован).
+            solver_config: Конфигурация Z3 из SOLVER_CONFIGS.
+            simplify: Упрощать формулы перед кодированием (parser.simplify).
+        """
+        if solver_config not in SOLVER_CONFIGS:
+            raise ValueError(f"Неизвестная конфигурация солвера: {solver_config}")
+        self._ctx = ctx if ctx is not None else z3.Context()
+        self.solver_config = solver_config
+        # Имя движка в CheckResult: "z3" для конфигурации по умолчанию
+        self._engine = "z3" if solver_config == "smt" else f"z3-{solver_config}"
+        self.timeout = timeout
+        self.rlimit = rlimit
+        self._native = native
+        self._slicing = slicing
+        self._simplify = simplify
+        # Клаузы правил для нативного движка; None — правила ему не подходят
+        self._rule_clauses: Optional[dict[str, list[frozenset]]] = {}
+        # Инвертированный индекс: переменная -> правила, и обратно
+        self._var_rules: dict[str, list[str]] = {}
+        self._rule_vars: dict[str, set[str]] = {}
+        # Выполнима ли база правил сама по себе (None — ещё не проверяли)
+        self._rules_consistent: Optional[bool] = None
         self._vars: dict[str, z3.BoolRef] = {}
+        self._solver = self._new_solver()
+        self._rule_labels: dict[str, str] = {}
+        self._rule_literals: dict[str, z3.BoolRef] = {}
+        self._base_vars: dict[str, z3.BoolRef] = {}
+        self._lock = threading.Lock()
+        if rules:
+            self.add_rules(rules)
+
+    def _new_solver(self) -> z3.Solver:
+        """Солвер в контексте чекера с лимитами timeout/rlimit."""
+        solver = SOLVER_CONFIGS[self.solver_config](self._ctx)
+        if self.timeout:
+            solver.set("timeout", max(1, int(self.timeout * 1000)))
+        if self.rlimit:
+            solver.set("rlimit", self.rlimit)
+        return solver
+
+    def _deadline(self) -> Optional[float]:
+        """Срок (time.monotonic) для вызова, начинающегося сейчас; None — без лимита.
+
+        timeout ограничивает весь check(): каждое обращение к решателю внутри
+        него (база правил, MUS, MCS, классификация) получает только остаток
+        срока, а не полный timeout заново. Не уложившийся вызов даёт UNKNOWN.
+        """
+        return time.monotonic() + self.timeout if self.timeout else None
+
+    def _solve(self, solver: z3.Solver, *assumptions, deadline: Optional[float] = None):
+        """solver.check(*assumptions) с таймаутом, равным остатку до deadline.
+
+        После истечения срока решатель получает 1 мс и отвечает unknown
+        ("timeout"), если задача не решается мгновенно. Без deadline
+        восстанавливается таймаут чекера: остаток прошлого вызова не
+        должен достаться следующему.
+        """
+        if deadline is not None:
+            ms = max(1, int((deadline - time.monotonic()) * 1000))
+        else:
+            ms = max(1, int(self.timeout * 1000)) if self.timeout else _NO_TIMEOUT
+        solver.set("timeout", ms)
+        return solver.check(*assumptions)
+
+    @property
+    def ctx(self) -> z3.Context:
+        """Z3-контекст, в котором живут термы и солвер этого чекера."""
+        return self._ctx
+
+    def interrupt(self) -> None:
+        """Прерывает текущий solver.check() из другого потока (ответ UNKNOWN)."""
+        ctx = self._ctx
+        if ctx is not None:
+            ctx.interrupt()
+
+    def close(self) -> None:
+        """Освобождает солвер и все Z3-объекты чекера.
+
+        После close() чекер использовать нельзя. Контекст удаляется, как
+        только на него не остаётся ссылок (если он не был передан извне).
+        """
+        with self._lock:
+            self._solver = None
+            self._vars = {}
+            self._base_vars = {}
+            self._rule_literals = {}
+            self._ctx = None
+
+    def __enter__(self) -> "Z3Checker":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
     def _get_var(self, name: str) -> z3.BoolRef:
         if name not in self._vars:
-            self._vars[name] = z3.Bool(name)
+            self._vars[name] = z3.Bool(name, self._ctx)
         return self._vars[name]
 
-    def to_z3(self, formula: Formula) -> z3.BoolRef:
-        """Рекурсивно конвертирует AST-формулу в Z3 BoolRef."""
-        match formula:
-            case Const(value=True):
-                return z3.BoolVal(True)
-            case Const(value=False):
-                return z3.BoolVal(False)
-            case Var(name=name):
-                return self._get_var(name)
-            case Pred(name=name, args=args):
-                # Разворачиваем предикат в пропозициональную переменную
-                flat = f"{name}_{'_'.join(args)}"
-                return self._get_var(flat)
-            case Not(operand=op):
-                return z3.Not(self.to_z3(op))
-            case And(left=l, right=r):
-                return z3.And(self.to_z3(l), self.to_z3(r))
-            case Or(left=l, right=r):
-                return z3.Or(self.to_z3(l), self.to_z3(r))
-            case Implies(left=l, right=r):
-                return z3.Implies(self.to_z3(l), self.to_z3(r))
-            case Bicond(left=l, right=r):
-                lz = self.to_z3(l)
-                rz = self.to_z3(r)
-                return lz == rz
+    atom_name = staticmethod(propositional.atom_name)
+
+    def _node_to_z3(self, node: Formula, args: tuple) -> z3.BoolRef:
+        """Строит Z3-выражение для узла по уже сконвертированным детям."""
+        match node:
+            case Const(value=value):
+                return z3.BoolVal(value, self._ctx)
+            case Var() | Pred():
+                return self._get_var(self.atom_name(node))
+            case Not():
+                return z3.Not(args[0])
+            case And():
+                return z3.And(*args)
+            case Or():
+                return z3.Or(*args)
+            case Implies():
+                return z3.Implies(*args)
+            case Bicond():
+                return args[0] == args[1]
             case _:
-                raise ValueError(f"Неизвестный тип формулы: {type(formula)}")
+                raise ValueError(f"Неизвестный тип формулы: {type(node)}")
 
-    def check(self, labeled_formulas: list[tuple[str, Formula]]) -> CheckResult:
+    def to_z3(self, formula: Formula) -> z3.BoolRef:
+        """Конвертирует AST-формулу в Z3 BoolRef.
+
+        Обход идёт по явному стеку (см. parser.ast_nodes.fold), поэтому
+        глубина формулы не ограничена recursion limit.
+        """
+        return fold(formula, self._node_to_z3)
+
+    @property
+    def rule_labels(self) -> list[str]:
+        """Метки правил, уже добавленных в базовый солвер."""
+        return list(self._rule_labels)
+
+    def _prepare(self, formula: Formula) -> Formula:
+        """Формула в том виде, в каком она кодируется (после упрощения)."""
+        return simplify(formula) if self._simplify else formula
+
+    def _track(self, label: str, formula: Formula) -> z3.BoolRef:
+        """Добавляет (метка -> формула) и возвращает литерал-предположение метки.
+
+        Формула включается только при передаче литерала в solver.check(),
+        поэтому любое подмножество формул можно проверить без перекодирования.
+        """
+        literal = z3.Bool(LABEL_PREFIX + label, self._ctx)
+        self._solver.add(z3.Implies(literal, self.to_z3(self._prepare(formula))))
+        return literal
+
+    def add_rules(self, labeled_rules: list[tuple[str, Formula]]) -> None:
+        """Добавляет правила в долгоживущий солвер (вне push/pop).
+
+        check() проверяет только свои формулы внутри push/pop, поэтому
+        правила не перекодируются на каждое резюме, а выученные солвером
+        клаузы сохраняются между вызовами.
+        """
+        with self._lock:
+            for label, original in labeled_rules:
+                formula = self._prepare(original)
+                self._rule_literals[label] = self._track(label, formula)
+                self._rule_labels[label] = str(original)
+                if self._rule_clauses is not None:
+                    clauses = propositional.clausify(formula)
+                    if clauses is None:
+                        self._rule_clauses = None
+                    else:
+                        self._rule_clauses.setdefault(label, []).extend(clauses)
+                names = self._formula_vars(formula)
+                for name in names - self._rule_vars.setdefault(label, set()):
+                    self._var_rules.setdefault(name, []).append(label)
+                self._rule_vars[label] |= names
+            self._base_vars = dict(self._vars)
+            self._rules_consistent = None
+
+    # -----------------------------------------------------------------------
+    # Срез правил по конусу влияния
+    # -----------------------------------------------------------------------
+
+    def _formula_vars(self, formula: Formula) -> set[str]:
+        """Имена пропозициональных переменных формулы."""
+        return {self.atom_name(a) for a in atoms(formula)}
+
+    def _claim_vars(self, labeled_formulas: list[tuple[str, Formula]]) -> list[str]:
+        """Отсортированные имена переменных проверяемых формул."""
+        return sorted(set().union(*(self._formula_vars(f) for _, f in labeled_formulas)))
+
+    def slice_rules(self, labeled_formulas: list[tuple[str, Formula]]) -> list[str]:
+        """Метки правил из конуса влияния переменных формул.
+
+        Обход в ширину по индексу "переменная -> правила": правило попадает
+        в срез, если делит переменную с формулами или с уже взятым правилом.
+        Правила без переменных (константы) входят всегда.
+        """
+        selected: set[str] = {l for l, names in self._rule_vars.items() if not names}
+        seen: set[str] = set()
+        stack = [name for _, f in labeled_formulas for name in self._formula_vars(f)]
+        while stack:
+            name = stack.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            for label in self._var_rules.get(name, ()):
+                if label not in selected:
+                    selected.add(label)
+                    stack.extend(self._rule_vars[label])
+        return [label for label in self._rule_labels if label in selected]
+
+    def _active_rules(
+        self,
+        labeled_formulas: list[tuple[str, Formula]],
+        deadline: Optional[float] = None,
+        locked: bool = False,
+    ) -> list[str]:
+        """Правила, которые нужно включить в проверку этих формул.
+
+        Это конус влияния: правила, связанные с переменными формул цепочкой
+        общих переменных (slicing=False — все правила). Срез точен, только если база правил выполнима сама по себе: иначе
+        противоречие среди несвязанных правил потерялось бы. Это проверяется
+        один раз после add_rules; кэшируется только ответ sat/unsat. Если
+        решатель не уложился в лимиты (unknown), этот вызов берёт все
+        правила, а проверка повторится в следующем. locked=True — вызывающий
+        уже держит self._lock.
+        """
+        if not self._slicing:
+            return list(self._rule_labels)
+        if self._rules_consistent is None:
+            if locked:
+                self._check_rules(deadline)
+            else:
+                with self._lock:
+                    self._check_rules(deadline)
+        if not self._rules_consistent:
+            return list(self._rule_labels)
+        return self.slice_rules(labeled_formulas)
+
+    def _check_rules(self, deadline: Optional[float]) -> None:
+        """Проверяет выполнимость базы правил (под self._lock)."""
+        if self._rules_consistent is not None:
+            return
+        result = self._solve(
+            self._solver, *self._rule_literals.values(), deadline=deadline
+        )
+        if result != z3.unknown:
+            self._rules_consistent = result == z3.sat
+
+    def entailment_core(
+        self, formula: Formula, rules: Optional[list[str]] = None
+    ) -> Optional[list[str]]:
+        """Проверяет, следует ли формула из правил, одним вызовом солвера.
+
+        Отрицание формулы добавляется под литералом внутри push/pop, а
+        правила включаются предположениями, поэтому серия запросов идёт в
+        одном инкрементальном солвере. entailment_core(Const(False), rules)
+        проверяет противоречивость самих правил.
+
+        Args:
+            formula: Проверяемая формула.
+            rules: Метки правил-посылок (по умолчанию все добавленные).
+
+        Returns:
+            Метки правил, из которых формула уже следует (unsat core, не
+            обязательно минимальный), или None — не следует либо решатель
+            не уложился в лимиты.
+        """
+        labels = list(self._rule_labels) if rules is None else rules
+        deadline = self._deadline()
+        with self._lock:
+            solver = self._solver
+            solver.push()
+            try:
+                query = self._track(QUERY_LABEL, Not(formula))
+                result = self._solve(
+                    solver, *[self._rule_literals[l] for l in labels], query,
+                    deadline=deadline,
+                )
+                if result != z3.unsat:
+                    return None
+                return [
+                    l for l in self._core_labels(solver.unsat_core()) if l != QUERY_LABEL
+                ]
+            finally:
+                solver.pop()
+                self._vars = dict(self._base_vars)
+
+    @staticmethod
+    def _core_labels(core) -> list[str]:
+        """Метки формул из unsat core (без префикса "label_")."""
+        core_labels = []
+        for c in core:
+            name = str(c)
+            if name.startswith(LABEL_PREFIX):
+                core_labels.append(name[len(LABEL_PREFIX):])
+            else:
+                core_labels.append(name)
+        return core_labels
+
+    def check(
+        self,
+        labeled_formulas: list[tuple[str, Formula]],
+        all_cores: bool = False,
+        max_cores: int = MUS_MAX_CORES,
+        time_budget: float = MUS_TIME_BUDGET,
+        corrections: bool = False,
+        max_corrections: int = MCS_MAX_SETS,
+        corrections_budget: float = MCS_TIME_BUDGET,
+        classify: bool = False,
+    ) -> CheckResult:
         """Проверяет непротиворечивость набора маркированных формул.
 
+        Формулы проверяются вместе с уже добавленными правилами и снимаются
+        из солвера по завершении, поэтому checker можно переиспользовать.
+
         Args:
             labeled_formulas: Список пар (метка, формула).
+            all_cores: Перечислить все минимальные противоречивые подмножества
+                (MUS), а не одно ядро Z3.
+            max_cores: Предел числа MUS в режиме all_cores.
+            time_budget: Предел времени перечисления MUS, секунды.
+            corrections: Найти минимальные корректирующие наборы (MCS):
+                какие из переданных формул убрать, чтобы остальное стало
+                непротиворечиво. Правила из add_rules при этом не снимаются.
+            max_corrections: Предел числа MCS.
+            corrections_budget: Предел времени перечисления MCS, секунды.
+            classify: Для каждой формулы определить, следует ли она из
+                правил и остальных формул, опровергается ими или от них не
+                зависит (CheckResult.claim_status, см. classify_claims).
 
         Returns:
             CheckResult со статусом и unsat core при противоречии.
         """
-        self._vars.clear()
-        solver = z3.Solver()
+        if self._simplify and not (all_cores or corrections or classify):
+            trivial = self._check_falsified(labeled_formulas)
+            if trivial is not None:
+                return trivial
+
+        deadline = self._deadline()
+        active = self._active_rules(labeled_formulas, deadline)
+
+        if self._native and not (all_cores or corrections or classify):
+            native = self._check_native(labeled_formulas, active)
+            if native is not None:
+                return native
+
+        with self._lock:
+            solver = self._solver
+            label_to_formula_str = {l: self._rule_labels[l] for l in active}
+            literals = {l: self._rule_literals[l] for l in active}
+
+            solver.push()
+            try:
+                start = time.perf_counter()
+                for label, formula in labeled_formulas:
+                    literals[label] = self._track(label, formula)
+                    label_to_formula_str[label] = str(formula)
+                encode_time = time.perf_counter() - start
+
+                start = time.perf_counter()
+                result = self._solve(solver, *literals.values(), deadline=deadline)
+                timings = {
+                    "encode_time": encode_time,
+                    "solve_time": time.perf_counter() - start,
+                    "statistics": self._statistics(solver),
+                }
+
+                if result == z3.sat:
+                    model = self._claim_model(solver, labeled_formulas)
+                    return CheckResult(
+                        is_consistent=True,
+                        model=model,
+                        label_to_formula=label_to_formula_str,
+                        engine=self._engine,
+                        claim_status=self._classify(
+                            labeled_formulas, literals, active, True, deadline
+                        ) if classify else {},
+                        **timings,
+                    )
+                if result != z3.unsat:
+                    return CheckResult(
+                        is_consistent=None,
+                        label_to_formula=label_to_formula_str,
+                        reason_unknown=solver.reason_unknown(),
+                        engine=self._engine,
+                        **timings,
+                    )
+                core_labels = self._core_labels(solver.unsat_core())
+                cores: list[list[str]] = []
+                exhaustive = False
+                if all_cores:
+                    cores, exhaustive = self._enumerate_mus(
+                        literals, max_cores, time_budget, deadline
+                    )
+                    if cores:
+                        core_labels = cores[0]
+                mcs: list[list[str]] = []
+                mcs_exhaustive = False
+                if corrections:
+                    claim_literals = {
+                        label: literals[label] for label, _ in labeled_formulas
+                    }
+                    mcs, mcs_exhaustive = self._enumerate_mcs(
+                        claim_literals, [self._rule_literals[l] for l in active],
+                        max_corrections, corrections_budget, deadline,
+                    )
+                claim_status = self._classify(
+                    labeled_formulas, literals, active, False, deadline
+                ) if classify else {}
+                return CheckResult(
+                    is_consistent=False,
+                    unsat_core_labels=core_labels,
+                    label_to_formula=label_to_formula_str,
+                    unsat_cores=cores,
+                    cores_exhaustive=exhaustive,
+                    correction_sets=mcs,
+                    corrections_exhaustive=mcs_exhaustive,
+                    engine=self._engine,
+                    claim_status=claim_status,
+                    **timings,
+                )
+            finally:
+                solver.pop()
+                # Переменные утверждений не должны копиться между вызовами
+                self._vars = dict(self._base_vars)
+
+    @contextmanager
+    def incremental(self) -> Iterator["IncrementalCheck"]:
+        """Проверка утверждений по одному, по мере поступления.
+
+        Внутри блока with чекер занят одной сессией: утверждения,
+        добавленные IncrementalCheck.add, копятся в одном push-уровне
+        солвера, и каждое сразу проверяется вместе с предыдущими. Выученные
+        клаузы переиспользуются, так что к последнему утверждению вердикт
+        почти готов. Сессией пользуется один поток — тот, что открыл блок.
+        """
+        # Выполнимость базы правил кэшируется до захвата блокировки
+        self._active_rules([])
+        with self._lock:
+            self._solver.push()
+            try:
+                yield IncrementalCheck(self)
+            finally:
+                self._solver.pop()
+                self._vars = dict(self._base_vars)
+
+    def classify_claims(self, labeled_formulas: list[tuple[str, Formula]]) -> dict[str, str]:
+        """Статус каждой формулы относительно правил и остальных формул.
+
+        ENTAILED — формула следует из правил и остальных формул, REFUTED —
+        следует её отрицание, INDEPENDENT — ни то, ни другое, CONFLICTING —
+        правила и остальные формулы противоречивы сами по себе. Все запросы
+        идут в одном солвере через литералы-предположения: на формулу один
+        вызов solver.check() (два, если весь набор противоречив).
+        """
+        return self.check(labeled_formulas, classify=True).claim_status
 
-        label_to_formula_str: dict[str, str] = {}
+    def _classify(
+        self,
+        labeled_formulas: list[tuple[str, Formula]],
+        literals: dict[str, z3.BoolRef],
+        active: list[str],
+        consistent: bool,
+        deadline: Optional[float] = None,
+    ) -> dict[str, str]:
+        """Классификация формул внутри push/pop метода check.
 
+        literals — литералы активных правил и формул, уже добавленных в
+        солвер. Отрицание каждой формулы добавляется под своим литералом.
+        Если весь набор выполним, ни одна формула не опровергается
+        остальными, и проверяется только следование. Формулы, до которых
+        очередь дошла после deadline, получают UNKNOWN без запросов.
+        """
+        solver = self._solver
+        rule_literals = [literals[l] for l in active]
+        claim_literals = {label: literals[label] for label, _ in labeled_formulas}
+        negated = {
+            label: self._track(f"{QUERY_LABEL}:{label}", Not(formula))
+            for label, formula in labeled_formulas
+        }
+        status: dict[str, str] = {}
+        for label in claim_literals:
+            if deadline is not None and time.monotonic() >= deadline:
+                status[label] = UNKNOWN
+                continue
+            others = [lit for other, lit in claim_literals.items() if other != label]
+            entailed = self._solve(solver, *rule_literals, *others, negated[label],
+                                   deadline=deadline)
+            refuted = z3.sat
+            if not consistent:
+                refuted = self._solve(solver, *rule_literals, *others, claim_literals[label],
+                                      deadline=deadline)
+            if entailed == z3.unknown or refuted == z3.unknown:
+                status[label] = UNKNOWN
+            elif entailed == z3.unsat:
+                status[label] = CONFLICTING if refuted == z3.unsat else ENTAILED
+            else:
+                status[label] = REFUTED if refuted == z3.unsat else INDEPENDENT
+        return status
+
+    def _claim_model(
+        self, solver: z3.Solver, labeled_formulas: list[tuple[str, Formula]]
+    ) -> dict[str, bool]:
+        """Значения переменных проверяемых формул в модели решателя.
+
+        Полная модель (str(solver.model())) включает все переменные правил
+        и литералы меток и занимает килобайты; здесь вычисляются только
+        переменные утверждений, а строка не строится вовсе. Вызывается под
+        блокировкой внутри push/pop: Z3-объекты не покидают поток чекера.
+        """
+        z3_model = solver.model()
+        return {
+            name: z3.is_true(z3_model.eval(self._get_var(name), model_completion=True))
+            for name in self._claim_vars(labeled_formulas)
+        }
+
+    @staticmethod
+    def _statistics(solver: z3.Solver) -> dict[str, float]:
+        """Статистика последнего solver.check() в виде словаря."""
+        stats = solver.statistics()
+        return {key: stats.get_key_value(key) for key in stats.keys()}
+
+    @staticmethod
+    def _check_falsified(
+        labeled_formulas: list[tuple[str, Formula]],
+    ) -> Optional[CheckResult]:
+        """UNSAT без решателя, если формула упрощается до false; иначе None.
+
+        Ядро — одна метка этого утверждения, в исходном виде формулы.
+        """
+        start = time.perf_counter()
+        _, falsified = simplify_labeled(labeled_formulas)
+        if not falsified:
+            return None
+        label = falsified[0]
+        return CheckResult(
+            is_consistent=False,
+            unsat_core_labels=[label],
+            label_to_formula={l: str(f) for l, f in labeled_formulas if l == label},
+            engine="simplify",
+            encode_time=time.perf_counter() - start,
+        )
+
+    def _check_native(
+        self, labeled_formulas: list[tuple[str, Formula]], active: list[str]
+    ) -> Optional[CheckResult]:
+        """Пробует решить набор нативно; None — набор не Horn и не 2-SAT.
+
+        Типичные правила и утверждения — Horn- или 2-SAT-клаузы, и
+        prover.propositional решает их быстрее, чем запуск Z3.
+        """
+        if self._rule_clauses is None:
+            return None
+        start = time.perf_counter()
+        labeled_clauses = [
+            (label, c) for label in active for c in self._rule_clauses[label]
+        ]
         for label, formula in labeled_formulas:
-            z3_formula = self.to_z3(formula)
-            p = z3.Bool(f"label_{label}")
-            solver.assert_and_track(z3_formula, p)
-            label_to_formula_str[label] = str(formula)
+            clauses = propositional.clausify(self._prepare(formula))
+            if clauses is None:
+                return None
+            labeled_clauses.extend((label, c) for c in clauses)
+        encode_time = time.perf_counter() - start
 
-        result = solver.check()
+        start = time.perf_counter()
+        native = propositional.solve(labeled_clauses)
+        if native is None:
+            return None
+        timings = {
+            "encode_time": encode_time,
+            "solve_time": time.perf_counter() - start,
+            "statistics": {"clauses": len(labeled_clauses)},
+        }
 
-        if result == z3.sat:
-            model_str = str(solver.model())
+        label_to_formula_str = {l: self._rule_labels[l] for l in active}
+        label_to_formula_str.update((label, str(f)) for label, f in labeled_formulas)
+        if native.is_consistent:
             return CheckResult(
                 is_consistent=True,
-                model=model_str,
+                model={
+                    name: native.model.get(name, False)
+                    for name in self._claim_vars(labeled_formulas)
+                },
                 label_to_formula=label_to_formula_str,
+                engine=native.engine,
+                **timings,
             )
+        return CheckResult(
+            is_consistent=False,
+            unsat_core_labels=native.core_labels,
+            label_to_formula=label_to_formula_str,
+            engine=native.engine,
+            **timings,
+        )
+
+    # -----------------------------------------------------------------------
+    # Перечисление MUS (MARCO)
+    # -----------------------------------------------------------------------
+
+    def _enumerate_mus(
+        self,
+        literals: dict[str, z3.BoolRef],
+        max_cores: int,
+        time_budget: float,
+        deadline: Optional[float] = None,
+    ) -> tuple[list[list[str]], bool]:
+        """Перечисляет минимальные противоречивые подмножества меток.
+
+        MARCO: map-солвер над теми же литералами меток хранит ещё не
+        исследованные подмножества. Выполнимое зерно расширяется до MSS и
+        отсекается снизу, невыполнимое — сжимается до MUS и отсекается сверху.
+
+        Перебор укладывается в time_budget и в общий срок вызова deadline.
+
+        Returns:
+            (список MUS, перебор завершён полностью).
+        """
+        budget_end = time.monotonic() + time_budget
+        if deadline is not None:
+            budget_end = min(budget_end, deadline)
+        deadline = budget_end
+        names = list(literals)
+        map_solver = self._new_solver()
+        cores: list[list[str]] = []
+
+        while len(cores) < max_cores and time.monotonic() < deadline:
+            map_result = self._solve(map_solver, deadline=deadline)
+            if map_result == z3.unknown:
+                break
+            if map_result != z3.sat:
+                return cores, True
+            model = map_solver.model()
+            # Неозначенные в модели метки считаются включёнными: зерно максимально
+            seed = [n for n in names if not z3.is_false(model.eval(literals[n]))]
+
+            result = self._solve(self._solver, *[literals[n] for n in seed], deadline=deadline)
+            if result == z3.sat:
+                mss = self._grow(seed, names, literals, deadline)
+                complement = [literals[n] for n in names if n not in mss]
+                if not complement:
+                    return cores, True
+                map_solver.add(z3.Or(complement))
+            elif result == z3.unsat:
+                mus = self._shrink(seed, literals, deadline)
+                cores.append(mus)
+                map_solver.add(z3.Or([z3.Not(literals[n]) for n in mus]))
+            else:
+                break
+        return cores, False
+
+    def _grow(
+        self, seed: list[str], names: list[str], literals: dict[str, z3.BoolRef],
+        deadline: Optional[float] = None,
+    ) -> set[str]:
+        """Расширяет выполнимое зерно до максимального выполнимого подмножества."""
+        current = list(seed)
+        included = set(seed)
+        for name in names:
+            if name in included:
+                continue
+            assumptions = [literals[n] for n in current] + [literals[name]]
+            if self._solve(self._solver, *assumptions, deadline=deadline) == z3.sat:
+                current.append(name)
+                included.add(name)
+        return included
+
+    def _shrink(
+        self, seed: list[str], literals: dict[str, z3.BoolRef],
+        deadline: Optional[float] = None,
+    ) -> list[str]:
+        """Сжимает невыполнимое зерно до MUS (удаление по одной метке).
+
+        Начинает с ядра последней проверки и после каждой удачной попытки
+        переходит к новому, ещё меньшему ядру.
+        """
+        current = set(self._core_labels(self._solver.unsat_core()))
+        for name in seed:
+            if name not in current:
+                continue
+            trial = [literals[n] for n in seed if n in current and n != name]
+            if self._solve(self._solver, *trial, deadline=deadline) == z3.unsat:
+                current = set(self._core_labels(self._solver.unsat_core()))
+        return [n for n in seed if n in current]
+
+    # -----------------------------------------------------------------------
+    # Минимальные корректирующие наборы (MCS)
+    # -----------------------------------------------------------------------
+
+    def _enumerate_mcs(
+        self,
+        claim_literals: dict[str, z3.BoolRef],
+        hard: list[z3.BoolRef],
+        max_sets: int,
+        time_budget: float,
+        deadline: Optional[float] = None,
+    ) -> tuple[list[list[str]], bool]:
+        """Перечисляет MCS над метками утверждений в порядке роста размера.
+
+        Для k = 1, 2, ... ищутся модели, где выключено не больше k
+        утверждений (AtLeast под отдельным литералом-предположением).
+        Каждый найденный набор блокируется клаузой "хотя бы одно из них
+        остаётся", что отсекает и все его надмножества; поэтому очередная
+        модель на уровне k — новый минимальный набор ровно из k меток.
+        Вызывается внутри push-области check(), клаузы снимаются вместе с ней.
+
+        Returns:
+            (список MCS, перебор завершён полностью).
+        """
+        solver = self._solver
+        budget_end = time.monotonic() + time_budget
+        if deadline is not None:
+            budget_end = min(budget_end, deadline)
+        deadline = budget_end
+        names = list(claim_literals)
+        lits = [claim_literals[n] for n in names]
+        sets: list[list[str]] = []
+
+        if self._solve(solver, *hard, deadline=deadline) != z3.sat:
+            # Правила противоречивы сами по себе — удаление утверждений не поможет
+            return sets, True
+
+        for k in range(1, len(names) + 1):
+            bound = z3.Bool(f"__mcs_at_most_{k}", self._ctx)
+            solver.add(z3.Implies(bound, z3.AtLeast(*lits, len(names) - k)))
+            while True:
+                if len(sets) >= max_sets or time.monotonic() >= deadline:
+                    return sets, False
+                result = self._solve(solver, *hard, bound, deadline=deadline)
+                if result == z3.unsat:
+                    break
+                if result != z3.sat:
+                    return sets, False
+                model = solver.model()
+                dropped = [
+                    n for n, lit in zip(names, lits)
+                    if z3.is_false(model.eval(lit, model_completion=True))
+                ]
+                sets.append(dropped)
+                solver.add(z3.Or([claim_literals[n] for n in dropped]))
+        return sets, True
+
+
+# ---------------------------------------------------------------------------
+# Инкрементальная проверка по мере поступления утверждений
+# ---------------------------------------------------------------------------
+
+class IncrementalCheck:
+    """Сессия инкрементальной проверки (см. Z3Checker.incremental).
+
+    add() кодирует утверждение и проверяет все добавленные вместе с
+    конусом влияния правил; после противоречия проверки не нужны —
+    добавление формул его не снимает, и новые утверждения только
+    кодируются. result() собирает CheckResult как у Z3Checker.check для
+    всех добавленных утверждений; result(classify=True) добавляет статусы
+    утверждений, посчитанные в том же push-уровне солвера.
+    """
+
+    def __init__(self, checker: Z3Checker):
+        self._checker = checker
+        self._claims: list[tuple[str, Formula]] = []
+        self._literals: dict[str, z3.BoolRef] = {}
+        self._active: list[str] = []
+        self._status = SAT
+        self._core: list[str] = []
+        self._reason_unknown = ""
+        self._statistics: dict[str, float] = {}
+        self.encode_time = 0.0
+        self.solve_time = 0.0
+
+    @property
+    def status(self) -> str:
+        """Статус набора добавленных утверждений (SAT, UNSAT или UNKNOWN)."""
+        return self._status
+
+    @property
+    def labels(self) -> list[str]:
+        return [label for label, _ in self._claims]
+
+    def add(self, label: str, formula: Formula) -> str:
+        """Добавляет утверждение и возвращает статус всех добавленных."""
+        checker = self._checker
+        self._claims.append((label, formula))
+        deadline = checker._deadline()
+        start = time.perf_counter()
+        # Утверждения после противоречия тоже кодируются: они нужны классификации
+        self._literals[label] = checker._track(label, formula)
+        if self._status == UNSAT:
+            self.encode_time += time.perf_counter() - start
+            return self._status
+        self._active = checker._active_rules(self._claims, deadline, locked=True)
+        self.encode_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        solver = checker._solver
+        result = checker._solve(
+            solver, *[checker._rule_literals[l] for l in self._active],
+            *self._literals.values(), deadline=deadline,
+        )
+        self.solve_time += time.perf_counter() - start
+        self._statistics = checker._statistics(solver)
+        if result == z3.sat:
+            self._status = SAT
+        elif result == z3.unsat:
+            self._status = UNSAT
+            self._core = checker._core_labels(solver.unsat_core())
         else:
-            core = solver.unsat_core()
-            # Убираем префикс "label_" из меток ядра
-            core_labels = []
-            for c in core:
-                name = str(c)
-                if name.startswith("label_"):
-                    core_labels.append(name[len("label_"):])
-                else:
-                    core_labels.append(name)
+            self._status = UNKNOWN
+            self._reason_unknown = solver.reason_unknown()
+        return self._status
+
+    def result(self, classify: bool = False) -> CheckResult:
+        """CheckResult по всем добавленным утверждениям.
+
+        classify=True — ещё и статус каждого утверждения (см.
+        Z3Checker.classify_claims) в том же push-уровне, без повторного
+        кодирования правил и утверждений.
+        """
+        checker = self._checker
+        label_to_formula = {l: checker._rule_labels[l] for l in self._active}
+        label_to_formula.update((label, str(f)) for label, f in self._claims)
+        common = {
+            "label_to_formula": label_to_formula,
+            "engine": checker._engine,
+            "encode_time": self.encode_time,
+            "solve_time": self.solve_time,
+            "statistics": self._statistics,
+        }
+        # Модель читается до классификации: та перезаписывает состояние солвера
+        model = {}
+        if self._status == SAT and self._claims:
+            model = checker._claim_model(checker._solver, self._claims)
+        claim_status: dict[str, str] = {}
+        if classify and self._claims:
+            if self._status == UNSAT:
+                # Срез по всем утверждениям: после противоречия он не обновлялся
+                self._active = checker._active_rules(self._claims, locked=True)
+                label_to_formula.update(
+                    (l, checker._rule_labels[l]) for l in self._active
+                )
+            literals = {l: checker._rule_literals[l] for l in self._active}
+            literals.update(self._literals)
+            start = time.perf_counter()
+            claim_status = checker._classify(
+                self._claims, literals, self._active, self._status == SAT,
+                checker._deadline(),
+            )
+            self.solve_time += time.perf_counter() - start
+            common["solve_time"] = self.solve_time
+        common["claim_status"] = claim_status
+        if self._status == UNSAT:
+            return CheckResult(is_consistent=False, unsat_core_labels=self._core, **common)
+        if self._status == UNKNOWN:
             return CheckResult(
-                is_consistent=False,
-                unsat_core_labels=core_labels,
-                label_to_formula=label_to_formula_str,
+                is_consistent=None, reason_unknown=self._reason_unknown, **common
+            )
+        return CheckResult(is_consistent=True, model=model, **common)
+
+
+# Портфель конфигураций
+# ---------------------------------------------------------------------------
+
+# Участники портфеля по умолчанию: нативный движок и конфигурации Z3
+PORTFOLIO_CONFIGS = ("native", "smt", "qf_fd", "sat")
+
+# Период, с которым процесс-участник проверяет флаг отмены, секунды
+_CANCEL_POLL = 0.01
+
+
+def _portfolio_worker(config, rules, checker_kwargs, tasks, results, cancelled):
+    """Процесс-участник портфеля: один чекер своей конфигурации на всю жизнь.
+
+    "native" отвечает только на наборы, решаемые нативным движком, и
+    возвращает None для остальных. Отдельный поток прерывает Z3, пока
+    текущая задача отменена и ещё выполняется.
+    """
+    native_only = config == "native"
+
+    def make_checker() -> Z3Checker:
+        return Z3Checker(
+            rules=rules, native=native_only,
+            solver_config="smt" if native_only else config, **checker_kwargs,
+        )
+
+    state = {"checker": make_checker(), "task": 0}
+    lock = threading.Lock()
+
+    def watch_cancel():
+        while True:
+            time.sleep(_CANCEL_POLL)
+            with lock:
+                if state["task"] and cancelled.value == state["task"]:
+                    state["checker"].interrupt()
+
+    threading.Thread(target=watch_cancel, daemon=True).start()
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        task_id, labeled_formulas, kwargs = task
+        with lock:
+            state["task"] = task_id
+        checker = state["checker"]
+        failed = False
+        try:
+            if native_only:
+                result = None
+                if not any(kwargs.get(k) for k in ("all_cores", "corrections", "classify")):
+                    active = checker._active_rules(labeled_formulas)
+                    result = checker._check_native(labeled_formulas, active)
+            else:
+                result = checker.check(labeled_formulas, **kwargs)
+            reply = (config, task_id, result, None)
+        except Exception as e:
+            failed = True
+            reply = (config, task_id, None, repr(e))
+        with lock:
+            state["task"] = 0
+        results.put(reply)
+
+        if cancelled.value == task_id:
+            if failed:
+                # Прерывание могло сорвать push/pop — солвер пересоздаётся
+                checker.close()
+                state["checker"] = make_checker()
+            else:
+                # Прерывание вне solver.check() остаётся взведённым до
+                # следующей операции; пустая проверка его сбрасывает
+                z3.Solver(ctx=checker.ctx).check()
+
+
+class PortfolioChecker:
+    """Гонка нескольких конфигураций решателя в отдельных процессах.
+
+    Каждая конфигурация (PORTFOLIO_CONFIGS) живёт в своём процессе с уже
+    добавленными правилами. check() отдаёт набор всем участникам, берёт
+    первый определённый ответ (SAT или UNSAT) и отменяет остальных через
+    прерывание Z3. Победитель пишется в лог и в счётчик wins — по нему
+    можно выбирать конфигурацию по умолчанию.
+    """
+
+    def __init__(
+        self,
+        rules: Optional[list[tuple[str, Formula]]] = None,
+        configs: tuple[str, ...] = PORTFOLIO_CONFIGS,
+        **checker_kwargs,
+    ):
+        """
+        Args:
+            rules: Доменные правила, которые получает каждый участник.
+            configs: Участники: "native" и/или имена из SOLVER_CONFIGS.
+            **checker_kwargs: Параметры Z3Checker (slicing, timeout, rlimit).
+        """
+        for config in configs:
+            if config != "native" and config not in SOLVER_CONFIGS:
+                raise ValueError(f"Неизвестная конфигурация солвера: {config}")
+        mp = multiprocessing.get_context("spawn")
+        self._results = mp.Queue()
+        self._cancelled = mp.Value("q", 0)
+        self._workers: dict[str, tuple] = {}
+        for config in configs:
+            tasks = mp.Queue()
+            process = mp.Process(
+                target=_portfolio_worker,
+                args=(config, list(rules or []), checker_kwargs, tasks,
+                      self._results, self._cancelled),
+                daemon=True,
             )
+            process.start()
+            self._workers[config] = (process, tasks)
+        self._task_id = 0
+        self._lock = threading.Lock()
+        self.wins: Counter = Counter()
+
+    @property
+    def configs(self) -> list[str]:
+        """Участники портфеля."""
+        return list(self._workers)
+
+    def check(self, labeled_formulas: list[tuple[str, Formula]], **kwargs) -> CheckResult:
+        """Проверяет набор всеми участниками; параметры — как у Z3Checker.check.
+
+        Returns:
+            Первый определённый результат. Если определённого ответа не дал
+            никто, возвращается UNKNOWN.
+        """
+        with self._lock:
+            self._task_id += 1
+            task_id = self._task_id
+            start = time.perf_counter()
+            for _, tasks in self._workers.values():
+                tasks.put((task_id, labeled_formulas, kwargs))
+
+            waiting = set(self._workers)
+            fallback: Optional[CheckResult] = None
+            while waiting:
+                try:
+                    config, reply_id, result, error = self._results.get(timeout=1.0)
+                except queue.Empty:
+                    dead = {c for c in waiting if not self._workers[c][0].is_alive()}
+                    for config in dead:
+                        logger.warning("Портфель: процесс %s завершился", config)
+                    waiting -= dead
+                    continue
+                if reply_id != task_id:
+                    # Запоздавший ответ на уже решённую задачу
+                    continue
+                waiting.discard(config)
+                if error is not None:
+                    logger.warning("Портфель: ошибка в %s: %s", config, error)
+                    continue
+                if result is None or result.is_consistent is None:
+                    fallback = fallback or result
+                    continue
+
+                self._cancelled.value = task_id
+                self.wins[config] += 1
+                logger.info(
+                    "Портфель: победила конфигурация %s (%s) за %.3f с",
+                    config, result.status, time.perf_counter() - start,
+                )
+                return result
+
+        return fallback or CheckResult(
+            is_consistent=None, reason_unknown="no portfolio configuration answered",
+            engine="portfolio",
+        )
+
+    def close(self) -> None:
+        """Останавливает процессы участников, дождавшись текущей проверки."""
+        with self._lock:
+            for process, tasks in self._workers.values():
+                tasks.put(None)
+            for process, _ in self._workers.values():
+                process.join(timeout=1.0)
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+            self._workers = {}
+
+    def __enter__(self) -> "PortfolioChecker":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
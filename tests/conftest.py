@@ -1,5 +1,34 @@
 """Shared test configuration."""
 
+import json
 import os
+from unittest.mock import MagicMock
+
+import pytest
 
 os.environ.setdefault("LLM_API_KEY", "test-dummy-key")
+# Тесты не должны читать ответы LLM из дискового кэша разработчика
+os.environ["LLM_CACHE_PATH"] = ""
+
+
+@pytest.fixture(autouse=True)
+def _fresh_client():
+    """Общий клиент LLM создаётся заново в каждом тесте (под его mock OpenAI)."""
+    from llm import client
+
+    client.close_client()
+    client.metrics.reset()
+    yield
+    client.close_client()
+
+
+def llm_response(content, prompt_tokens=10, completion_tokens=5):
+    """Mock ответа chat.completions.create; dict сериализуется в JSON."""
+    if isinstance(content, dict):
+        content = json.dumps(content)
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = content
+    response.usage.prompt_tokens = prompt_tokens
+    response.usage.completion_tokens = completion_tokens
+    return response
@@ -0,0 +1,75 @@
+"""Тесты асинхронного пайплайна: AsyncOpenAI, executor и семафор."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+from conftest import llm_response
+from llm.prompts import ANALYSIS_SYSTEM_PROMPT
+from main import run_pipeline_async, run_pipelines
+
+
+class _FakeLLM:
+    """chat.completions.create с задержкой сети и счётчиком запросов в полёте."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.05)
+        finally:
+            self.in_flight -= 1
+        system, user = (m["content"] for m in kwargs["messages"])
+        if system == ANALYSIS_SYSTEM_PROMPT:
+            return llm_response({"contradictions": [{"explanation": "x"}],
+                                 "overall_assessment": "bad"})
+        if "противоречие" in user:
+            claims = [
+                {"label": "claim_1", "formula": "x", "original_text": "t"},
+                {"label": "claim_2", "formula": "~x", "original_text": "t"},
+            ]
+        else:
+            claims = [{"label": "claim_1", "formula": "x", "original_text": "t"}]
+        return llm_response({"claims": claims, "predicates_used": {}})
+
+
+def _resumes(tmp_path, texts):
+    paths = []
+    for i, text in enumerate(texts):
+        path = tmp_path / f"resume_{i}.txt"
+        path.write_text(text, encoding="utf-8")
+        paths.append(str(path))
+    return paths
+
+
+@patch("llm.client.AsyncOpenAI")
+def test_async_pipeline_report(mock_openai_cls, tmp_path):
+    """Асинхронный пайплайн даёт тот же отчёт: UNSAT уходит в анализ."""
+    fake = _FakeLLM()
+    mock_openai_cls.return_value.chat.completions.create = fake.create
+    [path] = _resumes(tmp_path, ["противоречие"])
+
+    report = asyncio.run(run_pipeline_async(path, cache="off"))
+    assert report["summary"]["status"] == "unsat"
+    assert set(report["stages"]["z3_check"]["unsat_core_labels"]) == {"claim_1", "claim_2"}
+    assert report["summary"]["contradictions_found"] == 1
+
+
+@patch("llm.client.AsyncOpenAI")
+def test_run_pipelines_bounded_concurrency(mock_openai_cls, tmp_path):
+    """Резюме идут конкурентно, но не больше concurrency сразу; ошибка — на своём месте."""
+    fake = _FakeLLM()
+    mock_openai_cls.return_value.chat.completions.create = fake.create
+    mock_openai_cls.return_value.close = AsyncMock()
+    paths = _resumes(tmp_path, ["ok"] * 4 + ["противоречие"] * 4)
+    paths.insert(2, str(tmp_path / "missing.txt"))
+
+    results = asyncio.run(run_pipelines(paths, concurrency=3, cache="off"))
+    assert 1 < fake.max_in_flight <= 3
+    assert isinstance(results[2], FileNotFoundError)
+    statuses = [r["summary"]["status"] for i, r in enumerate(results) if i != 2]
+    assert statuses == ["sat"] * 4 + ["unsat"] * 4
+    mock_openai_cls.return_value.close.assert_awaited_once()
@@ -0,0 +1,53 @@
+"""Тесты аудита базы правил."""
+
+from parser.logic_parser import parse_formula
+from prover.audit import audit_rules
+from prover.z3_checker import Z3Checker
+
+
+def _parse(*texts):
+    return [parse_formula(t) for t in texts]
+
+
+def test_entailed_rules_are_dropped():
+    """Эквивалентные записи, тавтологии и следствия цепочек исключаются."""
+    rules = _parse(
+        "a -> b",          # 0
+        "b -> c",          # 1
+        "~a | b",          # 2: то же, что 0
+        "a -> c",          # 3: следует из 0 и 1
+        "x & y -> x",      # 4: тавтология
+        "p -> q",          # 5: независимое
+    )
+    audit = audit_rules(rules)
+    assert audit.conflicts == []
+    assert set(audit.redundant) == {2, 3, 4}
+    assert audit.redundant[4] == []
+    assert set(audit.redundant[3]) <= {0, 1, 2}
+    assert audit.kept == [0, 1, 5]
+
+    # Оставшийся набор эквивалентен исходному: каждое правило из него следует
+    kept = Z3Checker(rules=[(f"r{i}", rules[i]) for i in audit.kept])
+    assert all(kept.entailment_core(f) is not None for f in rules)
+
+
+def test_baseline_rules_are_kept_over_mined_duplicates():
+    """Из двух эквивалентных правил остаётся baseline, даже если оно раньше."""
+    rules = _parse("a -> b", "~b -> ~a")
+    assert audit_rules(rules, baseline={0}).kept == [0]
+    assert audit_rules(rules, baseline={1}).kept == [1]
+
+
+def test_conflicting_subsets_found_and_broken():
+    """Противоречивое подмножество находится минимальным и разрывается."""
+    rules = _parse(
+        "a",               # 0
+        "a -> b",          # 1
+        "c -> d",          # 2
+        "~b",              # 3
+    )
+    audit = audit_rules(rules, baseline={0, 1})
+    assert audit.conflicts == [[0, 1, 3]]
+    assert audit.dropped_conflicting == [3]
+    assert 3 not in audit.kept
+    assert Z3Checker(rules=[(f"r{i}", rules[i]) for i in audit.kept]).check([]).is_consistent
@@ -0,0 +1,104 @@
+"""Тесты пакетной проверки на пуле процессов."""
+
+import time
+
+import pytest
+from parser.logic_parser import parse_formula
+from prover.batch import check_many
+from prover.z3_checker import Z3Checker
+
+RULES = [
+    ("rule_fast_bugs", parse_formula("fastChanges -> moreBugs")),
+    ("rule_stability_less", parse_formula("improvedStability -> lessChanges")),
+    ("rule_conflict", parse_formula("~(moreBugs & lessChanges)")),
+]
+
+
+def _claim_sets(n):
+    """n наборов: чётные противоречивы, нечётные согласованы."""
+    sets = []
+    for i in range(n):
+        claims = [(f"claim_{i}", parse_formula("fastChanges"))]
+        if i % 2 == 0:
+            claims.append(("claim_stable", parse_formula("improvedStability")))
+        sets.append(claims)
+    return sets
+
+
+def test_check_many_matches_serial_in_order():
+    """Результаты пула процессов совпадают с последовательной проверкой по порядку."""
+    sets = _claim_sets(40)
+    serial = Z3Checker(rules=RULES)
+    expected = [serial.check(claims) for claims in sets]
+
+    results = list(check_many(iter(sets), rules=RULES, workers=2))
+
+    assert len(results) == len(expected)
+    for got, want in zip(results, expected):
+        assert got.is_consistent == want.is_consistent
+        assert set(got.unsat_core_labels) == set(want.unsat_core_labels)
+
+
+def test_check_many_passes_check_options():
+    """Параметры check() и Z3Checker доходят до процессов."""
+    sets = _claim_sets(2)
+    results = list(check_many(
+        sets, rules=RULES, workers=1, checker_kwargs={"native": False}, all_cores=True,
+    ))
+    assert results[0].engine == "z3"
+    assert results[0].unsat_cores
+    assert results[1].is_consistent is True
+
+
+def test_check_many_isolates_failing_instance():
+    """Ошибка в одном наборе не прерывает остальные при return_exceptions=True."""
+    sets = _claim_sets(4)
+    sets[1] = [("bad", "not a formula")]
+
+    results = list(check_many(sets, rules=RULES, workers=2, return_exceptions=True))
+
+    assert isinstance(results[1], Exception)
+    assert [r.is_consistent for i, r in enumerate(results) if i != 1] == [False, False, True]
+
+    with pytest.raises(Exception):
+        list(check_many(sets, rules=RULES, workers=2))
+
+
+def _pigeonhole(pigeons):
+    """Трудный для решателя UNSAT-набор (принцип Дирихле)."""
+    holes = range(pigeons - 1)
+    claims = [
+        (f"pigeon_{i}", parse_formula(" | ".join(f"p{i}_{h}" for h in holes)))
+        for i in range(pigeons)
+    ]
+    claims += [
+        (f"hole_{h}_{i}_{j}", parse_formula(f"~(p{i}_{h} & p{j}_{h})"))
+        for h in holes for i in range(pigeons) for j in range(i + 1, pigeons)
+    ]
+    return claims
+
+
+def test_check_many_bounds_slow_instance():
+    """Патологический набор получает UNKNOWN по set_timeout, остальные — ответы."""
+    sets = _claim_sets(6)
+    sets[2] = _pigeonhole(12)
+
+    start = time.perf_counter()
+    results = list(check_many(sets, rules=RULES, workers=2, set_timeout=0.5))
+    assert time.perf_counter() - start < 20
+
+    assert results[2].status == "unknown"
+    assert [r.is_consistent for i, r in enumerate(results) if i != 2] == [
+        False, True, True, False, True,
+    ]
+
+
+def test_check_many_early_close_does_not_wait():
+    """Закрытие генератора не ждёт наборов, которые ещё проверяются."""
+    sets = _claim_sets(1) + [_pigeonhole(12)] * 2
+    results = check_many(sets, rules=RULES, workers=2, set_timeout=5)
+    assert next(results).is_consistent is False
+
+    start = time.perf_counter()
+    results.close()
+    assert time.perf_counter() - start < 2
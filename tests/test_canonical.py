@@ -0,0 +1,132 @@
+"""Тесты канонической формы формул."""
+
+import io
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+from parser.canonical import (
+    MAX_CANONICAL_CLAUSES, canonical_form, canonical_hash, canonical_key, to_nnf,
+)
+from parser.ast_nodes import Implies, Not, Or, Var
+from parser.logic_parser import parse_formula
+
+
+@pytest.mark.parametrize("text", [
+    "a -> b",
+    "~a | b",
+    "(a -> b)",
+    "b | ~a",
+    "~b -> ~a",
+    "~~(a -> b)",
+    "(a -> b) & (a -> b)",
+])
+def test_equivalent_rewrites_share_form(text):
+    """Типичные переписывания правила дают одну каноническую строку."""
+    assert canonical_form(parse_formula(text)) == "~a | b"
+
+
+def test_form_is_order_independent():
+    """Порядок операндов и вложенность And/Or не влияют на форму."""
+    a = canonical_form(parse_formula("(c & a) -> (b | d)"))
+    b = canonical_form(parse_formula("a -> (c -> (d | b))"))
+    assert a == b == "~a | b | ~c | d"
+
+
+def test_form_is_parseable_and_idempotent():
+    """Каноническая строка разбирается и переходит сама в себя."""
+    for text in ["a <-> b", "(a | b) & ~(c & d)", "p(x) -> q(y) | r", "~(a -> b)"]:
+        form = canonical_form(parse_formula(text))
+        assert canonical_form(parse_formula(form)) == form
+
+
+def test_constants_tautologies_and_contradictions():
+    """Тавтологии сводятся к true, противоречия — к false."""
+    assert canonical_form(parse_formula("x & y -> x")) == "true"
+    assert canonical_form(parse_formula("a | ~a")) == "true"
+    assert canonical_form(parse_formula("a & ~a")) == "false"
+    assert canonical_form(parse_formula("false | false")) == "false"
+
+
+def test_subsumed_clauses_removed():
+    """Поглощённые клаузы не попадают в форму."""
+    assert canonical_form(parse_formula("a & (a | b)")) == "a"
+    assert canonical_form(parse_formula("(a | b) & (a | b | c) & d")) == "d & (a | b)"
+
+
+def test_non_equivalent_formulas_differ():
+    """Неэквивалентные формулы не склеиваются."""
+    forms = {canonical_form(parse_formula(t)) for t in ["a -> b", "b -> a", "a & b", "a | b"]}
+    assert len(forms) == 4
+
+
+def test_to_nnf_pushes_negations_to_atoms():
+    """В NNF нет импликаций, а отрицания стоят только у атомов."""
+    assert to_nnf(Not(Implies(Var("a"), Var("b")))) == parse_formula("a & ~b")
+    assert to_nnf(Not(Or(Var("a"), Not(Var("b"))))) == parse_formula("~a & b")
+
+
+def test_large_cnf_falls_back_to_sorted_nnf():
+    """При взрыве CNF ключом служит NNF с отсортированными операндами."""
+    n = 5
+    assert 2 ** (2 * n) > MAX_CANONICAL_CLAUSES
+    left = " | ".join(f"(x{i} & y{i})" for i in range(n))
+    right = " | ".join(f"(y{i} & x{i})" for i in reversed(range(n)))
+    a = canonical_form(parse_formula(left))
+    assert a == canonical_form(parse_formula(right))
+    assert canonical_form(parse_formula(a)) == a
+
+
+def test_hash_and_key():
+    """Хэш стабилен для эквивалентных записей, неразбираемый текст не падает."""
+    assert canonical_hash(parse_formula("a -> b")) == canonical_hash(parse_formula("~b -> ~a"))
+    assert len(canonical_hash(parse_formula("a"))) == 64
+    assert canonical_key("a -> b") == canonical_key("~a | b")
+    assert canonical_key("a ->  ->\tb") == "a -> -> b"
+
+
+def test_merge_skips_equivalent_rules(tmp_path, monkeypatch):
+    """merge_results не добавляет правило, эквивалентное уже имеющемуся."""
+    monkeypatch.syspath_prepend(str(Path(__file__).resolve().parent.parent / "extraction_output"))
+    from merge_results import cmd_merge
+
+    output = tmp_path / "accumulated.json"
+    output.write_text(json.dumps({
+        "metadata": {"total_processed": 0, "total_errors": 0},
+        "vocabulary": {},
+        "rules": [{"label": "r1", "formula": "a -> b", "sources": [], "is_baseline": True}],
+        "processed_files": {},
+    }), encoding="utf-8")
+    new_rules = [
+        {"label": "dup", "formula": "~b -> ~a"},
+        {"label": "new", "formula": "b -> a"},
+    ]
+    monkeypatch.setattr(sys, "stdin", io.StringIO(json.dumps({"new_rules": new_rules})))
+    cmd_merge(output, "cv.pdf")
+
+    rules = json.loads(output.read_text(encoding="utf-8"))["rules"]
+    assert [r["label"] for r in rules] == ["r1", "new"]
+    assert [r["canonical_key"] for r in rules] == ["~a | b", "a | ~b"]
+
+
+def test_rule_keys_stored_and_reused(monkeypatch):
+    """Ключи правил сохраняются в них и не пересчитываются при следующем слиянии."""
+    import parser.canonical as canonical
+
+    data = {"metadata": {}, "rules": [{"label": "r1", "formula": "a -> b"}]}
+    assert canonical.rule_keys(data) == {"~a | b"}
+    assert data["rules"][0]["canonical_key"] == "~a | b"
+    assert data["metadata"]["canonical_version"] == canonical.CANONICAL_VERSION
+
+    calls = []
+    monkeypatch.setattr(canonical, "canonical_key", lambda text: calls.append(text) or text)
+    data["rules"].append({"label": "r2", "formula": "c"})
+    assert canonical.rule_keys(data) == {"~a | b", "c"}
+    assert calls == ["c"]
+
+    # Ключи другой версии алгоритма пересчитываются
+    data["metadata"]["canonical_version"] = canonical.CANONICAL_VERSION - 1
+    canonical.rule_keys(data)
+    assert calls == ["c", "a -> b", "c"]
@@ -0,0 +1,107 @@
+"""Тесты пула чекеров для многопоточной проверки."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from parser.logic_parser import parse_formula
+from prover.checker_pool import CheckerPool
+from prover.z3_checker import Z3Checker
+
+RULES = [
+    ("rule_fast_bugs", parse_formula("fastChanges -> moreBugs")),
+    ("rule_stability_less", parse_formula("improvedStability -> lessChanges")),
+    ("rule_conflict", parse_formula("~(moreBugs & lessChanges)")),
+]
+
+CLAIM_SETS = [
+    [("claim_fast", parse_formula("fastChanges")),
+     ("claim_stable", parse_formula("improvedStability"))],
+    [("claim_fast", parse_formula("fastChanges"))],
+    [("claim_stable", parse_formula("improvedStability")),
+     ("claim_bugs", parse_formula("~moreBugs"))],
+]
+
+
+def test_pool_threads_match_serial_checker():
+    """Параллельные проверки через пул дают те же ответы, что один чекер."""
+    serial = Z3Checker(rules=RULES, native=False)
+    expected = [serial.check(claims) for claims in CLAIM_SETS]
+
+    with CheckerPool(RULES, size=4, native=False) as pool:
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(pool.check, CLAIM_SETS * 50))
+
+    for i, result in enumerate(results):
+        reference = expected[i % len(CLAIM_SETS)]
+        assert result.is_consistent == reference.is_consistent
+        assert set(result.unsat_core_labels) == set(reference.unsat_core_labels)
+
+
+def test_pool_never_exceeds_size():
+    """Одновременно выдаётся не больше size чекеров, у каждого свой контекст."""
+    pool = CheckerPool(RULES, size=2)
+    active = []
+    peak = 0
+    lock = threading.Lock()
+    barrier = threading.Barrier(2)
+
+    def work(_):
+        nonlocal peak
+        with pool.acquire() as checker:
+            with lock:
+                active.append(checker)
+                peak = max(peak, len(active))
+            try:
+                barrier.wait(timeout=0.2)
+            except threading.BrokenBarrierError:
+                pass
+            with lock:
+                active.remove(checker)
+        return checker.ctx
+
+    with ThreadPoolExecutor(6) as executor:
+        contexts = list(executor.map(work, range(12)))
+    assert peak == 2
+    assert len({id(c) for c in contexts}) <= 2
+    pool.close()
+
+
+def test_pool_recycles_worn_out_checkers():
+    """После max_uses проверок чекер закрывается и создаётся новый."""
+    pool = CheckerPool(RULES, size=1, max_uses=2)
+    with pool.acquire() as first:
+        pass
+    with pool.acquire() as again:
+        assert again is first
+    assert first.ctx is None
+    with pool.acquire() as fresh:
+        assert fresh is not first
+        assert fresh.check(CLAIM_SETS[0]).is_consistent is False
+    pool.close()
+    with pytest.raises(RuntimeError):
+        with pool.acquire():
+            pass
+
+
+def test_pool_soak_keeps_context_count_bounded():
+    """Много проверок с пересозданием: живых контекстов не больше size."""
+    import gc
+    import z3
+
+    def live_contexts():
+        gc.collect()
+        return sum(1 for o in gc.get_objects() if isinstance(o, z3.Context))
+
+    before = live_contexts()
+    pool = CheckerPool(RULES, size=3, max_uses=25, native=False)
+    claim_sets = [
+        [(f"claim_{i}_{j}", formula) for j, (_, formula) in enumerate(claims)]
+        for i, claims in enumerate(CLAIM_SETS * 200)
+    ]
+    with ThreadPoolExecutor(3) as executor:
+        for _ in executor.map(pool.check, claim_sets):
+            pass
+    assert live_contexts() - before <= 3
+    pool.close()
+    assert live_contexts() == before
@@ -0,0 +1,142 @@
+"""Тесты извлечения длинного резюме по фрагментам."""
+
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+from conftest import llm_response
+from llm.chunking import merge_extractions, split_sections
+
+RESUME = """Иванов Иван
+Backend-разработчик
+
+Опыт работы
+Январь 2019 — настоящее время
+ООО «Ромашка», Senior Python Developer
+Разработка платёжного сервиса.
+Март 2016 — Декабрь 2018
+ООО «Лютик», Python Developer
+Поддержка CRM.
+
+Образование
+2012 — 2016
+МГУ, факультет ВМК
+"""
+
+
+def test_split_short_text_single_chunk():
+    """Текст короче предела — один фрагмент, пустой — ни одного."""
+    assert split_sections(RESUME, 10_000) == [RESUME]
+    assert split_sections("  \n", 10) == []
+
+
+def test_split_at_sections_and_jobs():
+    """Границы — заголовки разделов и строки с диапазоном дат."""
+    chunks = split_sections(RESUME, 120)
+    assert all(len(c) <= 120 for c in chunks)
+    assert chunks[0].startswith("Иванов Иван")
+    assert any(c.startswith("Январь 2019 — настоящее время") for c in chunks)
+    assert any(c.startswith("Март 2016 — Декабрь 2018") for c in chunks)
+    assert any("Образование" in c and "МГУ" in c for c in chunks)
+    # Ни одна непустая строка не потеряна
+    lines = [line for line in RESUME.splitlines() if line.strip()]
+    assert [line for c in chunks for line in c.splitlines() if line.strip()] == lines
+
+
+def test_split_oversized_section():
+    """Раздел длиннее предела делится по абзацам и строкам."""
+    text = "Проекты\n" + "\n".join(f"Проект {i}: описание проекта" for i in range(40))
+    chunks = split_sections(text, 200)
+    assert len(chunks) > 1
+    assert all(len(c) <= 200 for c in chunks)
+
+
+def test_merge_dedups_and_renumbers():
+    """Эквивалентные формулы остаются один раз, метки идут подряд."""
+    merged = merge_extractions([
+        {"claims": [
+            {"label": "claim_1", "formula": "a & b", "original_text": "1"},
+            {"label": "claim_2", "formula": "c", "original_text": "2"},
+        ], "predicates_used": {"a": "первое", "b": "b"}},
+        {"claims": [
+            {"label": "claim_1", "formula": "b & a", "original_text": "3"},
+            {"label": "claim_2", "formula": "~c", "original_text": "4"},
+        ], "predicates_used": {"a": "второе", "c": "c"}},
+    ])
+    assert [(c["label"], c["original_text"]) for c in merged["claims"]] == [
+        ("claim_1", "1"), ("claim_2", "2"), ("claim_3", "4"),
+    ]
+    assert merged["predicates_used"] == {"a": "первое", "b": "b", "c": "c"}
+
+
+@patch("llm.client.OpenAI")
+def test_chunked_extraction_parallel(mock_openai_cls):
+    """Фрагменты извлекаются одновременно и сливаются в один ответ."""
+    lock = threading.Lock()
+    state = {"in_flight": 0, "max": 0}
+
+    def create(**kwargs):
+        user = kwargs["messages"][1]["content"]
+        with lock:
+            state["in_flight"] += 1
+            state["max"] = max(state["max"], state["in_flight"])
+        time.sleep(0.05)
+        with lock:
+            state["in_flight"] -= 1
+        part = user.split("(")[1].split(" ")[0]
+        return llm_response({"claims": [
+            {"label": "claim_1", "formula": f"p{part}", "original_text": user[:20]},
+            {"label": "claim_2", "formula": "common", "original_text": "общее"},
+        ], "predicates_used": {}})
+
+    mock_openai_cls.return_value.chat.completions.create.side_effect = create
+
+    from llm.extractor import extract_predicates_chunked
+
+    n = len(split_sections(RESUME, 120))
+    result = extract_predicates_chunked(RESUME, max_chars=120, workers=n)
+    assert state["max"] > 1
+    formulas = [c["formula"] for c in result["claims"]]
+    assert formulas == ["p1", "common"] + [f"p{i}" for i in range(2, n + 1)]
+    assert [c["label"] for c in result["claims"]] == [
+        f"claim_{i}" for i in range(1, n + 2)
+    ]
+
+
+@patch("llm.client.OpenAI")
+def test_chunked_short_resume_single_request(mock_openai_cls):
+    """Короткое резюме — один обычный запрос без пометки фрагмента."""
+    create = mock_openai_cls.return_value.chat.completions.create
+    create.return_value = llm_response({"claims": [], "predicates_used": {}})
+
+    from llm.extractor import extract_predicates_chunked
+
+    extract_predicates_chunked(RESUME, max_chars=10_000)
+    assert create.call_count == 1
+    assert create.call_args.kwargs["messages"][1]["content"].startswith("Текст резюме:")
+
+
+@patch("llm.client.AsyncOpenAI")
+def test_async_chunked_extraction(mock_openai_cls):
+    """Асинхронный вариант соблюдает предел одновременных запросов."""
+    state = {"in_flight": 0, "max": 0}
+
+    async def create(**kwargs):
+        state["in_flight"] += 1
+        state["max"] = max(state["max"], state["in_flight"])
+        await asyncio.sleep(0.02)
+        state["in_flight"] -= 1
+        part = kwargs["messages"][1]["content"].split("(")[1].split(" ")[0]
+        return llm_response({"claims": [
+            {"label": "claim_1", "formula": f"p{part}", "original_text": "t"},
+        ], "predicates_used": {}})
+
+    mock_openai_cls.return_value.chat.completions.create = create
+
+    from llm.extractor import aextract_predicates_chunked
+
+    result = asyncio.run(aextract_predicates_chunked(RESUME, max_chars=120, workers=2))
+    n = len(split_sections(RESUME, 120))
+    assert state["max"] == 2
+    assert [c["formula"] for c in result["claims"]] == [f"p{i}" for i in range(1, n + 1)]
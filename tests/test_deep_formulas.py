@@ -0,0 +1,54 @@
+"""Стресс-тесты: формулы глубиной больше recursion limit."""
+
+import sys
+
+import z3
+
+from parser.logic_parser import parse_formula
+from parser.ast_nodes import And, Var, atoms, render
+from prover.z3_checker import Z3Checker
+
+DEPTH = 10_000
+
+
+def _left_deep_and(n: int):
+    """a0 & a1 & ... в виде лево-глубокого бинарного дерева."""
+    formula = Var("a0")
+    for i in range(1, n):
+        formula = And(formula, Var(f"a{i}"))
+    return formula
+
+
+def test_depth_exceeds_recursion_limit():
+    """Тестовые формулы действительно глубже recursion limit."""
+    assert DEPTH > sys.getrecursionlimit()
+
+
+def test_render_and_atoms_deep_chain():
+    """str() и сбор переменных работают на глубокой цепочке."""
+    formula = _left_deep_and(DEPTH)
+    text = str(formula)
+    assert text.startswith("(" * (DEPTH - 1) + "a0 & a1)")
+    assert render(formula) == text
+    assert len(atoms(formula)) == DEPTH
+
+
+def test_parse_deep_implication_chain():
+    """Правоассоциативная цепочка импликаций парсится и печатается."""
+    text = " -> ".join(f"v{i}" for i in range(DEPTH))
+    formula = parse_formula(text)
+    assert str(formula).endswith(f"(v{DEPTH - 2} -> v{DEPTH - 1})" + ")" * (DEPTH - 2))
+
+
+def test_to_z3_and_check_deep_formula():
+    """Z3-конвертация и проверка не падают на глубокой формуле."""
+    checker = Z3Checker()
+    formula = _left_deep_and(DEPTH)
+    assert z3.is_and(checker.to_z3(formula))
+
+    result = checker.check([
+        ("deep", formula),
+        ("neg", parse_formula(f"~a{DEPTH - 1}")),
+    ])
+    assert result.is_consistent is False
+    assert set(result.unsat_core_labels) == {"deep", "neg"}
@@ -0,0 +1,139 @@
+"""Тесты дискового кэша ответов LLM."""
+
+import json
+import os
+import stat
+from unittest.mock import patch
+
+import pytest
+
+from conftest import llm_response
+from llm import cache as llm_cache
+from llm import client as llm_client
+from llm.cache import CACHE_OFF, CACHE_REFRESH, LLMCache, cache_key
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = LLMCache(str(tmp_path / "llm.sqlite"))
+    monkeypatch.setattr(llm_client, "get_cache", lambda: store)
+    llm_client.close_client()
+    yield store
+    store.close()
+    llm_client.close_client()
+
+
+def test_key_depends_on_every_input():
+    """Ключ меняется от модели, температуры, промпта и сообщения."""
+    base = cache_key("m", 0.1, "sys", "msg")
+    assert base == cache_key("m", 0.1, "sys", "msg")
+    others = {
+        cache_key("m2", 0.1, "sys", "msg"),
+        cache_key("m", 0.2, "sys", "msg"),
+        cache_key("m", 0.1, "sys2", "msg"),
+        cache_key("m", 0.1, "sys", "msg2"),
+    }
+    assert base not in others and len(others) == 4
+
+
+def test_get_put_and_counters(store):
+    assert store.get("k") is None
+    store.put("k", '{"a": 1}')
+    assert store.get("k") == '{"a": 1}'
+    stats = store.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_files_private_to_owner(tmp_path):
+    """База и её WAL доступны только владельцу независимо от umask."""
+    old = os.umask(0o022)
+    try:
+        store = LLMCache(str(tmp_path / "cache" / "llm.sqlite"))
+        store.put("k", '{"original_text": "Иванов"}')
+        assert stat.S_IMODE(os.stat(tmp_path / "cache").st_mode) == 0o700
+        for name in ("llm.sqlite", "llm.sqlite-wal", "llm.sqlite-shm"):
+            assert stat.S_IMODE(os.stat(tmp_path / "cache" / name).st_mode) == 0o600
+        store.close()
+    finally:
+        os.umask(old)
+
+
+def test_age_eviction(tmp_path, monkeypatch):
+    """Запись старше max_age — промах, и она удаляется."""
+    store = LLMCache(str(tmp_path / "llm.sqlite"), max_age=60)
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    store.put("k", "v")
+    now[0] += 30
+    assert store.get("k") == "v"
+    now[0] += 60
+    assert store.get("k") is None
+    assert store.stats()["entries"] == 0
+    store.close()
+
+
+def test_size_eviction_keeps_recently_read(tmp_path, monkeypatch):
+    """При превышении предела уходят записи, которые дольше не читались."""
+    store = LLMCache(str(tmp_path / "llm.sqlite"), max_bytes=25)
+    now = [0.0]
+
+    def tick():
+        now[0] += 1
+        return now[0]
+
+    monkeypatch.setattr(llm_cache.time, "time", tick)
+    store.put("a", "x" * 10)
+    store.put("b", "x" * 10)
+    store.get("a")
+    store.put("c", "x" * 10)
+    assert store.get("b") is None
+    assert store.get("a") is not None and store.get("c") is not None
+    assert store.stats()["evictions"] == 1
+    store.close()
+
+
+def test_persists_across_instances(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+    first = LLMCache(path)
+    first.put("k", "v")
+    first.close()
+    second = LLMCache(path)
+    assert second.get("k") == "v"
+    second.close()
+
+
+@patch("llm.client.OpenAI")
+def test_call_json_uses_cache(mock_openai_cls, store):
+    """Повторный запрос не идёт в API; --refresh перезаписывает, --no-cache не трогает."""
+    create = mock_openai_cls.return_value.chat.completions.create
+    create.return_value = llm_response(json.dumps({"v": 1}))
+    assert llm_client.call_json("extract", "sys", "msg", temperature=0.1) == {"v": 1}
+    assert llm_client.call_json("extract", "sys", "msg", temperature=0.1) == {"v": 1}
+    assert create.call_count == 1
+
+    create.return_value = llm_response(json.dumps({"v": 2}))
+    assert llm_client.call_json("extract", "sys", "msg", 0.1, cache=CACHE_REFRESH) == {"v": 2}
+    assert llm_client.call_json("extract", "sys", "msg", temperature=0.1) == {"v": 2}
+    assert create.call_count == 2
+
+    create.return_value = llm_response(json.dumps({"v": 3}))
+    assert llm_client.call_json("extract", "sys", "msg", 0.1, cache=CACHE_OFF) == {"v": 3}
+    assert llm_client.call_json("extract", "sys", "msg", temperature=0.1) == {"v": 2}
+    assert create.call_count == 3
+
+
+@patch("llm.client.OpenAI")
+def test_invalid_response_not_cached(mock_openai_cls, store):
+    """Ответ, не прошедший проверку стадии, в кэш не попадает."""
+    from llm.extractor import extract_predicates
+
+    create = mock_openai_cls.return_value.chat.completions.create
+    create.return_value = llm_response(json.dumps({"predicates_used": {}}))
+    with pytest.raises(ValueError, match="claims"):
+        extract_predicates("resume")
+    assert store.stats()["entries"] == 0
+
+    create.return_value = llm_response(json.dumps({"claims": []}))
+    assert extract_predicates("resume")["claims"] == []
+    assert extract_predicates("resume")["claims"] == []
+    assert create.call_count == 2
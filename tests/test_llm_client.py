@@ -0,0 +1,88 @@
+"""Тесты общего LLM-клиента: переиспользование, повторы, метрики."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import openai
+import pytest
+
+from conftest import llm_response
+from llm import client as llm_client
+
+
+@pytest.fixture(autouse=True)
+def _no_backoff(monkeypatch):
+    monkeypatch.setattr(llm_client.time, "sleep", lambda _: None)
+
+
+def _status_error(cls, status, headers=None):
+    response = MagicMock(status_code=status, headers=headers or {})
+    return cls(f"HTTP {status}", response=response, body=None)
+
+
+@patch("llm.client.OpenAI")
+def test_client_is_shared(mock_openai_cls):
+    """Один клиент на процесс; повторы SDK выключены — их делает call_json."""
+    mock_openai_cls.return_value.chat.completions.create.return_value = llm_response("{}")
+    llm_client.call_json("extract", "sys", "msg", temperature=0.1)
+    llm_client.call_json("analyze", "sys", "msg", temperature=0.2)
+    assert mock_openai_cls.call_count == 1
+    assert mock_openai_cls.call_args.kwargs["max_retries"] == 0
+
+    llm_client.close_client()
+    mock_openai_cls.return_value.close.assert_called_once()
+    llm_client.get_client()
+    assert mock_openai_cls.call_count == 2
+
+
+@patch("llm.client.OpenAI")
+def test_retries_rate_limit_and_server_errors(mock_openai_cls):
+    """429 и 5xx повторяются, метрики считают повторы и токены."""
+    create = mock_openai_cls.return_value.chat.completions.create
+    create.side_effect = [
+        _status_error(openai.RateLimitError, 429, {"retry-after": "2"}),
+        _status_error(openai.InternalServerError, 503),
+        llm_response(json.dumps({"claims": []}), prompt_tokens=100, completion_tokens=20),
+    ]
+    assert llm_client.call_json("extract", "sys", "msg", temperature=0.1) == {"claims": []}
+    assert create.call_count == 3
+
+    stats = llm_client.llm_metrics()["extract"]
+    assert stats["calls"] == 1
+    assert stats["retries"] == 2
+    assert stats["errors"] == 0
+    assert stats["prompt_tokens"] == 100
+    assert stats["completion_tokens"] == 20
+
+
+@patch("llm.client.OpenAI")
+def test_client_errors_not_retried(mock_openai_cls):
+    """4xx, кроме 429, не повторяется и учитывается как ошибка."""
+    create = mock_openai_cls.return_value.chat.completions.create
+    create.side_effect = _status_error(openai.BadRequestError, 400)
+    with pytest.raises(openai.BadRequestError):
+        llm_client.call_json("analyze", "sys", "msg", temperature=0.2)
+    assert create.call_count == 1
+    assert llm_client.llm_metrics()["analyze"]["errors"] == 1
+
+
+@patch("llm.client.OpenAI")
+def test_retries_exhausted(mock_openai_cls, monkeypatch):
+    """После LLM_MAX_RETRIES повторов ошибка пробрасывается."""
+    monkeypatch.setattr(llm_client, "LLM_MAX_RETRIES", 2)
+    create = mock_openai_cls.return_value.chat.completions.create
+    create.side_effect = _status_error(openai.InternalServerError, 500)
+    with pytest.raises(openai.InternalServerError):
+        llm_client.call_json("extract", "sys", "msg", temperature=0.1)
+    assert create.call_count == 3
+    assert llm_client.llm_metrics()["extract"]["retries"] == 2
+
+
+def test_backoff():
+    """Retry-After важнее экспоненты; пауза ограничена MAX_BACKOFF."""
+    error = _status_error(openai.RateLimitError, 429, {"retry-after": "3"})
+    assert llm_client._backoff(0, error) == 3.0
+    error = _status_error(openai.InternalServerError, 500)
+    base = llm_client.LLM_RETRY_BACKOFF
+    assert base * 2 ** 2 * 0.5 <= llm_client._backoff(2, error) <= base * 2 ** 2
+    assert llm_client._backoff(20, error) == llm_client.MAX_BACKOFF
@@ -5,30 +5,15 @@ from unittest.mock import patch, MagicMock
 
 import pytest
 
+from conftest import llm_response
 from prover.z3_checker import CheckResult
 
 
-# ---------------------------------------------------------------------------
-# Helpers
-# ---------------------------------------------------------------------------
-def _mock_openai_response(content: str | None):
-    """Создаёт mock-объект ответа OpenAI."""
-    message = MagicMock()
-    message.content = content
-
-    choice = MagicMock()
-    choice.message = message
-
-    response = MagicMock()
-    response.choices = [choice]
-    return response
-
-
 # ---------------------------------------------------------------------------
 # extractor tests
 # ---------------------------------------------------------------------------
 class TestExtractor:
-    @patch("llm.extractor.OpenAI")
+    @patch("llm.client.OpenAI")
     def test_extract_success(self, mock_openai_cls):
         from llm.extractor import extract_predicates
 
@@ -39,7 +24,7 @@ class TestExtractor:
             "predicates_used": {"fastChanges": "desc"},
         }
         client = MagicMock()
-        client.chat.completions.create.return_value = _mock_openai_response(
+        client.chat.completions.create.return_value = llm_response(
             json.dumps(result_data)
         )
         mock_openai_cls.return_value = client
@@ -47,23 +32,23 @@ class TestExtractor:
         result = extract_predicates("some resume")
         assert result["claims"] == result_data["claims"]
 
-    @patch("llm.extractor.OpenAI")
+    @patch("llm.client.OpenAI")
     def test_extract_none_content(self, mock_openai_cls):
         from llm.extractor import extract_predicates
 
         client = MagicMock()
-        client.chat.completions.create.return_value = _mock_openai_response(None)
+        client.chat.completions.create.return_value = llm_response(None)
         mock_openai_cls.return_value = client
 
         with pytest.raises(ValueError, match="empty content"):
             extract_predicates("some resume")
 
-    @patch("llm.extractor.OpenAI")
+    @patch("llm.client.OpenAI")
     def test_extract_invalid_json(self, mock_openai_cls):
         from llm.extractor import extract_predicates
 
         client = MagicMock()
-        client.chat.completions.create.return_value = _mock_openai_response(
+        client.chat.completions.create.return_value = llm_response(
             "not json at all"
         )
         mock_openai_cls.return_value = client
@@ -71,12 +56,12 @@ class TestExtractor:
         with pytest.raises(json.JSONDecodeError):
             extract_predicates("some resume")
 
-    @patch("llm.extractor.OpenAI")
+    @patch("llm.client.OpenAI")
     def test_extract_missing_claims_key(self, mock_openai_cls):
         from llm.extractor import extract_predicates
 
         client = MagicMock()
-        client.chat.completions.create.return_value = _mock_openai_response(
+        client.chat.completions.create.return_value = llm_response(
             json.dumps({"predicates_used": {}})
         )
         mock_openai_cls.return_value = client
@@ -97,7 +82,15 @@ class TestAnalyzer:
         assert analysis["contradictions"] == []
         assert "Противоречий не найдено" in analysis["overall_assessment"]
 
-    @patch("llm.analyzer.OpenAI")
+    def test_unknown_no_llm_call(self):
+        from llm.analyzer import analyze_contradictions
+
+        result = CheckResult(is_consistent=None, reason_unknown="timeout")
+        analysis = analyze_contradictions(result, [], [])
+        assert analysis["contradictions"] == []
+        assert "timeout" in analysis["overall_assessment"]
+
+    @patch("llm.client.OpenAI")
     def test_analyze_success(self, mock_openai_cls):
         from llm.analyzer import analyze_contradictions
 
@@ -106,7 +99,7 @@ class TestAnalyzer:
             "overall_assessment": "Found issues",
         }
         client = MagicMock()
-        client.chat.completions.create.return_value = _mock_openai_response(
+        client.chat.completions.create.return_value = llm_response(
             json.dumps(analysis_data)
         )
         mock_openai_cls.return_value = client
@@ -118,12 +111,12 @@ class TestAnalyzer:
         result = analyze_contradictions(check_result, claims, [])
         assert result["contradictions"] == analysis_data["contradictions"]
 
-    @patch("llm.analyzer.OpenAI")
+    @patch("llm.client.OpenAI")
     def test_analyze_none_content(self, mock_openai_cls):
         from llm.analyzer import analyze_contradictions
 
         client = MagicMock()
-        client.chat.completions.create.return_value = _mock_openai_response(None)
+        client.chat.completions.create.return_value = llm_response(None)
         mock_openai_cls.return_value = client
 
         check_result = CheckResult(
@@ -132,12 +125,12 @@ class TestAnalyzer:
         with pytest.raises(ValueError, match="empty content"):
             analyze_contradictions(check_result, [], [])
 
-    @patch("llm.analyzer.OpenAI")
+    @patch("llm.client.OpenAI")
     def test_analyze_missing_keys(self, mock_openai_cls):
         from llm.analyzer import analyze_contradictions
 
         client = MagicMock()
-        client.chat.completions.create.return_value = _mock_openai_response(
+        client.chat.completions.create.return_value = llm_response(
             json.dumps({"contradictions": []})
         )
         mock_openai_cls.return_value = client
@@ -147,3 +140,20 @@ class TestAnalyzer:
         )
         with pytest.raises(ValueError, match="overall_assessment"):
             analyze_contradictions(check_result, [], [])
+
+    def test_analysis_message_lists_every_core(self):
+        from llm.analyzer import _build_analysis_message
+
+        claims = [
+            {"label": "claim_1", "formula": "a", "original_text": "t1"},
+            {"label": "claim_2", "formula": "~a", "original_text": "t2"},
+            {"label": "claim_3", "formula": "b", "original_text": "t3"},
+        ]
+        rules = [("rule_1", "b -> c"), ("rule_2", "~c")]
+        cores = [["claim_1", "claim_2"], ["rule_1", "rule_2", "claim_3"]]
+        message = _build_analysis_message(
+            {"claim_1", "claim_2", "claim_3", "rule_1", "rule_2"}, claims, rules, cores
+        )
+        assert "1: claim_1, claim_2" in message
+        assert "2: rule_1, rule_2, claim_3" in message
+        assert "rule_2: ~c" in message
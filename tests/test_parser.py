@@ -1,7 +1,14 @@
 """Юнит-тесты для парсера логических формул."""
 
+import os
+import stat
+
 import pytest
-from parser.logic_parser import parse_formula
+from parser.logic_parser import (
+    parse_formula, parse_formula_earley, lalr_cache_path, grammar_hash,
+    parse_formulas, parse_cache_info, clear_parse_cache, set_parse_cache_size,
+    DEFAULT_PARSE_CACHE_SIZE,
+)
 from parser.ast_nodes import Var, Pred, Not, And, Or, Implies, Bicond, Const
 
 
@@ -104,7 +111,7 @@ def test_domain_rule_sdui():
     result = parse_formula("sdui -> (compatibility & rollback & monitoring)")
     expected = Implies(
         Var("sdui"),
-        And(And(Var("compatibility"), Var("rollback")), Var("monitoring"))
+        And(Var("compatibility"), Var("rollback"), Var("monitoring"))
     )
     assert result == expected
 
@@ -113,3 +120,133 @@ def test_invalid_formula():
     """Невалидная формула вызывает исключение."""
     with pytest.raises(Exception):
         parse_formula("-> ->")
+
+
+def test_invalid_formula_not_reparsed_by_earley(monkeypatch):
+    """Ошибка LALR пробрасывается сразу, без повторного разбора Earley."""
+    import parser.logic_parser as logic_parser
+    from lark.exceptions import UnexpectedInput
+
+    def fail(text):
+        raise AssertionError("Earley не должен вызываться")
+
+    monkeypatch.setattr(logic_parser, "parse_formula_earley", fail)
+    with pytest.raises(UnexpectedInput):
+        parse_formula("a & & b")
+
+
+@pytest.mark.parametrize("text", [
+    "fastChanges",
+    "~(moreBugs & lessChanges)",
+    "sdui -> (compatibility & rollback & monitoring)",
+    "a -> b -> c",
+    "a <-> b <-> c",
+    'reducedCycle("5d", "1h") | ~crashFreeRate(high, 99.6)',
+    "~~a & true | false",
+])
+def test_lalr_matches_earley(text):
+    """LALR(1) и Earley строят одинаковый AST."""
+    assert parse_formula(text) == parse_formula_earley(text)
+
+
+def test_lalr_cache_file_written():
+    """Сериализованный LALR-парсер лежит на диске под хэшем грамматики."""
+    path = lalr_cache_path()
+    assert grammar_hash()[:16] in path
+    assert os.path.exists(path)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_lalr_cache_of_other_user_not_loaded(monkeypatch, tmp_path):
+    """Каталог кэша закрыт от других; чужой файл кэша не распаковывается."""
+    from parser import logic_parser
+
+    monkeypatch.setattr(logic_parser, "_CACHE_DIR", str(tmp_path / "lark"))
+    assert logic_parser._build_lalr_parser() is not None
+    assert stat.S_IMODE(os.stat(tmp_path / "lark").st_mode) == 0o700
+    assert logic_parser._lalr_cache_file() == lalr_cache_path()
+    monkeypatch.setattr(os, "geteuid", lambda: os.stat(lalr_cache_path()).st_uid + 1)
+    assert logic_parser._lalr_cache_file() is None
+
+
+def test_parse_formulas_cache_hits():
+    """Повторные формулы в пакете берутся из кэша и дают тот же объект."""
+    clear_parse_cache()
+    first, second, third = parse_formulas(["a -> b", "c", "a -> b"])
+    assert first is third
+    assert second == Var("c")
+    info = parse_cache_info()
+    assert info.misses == 2
+    assert info.hits == 1
+
+
+def test_parse_formulas_return_exceptions():
+    """С return_exceptions=True ошибка кладётся на место формулы."""
+    results = parse_formulas(["a", "-> ->"], return_exceptions=True)
+    assert results[0] == Var("a")
+    assert isinstance(results[1], Exception)
+    with pytest.raises(Exception):
+        parse_formulas(["a", "-> ->"])
+
+
+def test_parse_cache_size_limit():
+    """Кэш не растёт сверх лимита; clear сбрасывает содержимое."""
+    set_parse_cache_size(2)
+    try:
+        parse_formulas(["a", "b", "c", "d"])
+        assert parse_cache_info().currsize == 2
+        clear_parse_cache()
+        assert parse_cache_info().currsize == 0
+    finally:
+        set_parse_cache_size(DEFAULT_PARSE_CACHE_SIZE)
+
+
+def test_structurally_equal_nodes_are_interned():
+    """Структурно равные узлы — один и тот же объект."""
+    first = parse_formula("~(moreBugs & lessChanges)")
+    second = parse_formula("~(moreBugs&lessChanges)")
+    assert first is second
+    assert first.operand.operands[0] is Var("moreBugs")
+    assert hash(first) == hash(Not(And(Var("moreBugs"), Var("lessChanges"))))
+
+
+def test_unreferenced_nodes_leave_intern_table():
+    """Узлы без внешних ссылок не удерживаются таблицей интернирования."""
+    import gc
+
+    from parser.ast_nodes import interned_count
+
+    clear_parse_cache()
+    gc.collect()
+    before = interned_count()
+    formulas = [parse_formula(f'metric("{i}") & ~other{i}') for i in range(500)]
+    assert interned_count() >= before + 500 * 4
+    kept = formulas[0]
+    del formulas
+    gc.collect()
+    assert interned_count() <= before + 4
+    assert parse_formula('metric("0") & ~other0') is kept
+
+
+def test_nodes_are_immutable_and_pickle_to_same_object():
+    """Узлы неизменяемы; pickle возвращает интернированный узел."""
+    import pickle
+
+    node = And(Var("a"), Pred("p", ("x",)))
+    with pytest.raises(AttributeError):
+        node.operands = (Var("b"),)
+    assert pickle.loads(pickle.dumps(node)) is node
+
+
+def test_conjunction_chain_is_flattened():
+    """Цепочка & (в т.ч. со скобками) даёт один n-арный узел."""
+    expected = And(Var("a"), Var("b"), Var("c"), Var("d"))
+    assert parse_formula("a & b & c & d") is expected
+    assert parse_formula("(a & b) & (c & d)") is expected
+    assert str(expected) == "(a & b & c & d)"
+
+
+def test_disjunction_chain_is_flattened():
+    """Цепочка | сливается, но конъюнкции внутри остаются операндами."""
+    result = parse_formula("a | b & c | (d | e)")
+    assert result == Or(Var("a"), And(Var("b"), Var("c")), Var("d"), Var("e"))
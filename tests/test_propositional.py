@@ -0,0 +1,107 @@
+"""Тесты нативного Horn/2-SAT движка."""
+
+import random
+
+import pytest
+
+from domain.rules import DOMAIN_RULES
+from parser.logic_parser import parse_formula
+from prover import propositional
+from prover.z3_checker import Z3Checker
+
+
+def _clauses(text: str):
+    return propositional.clausify(parse_formula(text))
+
+
+def test_clausify_typical_rules():
+    """Импликации и исключения дают короткие клаузы."""
+    assert _clauses("a -> b") == [frozenset({("a", False), ("b", True)})]
+    assert _clauses("~(a & b)") == [frozenset({("a", False), ("b", False)})]
+    assert len(_clauses("sdui -> (compatibility & rollback & monitoring)")) == 3
+    assert _clauses("a | ~a") == []
+    assert _clauses("false") == [frozenset()]
+
+
+def test_classify():
+    """Horn, 2-SAT и остальное различаются по форме клауз."""
+    assert propositional.classify(_clauses("a & ~b -> c")) is None
+    assert propositional.classify(_clauses("a & b -> c")) == "horn"
+    assert propositional.classify(_clauses("a | b")) == "2sat"
+    assert propositional.classify(_clauses("a | b | c")) is None
+
+
+def test_domain_rules_are_horn():
+    """Базовые доменные правила решаются нативно."""
+    checker = Z3Checker(rules=[(l, parse_formula(f)) for l, f in DOMAIN_RULES])
+    result = checker.check([
+        ("claim_1", parse_formula("fastChanges")),
+        ("claim_2", parse_formula("qualityArch")),
+    ])
+    assert result.engine == "horn"
+    assert result.is_consistent is False
+    assert set(result.unsat_core_labels) == {
+        "claim_1", "claim_2", "rule_fast_shortcut",
+        "rule_quality_design", "rule_shortcut_thorough_conflict",
+    }
+
+
+def test_2sat_core():
+    """Ядро 2-SAT — метки клауз на циклах x -> ~x -> x."""
+    checker = Z3Checker()
+    result = checker.check([
+        ("f1", parse_formula("a | b")),
+        ("f2", parse_formula("a | ~b")),
+        ("f3", parse_formula("~a | c")),
+        ("f4", parse_formula("~a | ~c")),
+        ("f5", parse_formula("x | y")),
+    ])
+    assert result.engine == "2sat"
+    assert result.is_consistent is False
+    assert set(result.unsat_core_labels) == {"f1", "f2", "f3", "f4"}
+
+
+def test_non_native_falls_through_to_z3():
+    """Клаузы вне Horn/2-SAT решает Z3."""
+    checker = Z3Checker(rules=[("r", parse_formula("a & ~b -> c"))])
+    result = checker.check([("c1", parse_formula("a | b | c"))])
+    assert result.engine == "z3"
+
+
+def _random_formula(rng: random.Random, kind: str) -> str:
+    names = [f"v{i}" for i in range(6)]
+    if kind == "horn":
+        body = " & ".join(rng.sample(names, rng.randint(0, 2)))
+        head = rng.choice(names + ["false"])
+        return f"{body} -> {head}" if body else head
+    a, b = rng.sample(names, 2)
+    return f"{rng.choice(['', '~'])}{a} | {rng.choice(['', '~'])}{b}"
+
+
+@pytest.mark.parametrize("kind", ["horn", "2sat"])
+def test_native_agrees_with_z3(kind):
+    """На случайных наборах нативный ответ совпадает с Z3, а ядро противоречиво."""
+    rng = random.Random(42)
+    native = Z3Checker()
+    reference = Z3Checker(native=False)
+    engines = set()
+    for _ in range(200):
+        formulas = [
+            (f"f{i}", parse_formula(_random_formula(rng, kind)))
+            for i in range(rng.randint(1, 10))
+        ]
+        got = native.check(formulas)
+        expected = reference.check(formulas)
+        engines.add(got.engine)
+        assert got.is_consistent == expected.is_consistent
+        if not got.is_consistent:
+            core = [(l, f) for l, f in formulas if l in got.unsat_core_labels]
+            assert reference.check(core).is_consistent is False
+        else:
+            # Модель нативного движка действительно удовлетворяет набору
+            fixed = [
+                (f"m_{n}", parse_formula(n if v else f"~{n}")) for n, v in got.model.items()
+            ]
+            assert reference.check(formulas + fixed).is_consistent is True
+    assert kind in engines
+    assert "z3" not in engines
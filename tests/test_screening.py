@@ -0,0 +1,92 @@
+"""Тесты векторизованного отсева наборов утверждений."""
+
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from parser.logic_parser import parse_formula
+from prover.screening import RuleScreen, screen_and_check
+from prover.z3_checker import SAT, UNKNOWN, UNSAT, Z3Checker
+
+RULES = [
+    ("rule1", parse_formula("a -> b")),
+    ("rule2", parse_formula("b -> ~c")),
+    ("rule3", parse_formula("a & d -> e")),
+    ("rule4", parse_formula("e -> f | g")),
+]
+
+
+def _claims(*texts):
+    return [(f"claim_{i + 1}", parse_formula(t)) for i, t in enumerate(texts)]
+
+
+def test_screen_statuses():
+    """Противоречие через цепочку правил — UNSAT, совместный набор — SAT."""
+    screen = RuleScreen(RULES)
+    statuses = screen.screen([
+        _claims("a", "c"),
+        _claims("a", "d", "~e"),
+        _claims("a", "d", "f"),
+        _claims("~b", "c", "x"),
+        _claims("a & d", "g"),
+    ])
+    assert statuses == [UNSAT, UNSAT, SAT, SAT, SAT]
+
+
+def test_screen_leaves_hard_sets_to_solver():
+    """Нелитеральные утверждения и непереводимые в клаузы правила — UNKNOWN."""
+    screen = RuleScreen(RULES)
+    assert screen.screen([_claims("a | c"), _claims("a -> c")]) == [UNKNOWN, UNKNOWN]
+
+    # CNF правила больше MAX_CLAUSES_PER_FORMULA — правило не клаузифицируется
+    big = " | ".join(f"(x{i} & y{i})" for i in range(8))
+    rules = RULES + [("rule5", parse_formula(f"h -> ({big})"))]
+    screen = RuleScreen(rules)
+    assert screen.screen([_claims("h"), _claims("a")]) == [UNKNOWN, SAT]
+
+
+def test_screen_inconsistent_rules():
+    """Противоречивая база правил ничего не решает отсевом."""
+    screen = RuleScreen([("r1", parse_formula("a")), ("r2", parse_formula("~a"))])
+    assert screen.screen([_claims("b")]) == [UNKNOWN]
+    assert screen.screen([]) == []
+
+
+def test_screen_agrees_with_z3():
+    """На случайных наборах решённые отсевом статусы совпадают с Z3Checker."""
+    rng = random.Random(5)
+    names = list("abcdefgxy")
+    rules = [
+        (f"rule{i}", parse_formula(
+            " & ".join(rng.sample(names, rng.randint(1, 2)))
+            + " -> " + ("~" if rng.random() < 0.3 else "") + rng.choice(names)
+            + (" | " + rng.choice(names) if rng.random() < 0.3 else "")
+        ))
+        for i in range(12)
+    ]
+    claim_sets = [
+        _claims(*[("~" if rng.random() < 0.3 else "") + rng.choice(names)
+                  for _ in range(rng.randint(1, 5))])
+        for _ in range(200)
+    ]
+    statuses = RuleScreen(rules).screen(claim_sets)
+    checker = Z3Checker(rules=rules)
+    decided = 0
+    for claims, status in zip(claim_sets, statuses):
+        if status != UNKNOWN:
+            decided += 1
+            assert checker.check(claims).status == status
+    assert decided > 100
+
+
+def test_screen_and_check():
+    """SAT-наборы решаются отсевом, остальные — полной проверкой с ядром."""
+    claim_sets = [_claims("a", "d", "f"), _claims("a", "c"), _claims("a | c")]
+    results = screen_and_check(claim_sets, RULES, workers=1)
+    assert [r.status for r in results] == [SAT, UNSAT, SAT]
+    assert results[0].engine == "screen"
+    assert results[0].model == {"a": True, "d": True, "f": True}
+    assert set(results[1].unsat_core_labels) == {"rule1", "rule2", "claim_1", "claim_2"}
+    assert results[2].engine != "screen"
@@ -0,0 +1,112 @@
+"""Тесты упрощения формул перед кодированием."""
+
+import random
+
+import pytest
+
+from parser.ast_nodes import And, Var, iter_nodes
+from parser.logic_parser import parse_formula
+from parser.simplify import simplify, simplify_labeled
+from prover.z3_checker import Z3Checker
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("a & true", "a"),
+    ("a | false", "a"),
+    ("a | true", "true"),
+    ("false -> a", "true"),
+    ("true -> a", "a"),
+    ("a -> false", "~a"),
+    ("~~a", "a"),
+    ("~~~a", "~a"),
+    ("a <-> a", "true"),
+    ("a <-> ~a", "false"),
+    ("b <-> false", "~b"),
+    ("a -> a", "true"),
+    ("a & a & b", "(a & b)"),
+    ("a & ~a & b", "false"),
+    ("a | b | ~a", "true"),
+    ("a & (a | b)", "a"),
+    ("a | (a & b)", "a"),
+    ("(a & b) | (b & a & c)", "(a & b)"),
+    ("(a | b) & (a | b | c) & d", "((a | b) & d)"),
+    ("(a -> b) & ~~(a -> b)", "(a -> b)"),
+])
+def test_simplify_rules(text, expected):
+    """Свёртка констант, двойное отрицание, идемпотентность, поглощение."""
+    assert str(simplify(parse_formula(text))) == expected
+
+
+def _random_formula(rng: random.Random, depth: int) -> str:
+    if depth == 0 or rng.random() < 0.25:
+        return rng.choice(["a", "b", "c", "~a", "true", "false"])
+    op = rng.choice(["&", "|", "->", "<->"])
+    left = _random_formula(rng, depth - 1)
+    right = _random_formula(rng, depth - 1)
+    neg = "~" if rng.random() < 0.3 else ""
+    return f"{neg}({left} {op} {right})"
+
+
+def test_simplify_preserves_equivalence():
+    """Упрощённая формула эквивалентна исходной (проверка через Z3)."""
+    rng = random.Random(3)
+    checker = Z3Checker(native=False, simplify=False)
+    for _ in range(300):
+        formula = parse_formula(_random_formula(rng, 4))
+        simplified = simplify(formula)
+        assert len(list(iter_nodes(simplified))) <= len(list(iter_nodes(formula)))
+        differ = parse_formula(f"~(({formula}) <-> ({simplified}))")
+        assert checker.check([("differ", differ)]).is_consistent is False
+
+
+def test_simplify_deep_chain():
+    """Лево-глубокая цепочка с повторами упрощается за линейное время."""
+    formula = Var("a0")
+    for i in range(1, 10_000):
+        formula = And(formula, Var(f"a{i % 100}"))
+    simplified = simplify(formula)
+    assert isinstance(simplified, And)
+    assert len(simplified.operands) == 100
+
+
+def test_simplify_labeled_keeps_labels():
+    """Метки сохраняются, формулы-противоречия отмечаются."""
+    formulas = [
+        ("claim_1", parse_formula("a & true")),
+        ("claim_2", parse_formula("b & ~b")),
+        ("claim_3", parse_formula("c | ~c")),
+    ]
+    simplified, falsified = simplify_labeled(formulas)
+    assert [label for label, _ in simplified] == ["claim_1", "claim_2", "claim_3"]
+    assert [str(f) for _, f in simplified] == ["a", "false", "true"]
+    assert falsified == ["claim_2"]
+
+
+def test_checker_flags_false_claim_without_solver():
+    """Утверждение, упрощающееся до false, даёт UNSAT без Z3."""
+    checker = Z3Checker(rules=[("rule1", parse_formula("a -> b"))])
+    result = checker.check([
+        ("claim_1", parse_formula("a")),
+        ("claim_2", parse_formula("x & ~~~x")),
+    ])
+    assert result.is_consistent is False
+    assert result.engine == "simplify"
+    assert result.unsat_core_labels == ["claim_2"]
+    assert result.label_to_formula == {"claim_2": "(x & ~~~x)"}
+    # База правил даже не проверялась на непротиворечивость
+    assert checker._rules_consistent is None
+
+
+def test_core_labels_survive_simplification():
+    """Ядро по упрощённым формулам указывает на исходные метки."""
+    rules = [("rule1", parse_formula("a -> b & true"))]
+    for native in (True, False):
+        checker = Z3Checker(rules=rules, native=native)
+        result = checker.check([
+            ("claim_1", parse_formula("~~a & (a | c)")),
+            ("claim_2", parse_formula("~b | false")),
+            ("claim_3", parse_formula("d <-> d")),
+        ])
+        assert result.is_consistent is False
+        assert set(result.unsat_core_labels) == {"rule1", "claim_1", "claim_2"}
+        assert result.label_to_formula["claim_1"] == "(~~a & (a | c))"
@@ -0,0 +1,243 @@
+"""Тесты потокового извлечения: разбор JSON по кускам и инкрементальная проверка."""
+
+import io
+import json
+import random
+from unittest.mock import MagicMock, patch
+
+import openai
+import pytest
+
+from llm import client as llm_client
+from llm.streaming import ClaimStreamParser
+from parser.logic_parser import parse_formula
+from prover.checker_pool import CheckerPool
+from prover.z3_checker import SAT, UNSAT, Z3Checker
+
+RESPONSE = {
+    "predicates_used": {"x": "строка с \"}]{[ claims\""},
+    "claims": [
+        {"label": "claim_1", "formula": "x", "original_text": "экранирование \\\" {"},
+        {"label": "claim_2", "formula": "y -> z", "original_text": "[]", "extra": [1, {"a": 2}]},
+        {"label": "claim_3", "formula": "~x", "original_text": "t"},
+    ],
+    "notes": {"claims": [{"label": "не утверждение"}]},
+}
+
+
+def _chunks(text, rng):
+    i = 0
+    while i < len(text):
+        n = rng.randint(1, 9)
+        yield text[i:i + n]
+        i += n
+
+
+def test_parser_emits_each_claim_once():
+    """Утверждения выделяются при любой нарезке ответа, вложенные ключи игнорируются."""
+    text = json.dumps(RESPONSE, ensure_ascii=False, indent=2)
+    rng = random.Random(0)
+    for _ in range(50):
+        parser = ClaimStreamParser()
+        found = [c for chunk in _chunks(text, rng) for c in parser.feed(chunk)]
+        assert found == RESPONSE["claims"]
+        assert parser.claims_done
+        assert parser.text == text
+
+
+def test_parser_emits_claim_before_response_ends():
+    """Первое утверждение готово, пока второе ещё пишется."""
+    parser = ClaimStreamParser()
+    assert parser.feed('{"claims": [{"label": "claim_1", "formula": "a"}, {"lab') == [
+        {"label": "claim_1", "formula": "a"}
+    ]
+    assert parser.feed('el": "claim_2"}') == [{"label": "claim_2"}]
+
+
+def _stream_chunk(text=None, usage=None):
+    chunk = MagicMock()
+    chunk.choices = [] if text is None else [MagicMock()]
+    if text is not None:
+        chunk.choices[0].delta.content = text
+    chunk.usage = usage
+    return chunk
+
+
+@patch("llm.client.OpenAI")
+def test_stream_json_feeds_text_and_records_usage(mock_openai_cls):
+    text = json.dumps(RESPONSE)
+    usage = MagicMock(prompt_tokens=7, completion_tokens=3)
+    stream = [_stream_chunk(part) for part in _chunks(text, random.Random(1))]
+    mock_openai_cls.return_value.chat.completions.create.return_value = iter(
+        stream + [_stream_chunk(usage=usage)]
+    )
+    llm_client.metrics.reset()
+    received = []
+    data = llm_client.stream_json("extract", "sys", "msg", 0.1, on_text=received.append)
+    assert data == RESPONSE
+    assert "".join(received) == text
+    kwargs = mock_openai_cls.return_value.chat.completions.create.call_args.kwargs
+    assert kwargs["stream"] is True
+    assert llm_client.llm_metrics()["extract"]["completion_tokens"] == 3
+
+
+@patch("llm.client.OpenAI")
+def test_stream_json_retries_only_before_first_chunk(mock_openai_cls, monkeypatch):
+    monkeypatch.setattr(llm_client.time, "sleep", lambda _: None)
+    error = openai.InternalServerError(
+        "HTTP 503", response=MagicMock(status_code=503, headers={}), body=None
+    )
+
+    def broken_stream():
+        yield _stream_chunk('{"claims": [')
+        raise error
+
+    create = mock_openai_cls.return_value.chat.completions.create
+    create.side_effect = [error, iter([_stream_chunk('{"claims": []}')])]
+    assert llm_client.stream_json("extract", "sys", "msg", 0.1, on_text=lambda _: None) == {
+        "claims": []
+    }
+
+    create.side_effect = [broken_stream(), iter([_stream_chunk('{"claims": []}')])]
+    with pytest.raises(openai.InternalServerError):
+        llm_client.stream_json("extract", "sys", "msg", 0.1, on_text=lambda _: None)
+
+
+def test_incremental_matches_check():
+    """Инкрементальная сессия даёт тот же статус и ядро, что и check()."""
+    rules = [("r1", parse_formula("a -> b")), ("r2", parse_formula("b -> ~c")),
+             ("r3", parse_formula("x | y"))]
+    claims = [("claim_1", parse_formula("a")), ("claim_2", parse_formula("d")),
+              ("claim_3", parse_formula("c")), ("claim_4", parse_formula("e"))]
+    checker = Z3Checker(rules=rules)
+    statuses = []
+    with checker.incremental() as session:
+        for label, formula in claims:
+            statuses.append(session.add(label, formula))
+        result = session.result()
+    assert statuses == [SAT, SAT, UNSAT, UNSAT]
+    expected = checker.check(claims)
+    assert result.status == expected.status == UNSAT
+    assert set(result.unsat_core_labels) == {"r1", "r2", "claim_1", "claim_3"}
+    assert set(result.label_to_formula) >= {"claim_4", "r1"}
+
+    # После сессии чекер снова чистый
+    assert checker.check(claims[:2]).status == SAT
+    with CheckerPool(rules=rules, size=1) as pool, pool.incremental() as session:
+        session.add("claim_1", parse_formula("a"))
+        assert session.result().model == {"a": True}
+
+
+def test_incremental_classify_matches_check():
+    """result(classify=True) даёт те же статусы, что check(classify=True)."""
+    rules = [("r1", parse_formula("a -> b")), ("r2", parse_formula("b -> ~c"))]
+    for texts in (["a", "b", "d"], ["a", "c", "b", "d"]):
+        claims = [(f"claim_{i + 1}", parse_formula(t)) for i, t in enumerate(texts)]
+        checker = Z3Checker(rules=rules)
+        with checker.incremental() as session:
+            for label, formula in claims:
+                session.add(label, formula)
+            result = session.result(classify=True)
+        expected = checker.check(claims, classify=True)
+        assert result.status == expected.status
+        assert result.claim_status == expected.claim_status
+        if result.status == SAT:
+            assert result.model == expected.model
+
+
+@patch("llm.client.OpenAI")
+def test_streaming_stage_takes_checker_at_first_claim(mock_openai_cls, monkeypatch):
+    """Чекер берётся из пула сессий при первом утверждении, не до запроса к LLM."""
+    import main
+
+    order = []
+    incremental = CheckerPool.incremental
+
+    def tracking_incremental(pool):
+        order.append("checker")
+        return incremental(pool)
+
+    monkeypatch.setattr(CheckerPool, "incremental", tracking_incremental)
+    monkeypatch.setattr(main, "_rules_pool", None)  # обычный пул не нужен
+
+    def stream(**kwargs):
+        order.append("llm")
+        text = json.dumps({"claims": [{"label": "claim_1", "formula": "x"}]})
+        return iter([_stream_chunk(text[:5]), _stream_chunk(text[5:])])
+
+    mock_openai_cls.return_value.chat.completions.create.side_effect = stream
+    main.stage_extract_and_check_stream("резюме", False, cache="off")
+    assert order == ["llm", "checker"]
+
+
+@patch("llm.client.OpenAI")
+def test_streaming_pipeline_classifies_in_session(mock_openai_cls, tmp_path, monkeypatch):
+    """С classify поток не запускает вторую полную проверку."""
+    import main
+
+    def no_full_check(*args, **kwargs):
+        raise AssertionError("полная проверка после потока не нужна")
+
+    monkeypatch.setattr(main, "stage_parse_and_check", no_full_check)
+    claims = [{"label": "claim_1", "formula": "x", "original_text": "t"},
+              {"label": "claim_2", "formula": "x | y", "original_text": "t"}]
+    text = json.dumps({"claims": claims, "predicates_used": {}})
+    mock_openai_cls.return_value.chat.completions.create.side_effect = (
+        lambda **kw: iter([_stream_chunk(text)])
+    )
+    path = tmp_path / "resume.txt"
+    path.write_text("резюме", encoding="utf-8")
+
+    report = main.run_pipeline(str(path), stream=True, classify=True, cache="off")
+    z3_check = report["stages"]["z3_check"]
+    assert z3_check["status"] == SAT
+    assert z3_check["claim_status"] == {"claim_1": "independent", "claim_2": "entailed"}
+
+
+@patch("llm.client.OpenAI")
+def test_streaming_stage_checks_claims_as_they_arrive(mock_openai_cls):
+    """Статус каждого утверждения известен до конца ответа; отчёт как у обычного пути."""
+    from main import stage_extract_and_check_stream
+
+    claims = [
+        {"label": "claim_1", "formula": "x", "original_text": "t"},
+        {"label": "claim_2", "formula": "x ->", "original_text": "t"},
+        {"label": "claim_3", "formula": "~x", "original_text": "t"},
+    ]
+    text = json.dumps({"claims": claims, "predicates_used": {}})
+    create = mock_openai_cls.return_value.chat.completions.create
+    create.side_effect = lambda **kw: iter(
+        [_stream_chunk(part) for part in _chunks(text, random.Random(2))]
+    )
+
+    seen = []
+    result = stage_extract_and_check_stream(
+        "резюме", False, cache="off", on_claim=lambda c, st: seen.append((c["label"], st))
+    )
+    got_claims, _, check_result, parse_errors = result
+    assert got_claims == claims
+    assert seen == [("claim_1", SAT), ("claim_2", SAT), ("claim_3", UNSAT)]
+    assert check_result.status == UNSAT
+    assert set(check_result.unsat_core_labels) == {"claim_1", "claim_3"}
+    assert [e["label"] for e in parse_errors] == ["claim_2"]
+
+
+def test_web_stream_endpoint():
+    """POST /api/check/stream отдаёт NDJSON: утверждения, затем отчёт."""
+    from web.app import app
+
+    def fake_pipeline(path, on_claim=None, **kwargs):
+        assert kwargs["stream"] is True
+        on_claim({"label": "claim_1"}, SAT)
+        return {"summary": {"status": SAT}}
+
+    app.config["TESTING"] = True
+    with app.test_client() as client, patch("web.app.run_pipeline", fake_pipeline):
+        data = {"file": (io.BytesIO(b"resume text"), "resume.txt")}
+        resp = client.post("/api/check/stream", data=data, content_type="multipart/form-data")
+        events = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert resp.status_code == 200
+    assert events == [
+        {"event": "claim", "claim": {"label": "claim_1"}, "status": SAT},
+        {"event": "report", "report": {"summary": {"status": SAT}}},
+    ]
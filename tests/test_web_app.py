@@ -24,6 +24,13 @@ def test_health(client):
     assert "model" in data
 
 
+def test_metrics(client):
+    """GET /api/metrics возвращает метрики LLM по стадиям."""
+    resp = client.get("/api/metrics")
+    assert resp.status_code == 200
+    assert isinstance(resp.get_json()["llm"], dict)
+
+
 def test_index(client):
     """GET / возвращает HTML-страницу."""
     resp = client.get("/")
@@ -62,6 +69,18 @@ def test_upload_success(client):
     assert resp.get_json() == mock_report
 
 
+def test_upload_classify_opt_in(client):
+    """Классификация утверждений включается только полем формы classify."""
+    with patch("web.app.run_pipeline", return_value={}) as pipeline:
+        data = {"file": (io.BytesIO(b"resume text"), "resume.txt")}
+        client.post("/api/check", data=data, content_type="multipart/form-data")
+        assert pipeline.call_args.kwargs["classify"] is False
+
+        data = {"file": (io.BytesIO(b"resume text"), "resume.txt"), "classify": "1"}
+        client.post("/api/check", data=data, content_type="multipart/form-data")
+        assert pipeline.call_args.kwargs["classify"] is True
+
+
 def test_upload_pipeline_error(client):
     """POST /api/check при ошибке пайплайна — 500 с generic-сообщением."""
     with patch("web.app.run_pipeline", side_effect=RuntimeError("boom")):
@@ -2,7 +2,9 @@
 
 import pytest
 from parser.logic_parser import parse_formula
-from prover.z3_checker import Z3Checker
+from prover.z3_checker import (
+    CONFLICTING, ENTAILED, INDEPENDENT, REFUTED, Z3Checker, true_vars,
+)
 
 
 def test_consistent_set():
@@ -89,3 +91,452 @@ def test_empty_formulas():
     checker = Z3Checker()
     result = checker.check([])
     assert result.is_consistent is True
+
+
+def test_nary_conjunction_single_z3_and():
+    """N-арная конъюнкция конвертируется в один z3.And со всеми операндами."""
+    import z3
+
+    checker = Z3Checker()
+    expr = checker.to_z3(parse_formula("sdui -> (compatibility & rollback & monitoring)"))
+    conj = expr.arg(1)
+    assert z3.is_and(conj)
+    assert conj.num_args() == 3
+
+
+def test_rules_preasserted_and_checker_reused():
+    """Правила добавляются один раз; утверждения не протекают между check()."""
+    checker = Z3Checker(rules=[
+        ("rule1", parse_formula("a -> b")),
+        ("rule2", parse_formula("~(b & c)")),
+    ])
+    assert checker.rule_labels == ["rule1", "rule2"]
+
+    first = checker.check([("claim_a", parse_formula("a")), ("claim_c", parse_formula("c"))])
+    assert first.is_consistent is False
+    assert set(first.unsat_core_labels) == {"rule1", "rule2", "claim_a", "claim_c"}
+    assert first.label_to_formula["rule1"] == "(a -> b)"
+
+    # Те же метки с другими формулами: прошлые утверждения уже сняты
+    second = checker.check([("claim_a", parse_formula("~a")), ("claim_c", parse_formula("c"))])
+    assert second.is_consistent is True
+
+    third = checker.check([("claim_b", parse_formula("b")), ("claim_c", parse_formula("c"))])
+    assert third.is_consistent is False
+    assert set(third.unsat_core_labels) == {"rule2", "claim_b", "claim_c"}
+
+
+def test_all_cores_enumerates_independent_contradictions():
+    """Режим all_cores находит все независимые минимальные ядра."""
+    checker = Z3Checker(rules=[
+        ("rule1", parse_formula("a -> b")),
+        ("rule2", parse_formula("c -> ~d")),
+    ])
+    result = checker.check(
+        [
+            ("claim_a", parse_formula("a")),
+            ("claim_not_b", parse_formula("~b")),
+            ("claim_c", parse_formula("c")),
+            ("claim_d", parse_formula("d")),
+            ("claim_x", parse_formula("x")),
+        ],
+        all_cores=True,
+    )
+    assert result.is_consistent is False
+    assert result.cores_exhaustive is True
+    assert sorted(map(sorted, result.unsat_cores)) == [
+        ["claim_a", "claim_not_b", "rule1"],
+        ["claim_c", "claim_d", "rule2"],
+    ]
+    assert result.unsat_core_labels in result.unsat_cores
+
+
+def test_all_cores_respects_count_budget():
+    """Перечисление останавливается на max_cores и помечается неполным."""
+    checker = Z3Checker()
+    formulas = [(f"p{i}", parse_formula(f"v{i}")) for i in range(4)]
+    formulas += [(f"n{i}", parse_formula(f"~v{i}")) for i in range(4)]
+    result = checker.check(formulas, all_cores=True, max_cores=2)
+    assert len(result.unsat_cores) == 2
+    assert result.cores_exhaustive is False
+    for core in result.unsat_cores:
+        assert len(core) == 2
+
+
+def test_correction_sets_ranked_by_size_rules_kept():
+    """MCS считаются только по утверждениям и упорядочены по размеру."""
+    checker = Z3Checker(rules=[
+        ("rule1", parse_formula("a -> b")),
+        ("rule2", parse_formula("c -> ~d")),
+    ])
+    result = checker.check(
+        [
+            ("c1", parse_formula("a")),
+            ("c2", parse_formula("~b")),
+            ("c3", parse_formula("c")),
+            ("c4", parse_formula("d")),
+            ("c5", parse_formula("~a")),
+        ],
+        corrections=True,
+    )
+    assert result.corrections_exhaustive is True
+    sets = result.correction_sets
+    assert [len(s) for s in sets] == sorted(len(s) for s in sets)
+    assert sorted(map(sorted, sets)) == [
+        ["c1", "c3"], ["c1", "c4"], ["c2", "c3", "c5"], ["c2", "c4", "c5"],
+    ]
+    assert all(not label.startswith("rule") for s in sets for label in s)
+
+
+def test_correction_sets_empty_when_rules_inconsistent():
+    """Если противоречивы сами правила, корректирующих наборов нет."""
+    checker = Z3Checker(rules=[
+        ("rule1", parse_formula("p")),
+        ("rule2", parse_formula("~p")),
+    ])
+    result = checker.check([("c1", parse_formula("q"))], corrections=True)
+    assert result.is_consistent is False
+    assert result.correction_sets == []
+
+
+def test_rule_slice_follows_shared_variables():
+    """В срез попадают правила, связанные с утверждениями цепочкой переменных."""
+    checker = Z3Checker(rules=[
+        ("rule_ab", parse_formula("a -> b")),
+        ("rule_bc", parse_formula("b -> c")),
+        ("rule_xy", parse_formula("x -> y")),
+        ("rule_const", parse_formula("true")),
+    ])
+    claims = [("claim_a", parse_formula("a"))]
+    assert checker.slice_rules(claims) == ["rule_ab", "rule_bc", "rule_const"]
+
+    result = checker.check(claims + [("claim_c", parse_formula("~c"))])
+    assert result.is_consistent is False
+    assert "rule_xy" not in result.label_to_formula
+
+    full = Z3Checker(rules=[("rule_xy", parse_formula("x -> y"))], slicing=False)
+    assert "rule_xy" in full.check(claims).label_to_formula
+
+
+def test_rule_slice_disabled_when_rules_inconsistent():
+    """Если база правил противоречива сама по себе, срез не применяется."""
+    checker = Z3Checker(rules=[
+        ("rule_p", parse_formula("p")),
+        ("rule_not_p", parse_formula("~p")),
+    ])
+    result = checker.check([("claim_a", parse_formula("a"))])
+    assert result.is_consistent is False
+    assert set(result.unsat_core_labels) == {"rule_p", "rule_not_p"}
+
+
+def test_rule_slice_matches_full_check_on_corpus():
+    """На накопленной базе правил срез даёт тот же ответ, что полная проверка."""
+    import json
+    import os
+    import random
+
+    from parser.logic_parser import parse_formulas
+
+    path = os.path.join(
+        os.path.dirname(os.path.dirname(__file__)),
+        "extraction_output", "accumulated_results.json",
+    )
+    if not os.path.exists(path):
+        pytest.skip("нет accumulated_results.json")
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    parsed = parse_formulas([r["formula"] for r in data["rules"]], return_exceptions=True)
+    rules = [
+        (r["label"], formula) for r, formula in zip(data["rules"], parsed)
+        if not isinstance(formula, Exception)
+    ]
+    vocabulary = sorted(name for name in data["vocabulary"] if name.isascii() and name.isidentifier())
+
+    sliced = Z3Checker(rules=rules)
+    full = Z3Checker(rules=rules, slicing=False)
+    rng = random.Random(7)
+    for _ in range(15):
+        claims = [
+            (f"claim_{j}", parse_formula(("~" if rng.random() < 0.4 else "") + rng.choice(vocabulary)))
+            for j in range(rng.randint(1, 8))
+        ]
+        a = sliced.check(claims)
+        b = full.check(claims)
+        assert a.is_consistent == b.is_consistent
+        if not a.is_consistent:
+            # Ядро из среза остаётся противоречивым и без остальных правил
+            core = [(l, f) for l, f in rules + claims if l in set(a.unsat_core_labels)]
+            assert Z3Checker(slicing=False).check(core).is_consistent is False
+
+
+def test_checkers_use_separate_contexts():
+    """Каждый чекер работает в своём z3.Context, не в глобальном."""
+    import z3
+
+    first, second = Z3Checker(), Z3Checker()
+    assert first.ctx is not second.ctx
+    assert first.ctx is not z3.main_ctx()
+    assert first.to_z3(parse_formula("a & b")).ctx is first.ctx
+
+    shared = z3.Context()
+    assert Z3Checker(ctx=shared).ctx is shared
+
+
+def test_closed_checker_releases_solver():
+    """close() отпускает солвер и контекст; with закрывает чекер сам."""
+    with Z3Checker(rules=[("rule1", parse_formula("a -> b"))], native=False) as checker:
+        assert checker.check([("claim_a", parse_formula("a"))]).is_consistent is True
+    assert checker.ctx is None
+    with pytest.raises(Exception):
+        checker.check([("claim_a", parse_formula("a"))])
+
+
+def test_model_covers_only_claim_variables():
+    """Модель содержит переменные утверждений, без правил и литералов-меток."""
+    import pickle
+
+    rules = [("rule1", parse_formula("a -> b")), ("rule2", parse_formula("b -> c | d"))]
+    for native in (True, False):
+        checker = Z3Checker(rules=rules, native=native)
+        result = checker.check([("claim_1", parse_formula("a")), ("claim_2", parse_formula("~d"))])
+        assert result.is_consistent is True
+        assert dict(result.model) == {"a": True, "d": False}
+        assert true_vars(result.model) == ["a"]
+        assert pickle.loads(pickle.dumps(result)).model == {"a": True, "d": False}
+
+
+def _pigeonhole(pigeons: int) -> list:
+    """Принцип Дирихле: pigeons голубей в pigeons-1 клетках (UNSAT, трудно для SAT)."""
+    holes = range(pigeons - 1)
+    formulas = [
+        (f"pigeon_{i}", parse_formula(" | ".join(f"p{i}_{h}" for h in holes)))
+        for i in range(pigeons)
+    ]
+    formulas += [
+        (f"hole_{h}_{i}_{j}", parse_formula(f"~(p{i}_{h} & p{j}_{h})"))
+        for h in holes for i in range(pigeons) for j in range(i + 1, pigeons)
+    ]
+    return formulas
+
+
+def test_rlimit_exceeded_gives_unknown():
+    """При исчерпании rlimit статус UNKNOWN, а не UNSAT."""
+    from prover.z3_checker import UNKNOWN
+
+    checker = Z3Checker(rlimit=500)
+    result = checker.check(_pigeonhole(8))
+    assert result.status == UNKNOWN
+    assert result.is_consistent is None
+    assert result.unsat_core_labels == []
+    assert result.reason_unknown
+
+    # Лимит действует на каждый вызов: простая проверка после него проходит
+    assert checker.check([("claim_a", parse_formula("a"))]).is_consistent is True
+
+
+def test_timeout_bounds_check_latency():
+    """timeout ограничивает время решения."""
+    import time
+
+    checker = Z3Checker(timeout=0.2)
+    start = time.perf_counter()
+    result = checker.check(_pigeonhole(11))
+    assert time.perf_counter() - start < 5
+    assert result.status == "unknown"
+    assert "timeout" in result.reason_unknown or "canceled" in result.reason_unknown
+
+
+def test_timeout_is_overall_deadline_per_check():
+    """timeout — общий срок вызова check(), включая MUS, MCS и классификацию."""
+    import time
+
+    checker = Z3Checker(timeout=0.5)
+    start = time.perf_counter()
+    result = checker.check(_pigeonhole(7), all_cores=True, corrections=True, classify=True)
+    assert time.perf_counter() - start < 1.5
+    assert result.status == "unsat"
+
+    # Срок истёк до классификации: статусы UNKNOWN без запросов к решателю
+    from prover.z3_checker import UNKNOWN
+
+    checker = Z3Checker(timeout=1e-6)
+    claims = [(f"claim_{i}", parse_formula(f"a{i}")) for i in range(20)]
+    statuses = checker.check(claims, classify=True).claim_status
+    assert set(statuses.values()) <= {UNKNOWN, INDEPENDENT}
+    assert UNKNOWN in statuses.values()
+
+
+def test_expired_deadline_does_not_leak_into_later_checks():
+    """Остаток срока одного вызова не остаётся таймаутом решателя для следующих."""
+    import time
+
+    checker = Z3Checker(rules=_pigeonhole(8), timeout=10, native=False)
+    checker._solve(checker._solver, deadline=time.monotonic() - 1)
+    with checker.incremental():
+        pass
+    assert checker._rules_consistent is False
+
+
+def test_unknown_rules_check_not_cached_as_inconsistent():
+    """UNKNOWN при проверке базы правил не выключает срез навсегда."""
+    from prover.z3_checker import UNKNOWN
+
+    checker = Z3Checker(rules=_pigeonhole(8), rlimit=500)
+    assert checker.check([("claim_a", parse_formula("x"))]).status == UNKNOWN
+    assert checker._rules_consistent is None
+
+    # Инкрементальная сессия тоже повторяет проверку, не зависая на блокировке
+    with checker.incremental() as session:
+        assert session.add("claim_a", parse_formula("x")) == UNKNOWN
+    assert checker._rules_consistent is None
+
+    rules = [("rule1", parse_formula("a -> b"))]
+    checker = Z3Checker(rules=rules, native=False)
+    assert checker.check([("claim_a", parse_formula("a"))]).is_consistent is True
+    assert checker._rules_consistent is True
+
+
+def test_check_result_has_statistics_and_timings():
+    """CheckResult содержит статистику решателя и время кодирования/решения."""
+    z3_result = Z3Checker(native=False).check(_pigeonhole(4))
+    assert z3_result.status == "unsat"
+    assert "rlimit count" in z3_result.statistics
+    assert z3_result.encode_time > 0
+    assert z3_result.solve_time > 0
+
+    native_result = Z3Checker().check([("f1", parse_formula("a -> b")), ("f2", parse_formula("a"))])
+    assert native_result.engine == "horn"
+    assert native_result.statistics["clauses"] == 2
+    assert native_result.status == "sat"
+
+
+@pytest.mark.parametrize("config", ["smt", "qf_fd", "sat"])
+def test_solver_configs_agree(config):
+    """Все конфигурации Z3 дают тот же ответ и непустое ядро."""
+    checker = Z3Checker(native=False, solver_config=config)
+    result = checker.check(_pigeonhole(5))
+    assert result.status == "unsat"
+    assert result.unsat_core_labels
+    assert result.engine == ("z3" if config == "smt" else f"z3-{config}")
+    assert checker.check([("f1", parse_formula("a | b"))]).status == "sat"
+
+    with pytest.raises(ValueError):
+        Z3Checker(solver_config="nope")
+
+
+def test_portfolio_returns_first_definitive_answer(caplog):
+    """Портфель отвечает так же, как один чекер, и пишет победителя в лог."""
+    import logging
+    from prover.z3_checker import PortfolioChecker
+
+    rules = [("rule1", parse_formula("a -> b")), ("rule2", parse_formula("~(b & c)"))]
+    claim_sets = [
+        [("claim_a", parse_formula("a")), ("claim_c", parse_formula("c"))],
+        [("claim_a", parse_formula("a | c"))],
+        _pigeonhole(6),
+    ]
+    reference = Z3Checker(rules=rules)
+    with caplog.at_level(logging.INFO, logger="prover.z3_checker"):
+        with PortfolioChecker(rules, configs=("native", "smt", "sat")) as portfolio:
+            for claims in claim_sets:
+                result = portfolio.check(claims)
+                assert result.status == reference.check(claims).status
+            assert sum(portfolio.wins.values()) == len(claim_sets)
+    assert "победила конфигурация" in caplog.text
+
+    with pytest.raises(ValueError):
+        PortfolioChecker(configs=("nope",))
+
+
+def test_pipeline_portfolio_replaced_and_closed(monkeypatch):
+    """Портфель пайплайна один на процесс; при смене лимитов старый закрывается."""
+    import main
+
+    monkeypatch.setattr(main, "_portfolio", None)
+    rules = (("rule1", parse_formula("a -> b")),)
+    first = main._rules_portfolio(rules, 5.0, 0)
+    assert main._rules_portfolio(rules, 5.0, 0) is first
+    processes = [process for process, _ in first._workers.values()]
+
+    second = main._rules_portfolio(rules, 6.0, 0)
+    try:
+        assert second is not first
+        assert first.configs == []
+        assert not any(process.is_alive() for process in processes)
+    finally:
+        second.close()
+
+
+def test_entailment_core_over_rule_subsets():
+    """entailment_core: следование из правил и противоречивость подмножества."""
+    from parser.ast_nodes import Const
+
+    checker = Z3Checker(rules=[
+        ("rule1", parse_formula("a -> b")),
+        ("rule2", parse_formula("b -> c")),
+        ("rule3", parse_formula("~c")),
+    ])
+    assert set(checker.entailment_core(parse_formula("a -> c"))) <= {"rule1", "rule2", "rule3"}
+    assert checker.entailment_core(parse_formula("a -> c"), ["rule1"]) is None
+    assert checker.entailment_core(parse_formula("~a"), ["rule1", "rule2", "rule3"])
+    assert checker.entailment_core(Const(False)) is None
+    # Запросы не оставляют следов в солвере
+    assert checker.check([("claim_a", parse_formula("d"))]).is_consistent is True
+
+
+def test_classify_claims_statuses():
+    """Утверждение следует из остальных, опровергается ими или независимо."""
+    checker = Z3Checker(rules=[("rule1", parse_formula("a -> b")), ("rule2", parse_formula("b -> ~c"))])
+    status = checker.classify_claims([
+        ("claim_a", parse_formula("a")),
+        ("claim_b", parse_formula("b")),
+        ("claim_d", parse_formula("d")),
+    ])
+    assert status == {"claim_a": INDEPENDENT, "claim_b": ENTAILED, "claim_d": INDEPENDENT}
+
+    status = checker.classify_claims([
+        ("claim_a", parse_formula("a")),
+        ("claim_c", parse_formula("c")),
+    ])
+    assert status == {"claim_a": REFUTED, "claim_c": REFUTED}
+
+    # x и ~x противоречат друг другу, поэтому для y остальные уже противоречивы
+    result = checker.check([
+        ("claim_x", parse_formula("x")),
+        ("claim_nx", parse_formula("~x")),
+        ("claim_y", parse_formula("y")),
+    ], classify=True)
+    assert result.is_consistent is False
+    assert set(result.unsat_core_labels) == {"claim_x", "claim_nx"}
+    assert result.claim_status == {
+        "claim_x": REFUTED, "claim_nx": REFUTED, "claim_y": CONFLICTING,
+    }
+
+
+def test_classify_claims_matches_naive_checks():
+    """На случайных наборах классификация совпадает с парой отдельных проверок."""
+    import random
+    from parser.ast_nodes import Not
+
+    rng = random.Random(7)
+    names = ["a", "b", "c", "d", "e"]
+    rules = [("rule1", parse_formula("a -> b")), ("rule2", parse_formula("b & c -> ~d"))]
+    checker = Z3Checker(rules=rules)
+    for _ in range(30):
+        claims = [
+            (f"claim_{i}", parse_formula(
+                f"{'~' if rng.random() < 0.4 else ''}{rng.choice(names)}"
+                + (f" | {rng.choice(names)}" if rng.random() < 0.3 else "")
+            ))
+            for i in range(rng.randint(1, 6))
+        ]
+        status = checker.classify_claims(claims)
+        for label, formula in claims:
+            others = [(l, f) for l, f in claims if l != label]
+            entailed = not checker.check(others + [("query", Not(formula))]).is_consistent
+            refuted = not checker.check(others + [(label, formula)]).is_consistent
+            expected = {
+                (True, True): CONFLICTING, (True, False): ENTAILED,
+                (False, True): REFUTED, (False, False): INDEPENDENT,
+            }[entailed, refuted]
+            assert status[label] == expected
@@ -1,11 +1,14 @@
 """Flask-backend for the resume fact-checker web UI."""
 
+import json
 import logging
 import os
+import queue
 import sys
 import tempfile
+import threading
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file
 
 # Allow importing project modules from parent directory
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -14,6 +17,13 @@ if parent_dir not in sys.path:
 
 from main import run_pipeline  # noqa: E402
 from config import LLM_MODEL, FLASK_DEBUG, FLASK_HOST, FLASK_PORT  # noqa: E402
+from domain.rules import DOMAIN_RULES  # noqa: E402
+from llm.cache import cache_stats  # noqa: E402
+from llm.client import llm_metrics  # noqa: E402
+from parser.logic_parser import parse_formulas  # noqa: E402
+
+# Parse domain rules once per worker process; requests then hit the parse cache
+parse_formulas((formula for _, formula in DOMAIN_RULES), return_exceptions=True)
 
 app = Flask(__name__)
 
@@ -33,38 +43,108 @@ def health():
     return jsonify({"status": "ok", "model": LLM_MODEL})
 
 
-@app.route("/api/check", methods=["POST"])
-def check_resume():
+@app.route("/api/metrics")
+def metrics():
+    # Per-stage LLM latency, retries and tokens of this worker process;
+    # llm_cache is None when the response cache is disabled
+    return jsonify({"llm": llm_metrics(), "llm_cache": cache_stats()})
+
+
+def _save_upload():
+    """Validate the uploaded file and save it to a temp file.
+
+    Returns (path, None) on success or (None, error response).
+    """
     if "file" not in request.files:
-        return jsonify({"error": "No file uploaded"}), 400
+        return None, (jsonify({"error": "No file uploaded"}), 400)
 
     file = request.files["file"]
     if not file.filename:
-        return jsonify({"error": "Empty filename"}), 400
+        return None, (jsonify({"error": "Empty filename"}), 400)
 
     ext = os.path.splitext(file.filename)[1].lower()
     if ext not in ALLOWED_EXTENSIONS:
-        return jsonify({"error": f"Unsupported file type '{ext}'. Allowed: .txt, .pdf"}), 400
+        return None, (
+            jsonify({"error": f"Unsupported file type '{ext}'. Allowed: .txt, .pdf"}), 400
+        )
 
     # Read content to check size
     content = file.read()
     if len(content) > MAX_FILE_SIZE:
-        return jsonify({"error": f"File too large ({len(content)} bytes). Max: 5 MB"}), 400
+        return None, (
+            jsonify({"error": f"File too large ({len(content)} bytes). Max: 5 MB"}), 400
+        )
 
-    tmp = None
-    try:
-        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=ext)
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=ext)
+    with tmp:
         tmp.write(content)
-        tmp.close()
+    return tmp.name, None
+
 
-        report = run_pipeline(tmp.name, verbose=False)
+def _classify_requested():
+    """Per-claim statuses are opt-in (form field "classify").
+
+    Classification bypasses the solver fast paths and costs one or two extra
+    solver calls per claim, so the default request gets only the verdict.
+    """
+    return request.form.get("classify", "").lower() in ("1", "true", "on", "yes")
+
+
+@app.route("/api/check", methods=["POST"])
+def check_resume():
+    path, error = _save_upload()
+    if error:
+        return error
+
+    try:
+        # classify: per-claim entailed/refuted/independent for highlighting
+        report = run_pipeline(path, verbose=False, classify=_classify_requested())
         return jsonify(report)
     except Exception:
         logging.exception("Error processing resume")
         return jsonify({"error": "Internal server error"}), 500
     finally:
-        if tmp and os.path.exists(tmp.name):
-            os.unlink(tmp.name)
+        os.unlink(path)
+
+
+@app.route("/api/check/stream", methods=["POST"])
+def check_resume_stream():
+    """Same pipeline, streamed as NDJSON events while the LLM is generating.
+
+    One {"event": "claim", "claim": ..., "status": ...} line per claim as soon
+    as it is checked, then {"event": "report", "report": ...} (or "error").
+    """
+    path, error = _save_upload()
+    if error:
+        return error
+
+    classify = _classify_requested()
+    events: queue.Queue = queue.Queue()
+
+    def on_claim(claim, status):
+        events.put({"event": "claim", "claim": claim, "status": status})
+
+    # The pipeline (and its Z3 session) runs in one worker thread; the
+    # response generator only relays its events
+    def work():
+        try:
+            report = run_pipeline(path, verbose=False, classify=classify, stream=True,
+                                  on_claim=on_claim)
+            events.put({"event": "report", "report": report})
+        except Exception:
+            logging.exception("Error processing resume")
+            events.put({"event": "error", "error": "Internal server error"})
+        finally:
+            os.unlink(path)
+            events.put(None)
+
+    threading.Thread(target=work, daemon=True).start()
+
+    def generate():
+        while (event := events.get()) is not None:
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+
+    return Response(generate(), mimetype="application/x-ndjson")
 
 
 if __name__ == "__main__":